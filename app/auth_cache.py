@@ -0,0 +1,107 @@
+"""Short-lived cache of verified bearer tokens and the users they belong to.
+
+Every authenticated request would otherwise decode the JWT and load the user
+by username. A hit skips both: the cached user columns are attached to the
+request's session without a SELECT. Entries live for AUTH_CACHE_TTL seconds
+(default 60, never past the token's own expiry) in a bounded in-process LRU
+of AUTH_CACHE_SIZE tokens (default 4096).
+
+Any ORM update or delete of a User (password change, rename, deletion)
+invalidates that user's cached tokens in this process through mapper events,
+once when the change is flushed and again when it commits. Other worker
+processes drop theirs when the TTL runs out. Core statements such as
+`update(User)`, `Query.update()` and bulk updates bypass the mapper events;
+call invalidate() after them.
+
+Callers read generation() before loading the user and pass it to remember(),
+so a change committed between that load and remember() is not cached as
+current.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from app.cache import MemoryCache
+from app.models import User
+
+USER_FIELDS = ("id", "username", "hashed_password", "created_at")
+
+_cache = MemoryCache(max_entries=int(os.getenv("AUTH_CACHE_SIZE", 4096)))
+_generations: Dict[str, int] = {}
+_lock = threading.Lock()
+_PENDING = "auth_cache_invalidated"
+
+
+def _ttl() -> int:
+    return int(os.getenv("AUTH_CACHE_TTL", 60))
+
+
+def _key(token: str) -> str:
+    # Hashed so raw tokens are never held in memory longer than the request
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def generation(username: str) -> int:
+    """Current invalidation counter of a user; read it before loading the user row."""
+    with _lock:
+        return _generations.get(username, 0)
+
+
+def lookup(token: str) -> Optional[Dict[str, Any]]:
+    """Cached user columns for a token, or None on a miss or after invalidation."""
+    item = _cache.get(_key(token))
+    if item is None or item["generation"] != generation(item["user"]["username"]):
+        return None
+    return item["user"]
+
+
+def remember(token: str, user: User, expires_at: Optional[float], loaded_generation: int):
+    """Cache `user` for `token`, tagged with the generation read before the user was loaded."""
+    ttl = _ttl()
+    if expires_at is not None:
+        ttl = min(ttl, int(expires_at - time.time()))
+    if ttl <= 0:
+        return
+    _cache.set(_key(token), {
+        "generation": loaded_generation,
+        "user": {field: getattr(user, field) for field in USER_FIELDS},
+    }, ttl)
+
+
+def invalidate(username: str):
+    """Drop every cached token of this user."""
+    with _lock:
+        _generations[username] = _generations.get(username, 0) + 1
+
+
+def clear():
+    _cache.clear()
+    with _lock:
+        _generations.clear()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    usernames = {target.username, *(inspect(target).attrs.username.history.deleted or ())}
+    for username in usernames:
+        invalidate(username)
+    # A request that loaded the user after the flush but before the commit
+    # still saw the old row; invalidating again on commit drops its entry
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING, set()).update(usernames)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for username in session.info.pop(_PENDING, ()):
+        invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session):
+    session.info.pop(_PENDING, None)
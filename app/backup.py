@@ -0,0 +1,353 @@
+"""Streaming backups of every table as gzipped NDJSON, and the matching restore.
+
+A backup is a directory holding one `<table>.ndjson.gz` file per table, a
+`<table>.ids.gz` list of the ids the table held at backup time, and a
+`manifest.json` with each file's row count, sha256 and watermark. Tables are
+read with server-side batches (yield_per) and written line by line, so memory
+stays bounded however large the database grows. Every table is read on one
+connection inside one transaction (REPEATABLE READ on Postgres, a read
+transaction on SQLite), so rows, id lists and foreign keys agree with each
+other however busy the database is while the backup runs.
+
+Incremental backups only export rows changed since the previous backup's
+watermarks: tables with an updated_at column are filtered on created_at and
+updated_at, less WATERMARK_MARGIN, and INSERT_ONLY_TABLES (responses, which editing an entry deletes
+and re-inserts) on their id. Every other table can change in place without a
+timestamp to show it (a goal deactivated, a password rehashed), so it is
+exported in full each time.
+
+Restoring replays a chain (the full backup, then each incremental on top of
+it). Each step first deletes rows whose ids are missing from that step's id
+lists, so deletions carry over, then upserts its rows keyed on the primary
+key. Pruning holds one table's id list in memory at a time.
+"""
+import gzip
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import Date, DateTime, Table, func, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+from app.database import Base
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 2
+BATCH_SIZE = 1000
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+INSERT_ONLY_TABLES = ("responses",)
+# Timestamps come from the database clock when a row is written (on Postgres,
+# when its transaction started), so a transaction still open during one backup
+# can commit rows stamped before that backup's watermark. Re-exporting this
+# much history catches them; the upserting restore tolerates the repeats.
+WATERMARK_MARGIN = timedelta(minutes=int(os.getenv("BACKUP_WATERMARK_MARGIN_MINUTES", 60)))
+
+
+class BackupError(Exception):
+    """A backup directory is missing, incomplete or fails its checksums."""
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _timestamp_columns(table: Table) -> List:
+    """The columns an incremental backup filters on, or [] when the table has no updated_at."""
+    if "updated_at" not in table.c:
+        return []
+    return [table.c[name] for name in TIMESTAMP_COLUMNS if name in table.c]
+
+
+def _id_column(table: Table):
+    return list(table.primary_key.columns)[0]
+
+
+def _changed_since(table: Table, watermark: Dict[str, Any]):
+    """WHERE clause for rows changed since a previous watermark, or None for all rows."""
+    columns = _timestamp_columns(table)
+    if columns:
+        if not watermark.get("timestamp"):
+            return None
+        since = datetime.fromisoformat(watermark["timestamp"]) - WATERMARK_MARGIN
+        return or_(*[column > since for column in columns])
+    if table.name not in INSERT_ONLY_TABLES or watermark.get("id") is None:
+        return None
+    return _id_column(table) > watermark["id"]
+
+
+def _next_watermark(table: Table, row, watermark: Dict[str, Any]) -> Dict[str, Any]:
+    columns = _timestamp_columns(table)
+    if columns:
+        current = watermark.get("timestamp")
+        for column in columns:
+            value = row[column.name]
+            if value is not None and (current is None or value.isoformat() > current):
+                current = value.isoformat()
+        return {"timestamp": current}
+    if table.name not in INSERT_ONLY_TABLES:
+        return {}
+    current = watermark.get("id")
+    value = row[_id_column(table).name]
+    return {"id": value if current is None or value > current else current}
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _export_ids(conn, table: Table, path: str, batch_size: int) -> Dict[str, Any]:
+    """Write every id the table currently holds, one per line."""
+    rows = 0
+    query = select(_id_column(table)).order_by(_id_column(table))
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        for row_id in conn.execution_options(yield_per=batch_size).execute(query).scalars():
+            out.write(f"{row_id}\n")
+            rows += 1
+    return {"file": os.path.basename(path), "rows": rows, "sha256": _sha256(path)}
+
+
+def _read_ids(path: str) -> Iterator[int]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield int(line)
+
+
+@contextmanager
+def snapshot(engine: Engine) -> Iterator[Connection]:
+    """A connection whose reads all see one consistent state of the database.
+
+    The transaction is rolled back on exit; nothing is written through it.
+    """
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # pysqlite only opens a transaction before writes, so each SELECT
+            # would otherwise see the latest commit; BEGIN pins the first read's snapshot
+            conn.exec_driver_sql("BEGIN")
+        else:
+            conn.execution_options(isolation_level="REPEATABLE READ")
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+
+def export_table(conn: Connection, table: Table, path: str, watermark: Optional[Dict[str, Any]] = None,
+                 batch_size: int = BATCH_SIZE, ids_path: Optional[str] = None) -> Dict[str, Any]:
+    """Stream one table (or its changes since `watermark`) to a gzipped NDJSON file.
+
+    Run it on a snapshot() connection so the rows and id list agree. Returns the table's manifest record: file, rows, sha256 and the new
+    watermark, plus the id list's record when `ids_path` is given.
+    """
+    watermark = dict(watermark or {})
+    query = select(table).order_by(_id_column(table))
+    condition = _changed_since(table, watermark)
+    if condition is not None:
+        query = query.where(condition)
+
+    rows = 0
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        result = conn.execution_options(yield_per=batch_size).execute(query).mappings()
+        for row in result:
+            out.write(json.dumps({key: _jsonable(value) for key, value in row.items()}) + "\n")
+            watermark = _next_watermark(table, row, watermark)
+            rows += 1
+    ids = _export_ids(conn, table, ids_path, batch_size) if ids_path else None
+    record = {
+        "file": os.path.basename(path),
+        "rows": rows,
+        "sha256": _sha256(path),
+        "watermark": watermark,
+    }
+    if ids is not None:
+        record["ids"] = ids
+    return record
+
+
+def create_backup(engine: Engine, directory: str, previous: Optional[Dict[str, Any]] = None,
+                  batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """Back up every table into `directory` and return the manifest.
+
+    With `previous` (the manifest of an earlier backup in the same parent
+    directory) the backup is incremental on top of it. The manifest is
+    written last, so a directory without one is an interrupted backup.
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous_tables = previous["tables"] if previous else {}
+    manifest = {
+        "format": FORMAT_VERSION,
+        "kind": "incremental" if previous else "full",
+        "base": previous["name"] if previous else None,
+        "name": os.path.basename(os.path.normpath(directory)),
+        "created_at": datetime.utcnow().isoformat(),
+        "tables": {},
+    }
+    with snapshot(engine) as conn:
+        for table in Base.metadata.sorted_tables:
+            since = previous_tables.get(table.name, {}).get("watermark") if previous else None
+            path = os.path.join(directory, f"{table.name}.ndjson.gz")
+            ids_path = os.path.join(directory, f"{table.name}.ids.gz")
+            manifest["tables"][table.name] = export_table(conn, table, path, since, batch_size, ids_path)
+
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(directory: str) -> Dict[str, Any]:
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        raise BackupError(f"No manifest in {directory} (incomplete backup?)")
+    with open(path) as f:
+        return json.load(f)
+
+
+def latest_backup(root: str) -> Optional[str]:
+    """The newest complete backup directory under `root`, by name."""
+    if not os.path.isdir(root):
+        return None
+    complete = sorted(
+        name for name in os.listdir(root)
+        if os.path.exists(os.path.join(root, name, MANIFEST))
+    )
+    return os.path.join(root, complete[-1]) if complete else None
+
+
+def backup_chain(directory: str) -> List[str]:
+    """The backups needed to restore `directory`: its full base first, then each incremental."""
+    chain = []
+    current = directory
+    while True:
+        chain.append(current)
+        base = load_manifest(current)["base"]
+        if base is None:
+            return list(reversed(chain))
+        current = os.path.join(os.path.dirname(os.path.normpath(current)), base)
+        if current in chain:
+            raise BackupError(f"Backup chain loops at {current}")
+
+
+def verify_backup(directory: str) -> List[str]:
+    """Problems with a backup's files (missing, or checksum mismatch). Empty when it is intact."""
+    problems = []
+    for name, record in load_manifest(directory)["tables"].items():
+        for label, entry in (("", record), ("ids ", record.get("ids"))):
+            if entry is None:
+                continue
+            path = os.path.join(directory, entry["file"])
+            if not os.path.exists(path):
+                problems.append(f"{name}: missing {entry['file']}")
+            elif _sha256(path) != entry["sha256"]:
+                problems.append(f"{name}: {label}checksum mismatch")
+    return problems
+
+
+def _read_rows(path: str, table: Table) -> Iterator[Dict[str, Any]]:
+    converters = {}
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            converters[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            converters[column.name] = date.fromisoformat
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            for name, convert in converters.items():
+                if row.get(name) is not None:
+                    row[name] = convert(row[name])
+            yield row
+
+
+def _upsert(conn, table: Table):
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return table.insert()
+    stmt = insert(table)
+    keys = [column.name for column in table.primary_key.columns]
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={column.name: stmt.excluded[column.name] for column in table.columns if column.name not in keys},
+    )
+
+
+def _reset_sequence(conn, table: Table):
+    """Move a Postgres id sequence past the restored ids."""
+    id_column = _id_column(table)
+    conn.execute(
+        text("SELECT setval(pg_get_serial_sequence(:table, :column), "
+             "COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1, false)".format(
+                 table=table.name, column=id_column.name)),
+        {"table": table.name, "column": id_column.name},
+    )
+
+
+def _prune(conn, table: Table, path: str, batch_size: int) -> int:
+    """Delete rows whose ids are not in a backup's id list. Returns how many were deleted."""
+    keep = set(_read_ids(path))
+    id_column = _id_column(table)
+    stale = [row_id for row_id in conn.execute(select(id_column)).scalars() if row_id not in keep]
+    for start in range(0, len(stale), batch_size):
+        conn.execute(table.delete().where(id_column.in_(stale[start:start + batch_size])))
+    return len(stale)
+
+
+def restore_backup(engine: Engine, directory: str, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Restore `directory` and the backups it builds on into `engine` in one transaction.
+
+    Every file is checked against its manifest checksum before anything is
+    written. Rows missing from a step's id lists are deleted (children
+    first) before its rows are upserted, so the result holds exactly the
+    rows the database held at backup time. Returns the number of rows
+    applied per table.
+    """
+    chain = backup_chain(directory)
+    for step in chain:
+        problems = verify_backup(step)
+        if problems:
+            raise BackupError(f"{step}: " + "; ".join(problems))
+
+    applied = {table.name: 0 for table in Base.metadata.sorted_tables}
+    with engine.begin() as conn:
+        for step in chain:
+            tables = load_manifest(step)["tables"]
+            for table in reversed(Base.metadata.sorted_tables):
+                ids = tables.get(table.name, {}).get("ids")
+                if ids:
+                    _prune(conn, table, os.path.join(step, ids["file"]), batch_size)
+            for table in Base.metadata.sorted_tables:
+                record = tables.get(table.name)
+                if not record or not record["rows"]:
+                    continue
+                stmt = _upsert(conn, table)
+                batch = []
+                for row in _read_rows(os.path.join(step, record["file"]), table):
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        conn.execute(stmt, batch)
+                        batch = []
+                if batch:
+                    conn.execute(stmt, batch)
+                applied[table.name] += record["rows"]
+        if conn.dialect.name == "postgresql":
+            for table in Base.metadata.sorted_tables:
+                _reset_sequence(conn, table)
+    return applied
+
+
+def table_counts(engine: Engine) -> Dict[str, int]:
+    with engine.connect() as conn:
+        return {
+            table.name: conn.execute(select(func.count()).select_from(table)).scalar()
+            for table in Base.metadata.sorted_tables
+        }
@@ -0,0 +1,144 @@
+"""Bulk entry import for POST /entries/bulk.
+
+The whole batch is validated before anything is written, then entries,
+responses and metrics are inserted with one executemany each inside a single
+transaction (entries go one statement per row on SQLite, see below). Either
+every entry is imported or none is.
+
+An optional idempotency key makes retries safe: the first successful import
+is recorded in entry_imports, and repeating the request with the same key
+returns the recorded entry ids instead of importing again.
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Entry, EntryImport, EntryMetrics, InjuryLog, Response
+from app.metrics import metrics_columns, parse_metrics, question_kind_map
+from app.rollups import refresh_daily_rollups
+from app.streaks import refresh_progress_for_dates
+
+MAX_BULK_ENTRIES = 1000
+
+
+class BulkImportError(Exception):
+    """Raised with per-item errors when a batch fails validation."""
+
+    def __init__(self, errors: List[Dict]):
+        super().__init__(f"{len(errors)} invalid entries")
+        self.errors = errors
+
+
+class IdempotencyConflict(Exception):
+    """The idempotency key was already used for a different request body."""
+
+
+def request_hash(entries: List) -> str:
+    body = json.dumps([entry.model_dump(mode="json") for entry in entries], sort_keys=True)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def validate_entries(entries: List, question_ids: set) -> List[Dict]:
+    """Per-item errors for the batch, as {"index", "field", "error"} dicts."""
+    errors = []
+    if not entries:
+        errors.append({"index": None, "field": "entries", "error": "No entries to import"})
+    if len(entries) > MAX_BULK_ENTRIES:
+        errors.append({"index": None, "field": "entries",
+                       "error": f"At most {MAX_BULK_ENTRIES} entries per request"})
+    for index, entry in enumerate(entries):
+        if not entry.session_type.strip():
+            errors.append({"index": index, "field": "session_type", "error": "Session type is required"})
+        for response in entry.responses:
+            if response.question_id not in question_ids:
+                errors.append({"index": index, "field": "responses",
+                               "error": f"Unknown question_id {response.question_id}"})
+    return errors
+
+
+def _previous_import(db: Session, user_id: int, key: str) -> Optional[EntryImport]:
+    return db.query(EntryImport).filter(
+        EntryImport.user_id == user_id, EntryImport.idempotency_key == key
+    ).first()
+
+
+def _replay(record: EntryImport, body_hash: str) -> List[int]:
+    if record.request_hash != body_hash:
+        raise IdempotencyConflict()
+    return json.loads(record.entry_ids)
+
+
+def import_entries(db: Session, user_id: int, entries: List,
+                   idempotency_key: Optional[str] = None) -> Tuple[List[int], bool]:
+    """Import a batch of EntryCreate items. Returns (entry ids, replayed).
+
+    Raises BulkImportError if any item is invalid and IdempotencyConflict if
+    the key was used for a different batch. Commits on success.
+    """
+    body_hash = request_hash(entries)
+    if idempotency_key:
+        record = _previous_import(db, user_id, idempotency_key)
+        if record is not None:
+            return _replay(record, body_hash), True
+
+    kinds_by_question = question_kind_map(db)
+    errors = validate_entries(entries, set(kinds_by_question))
+    if errors:
+        raise BulkImportError(errors)
+
+    # Injuries: one query covering the whole date range
+    entry_days = [entry.date.date() for entry in entries]
+    injury_starts = [injury_date for injury_date, in db.query(InjuryLog.injury_date).filter(
+        InjuryLog.user_id == user_id,
+        InjuryLog.injury_date <= max(entry_days),
+        InjuryLog.end_date.is_(None)
+    )]
+    earliest_injury = min(injury_starts) if injury_starts else None
+
+    # Returned ids are matched to entries by position. Postgres inserts these
+    # in batches; SQLite cannot order RETURNING rows, so SQLAlchemy falls back
+    # to one INSERT per entry, still in this transaction.
+    entry_ids = list(db.scalars(
+        insert(Entry).returning(Entry.id, sort_by_parameter_order=True),
+        [
+            {
+                "user_id": user_id,
+                "date": entry.date,
+                "session_type": entry.session_type,
+                "injured_during_session": earliest_injury is not None and earliest_injury <= day,
+            }
+            for entry, day in zip(entries, entry_days)
+        ]
+    ))
+
+    response_rows = []
+    metrics_rows = []
+    for entry_id, entry in zip(entry_ids, entries):
+        response_rows.extend(
+            {"entry_id": entry_id, "question_id": r.question_id, "answer": r.answer} for r in entry.responses
+        )
+        values = parse_metrics(entry.responses, kinds_by_question)
+        metrics_rows.append(dict(metrics_columns(user_id, entry.date, entry.session_type, values), entry_id=entry_id))
+    if response_rows:
+        db.execute(insert(Response), response_rows)
+    db.execute(insert(EntryMetrics), metrics_rows)
+
+    dates = [entry.date for entry in entries]
+    refresh_daily_rollups(db, user_id, dates)
+    refresh_progress_for_dates(db, user_id, dates)
+
+    if idempotency_key:
+        db.add(EntryImport(user_id=user_id, idempotency_key=idempotency_key,
+                           request_hash=body_hash, entry_ids=json.dumps(entry_ids)))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request with the same key won the race
+        db.rollback()
+        record = _previous_import(db, user_id, idempotency_key) if idempotency_key else None
+        if record is None:
+            raise
+        return _replay(record, body_hash), True
+    return entry_ids, False
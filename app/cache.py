@@ -0,0 +1,192 @@
+"""Per-user cache for computed analytics results.
+
+Dashboard, recommendations and widget data are derived entirely from a user's
+entries, injuries and goals, so results are cached per user and per request
+parameters. The entry, injury and goal routers call `invalidate_user` after
+every write, and a short TTL covers the rolling date windows ("last 30 days")
+that move on even when nothing is written.
+
+Backends are chosen with ANALYTICS_CACHE_BACKEND:
+  memory (default)  bounded in-process LRU, one per worker process
+  redis             shared Redis-compatible server at REDIS_URL
+  none              caching disabled
+"""
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 300
+
+
+class CacheBackend(ABC):
+    """Interface for cache stores. Values are JSON-compatible objects."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: int):
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+
+class NullCache(CacheBackend):
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any, ttl: int):
+        pass
+
+    def delete_prefix(self, prefix: str):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe LRU dict with per-key expiry and a bounded number of entries."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache(CacheBackend):
+    """Redis-compatible backend shared by all workers.
+
+    Eviction is left to the server; run it with a maxmemory limit and
+    `maxmemory-policy allkeys-lru` to get bounded LRU behaviour.
+    """
+
+    def __init__(self, url: str, namespace: str = "bjj"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: int):
+        self.client.set(self._key(key), json.dumps(value), ex=ttl)
+
+    def delete_prefix(self, prefix: str):
+        keys = list(self.client.scan_iter(match=self._key(prefix) + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix("")
+
+
+_backend: Optional[CacheBackend] = None
+
+
+def create_backend() -> CacheBackend:
+    kind = os.getenv("ANALYTICS_CACHE_BACKEND", "memory").lower()
+    if kind == "none":
+        return NullCache()
+    if kind == "redis":
+        return RedisCache(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    if kind != "memory":
+        raise ValueError(f"Unknown ANALYTICS_CACHE_BACKEND {kind!r}")
+    return MemoryCache(int(os.getenv("ANALYTICS_CACHE_SIZE", DEFAULT_MAX_ENTRIES)))
+
+
+def get_cache() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_cache(backend: Optional[CacheBackend]):
+    """Swap the process-wide backend (None re-reads the environment on next use)."""
+    global _backend
+    _backend = backend
+
+
+def _ttl() -> int:
+    return int(os.getenv("ANALYTICS_CACHE_TTL", DEFAULT_TTL_SECONDS))
+
+
+def user_prefix(user_id: int) -> str:
+    return f"analytics:{user_id}:"
+
+
+def cache_key(namespace: str, user_id: int, params: Optional[Dict[str, Any]] = None) -> str:
+    parts = [f"{k}={params[k]}" for k in sorted(params or {})]
+    return f"{user_prefix(user_id)}{namespace}:{'&'.join(parts)}"
+
+
+def cached_for_user(namespace: str, user_id: int, params: Optional[Dict[str, Any]],
+                    compute: Callable[[], Any]) -> Any:
+    """Return the cached result for this user/params, computing and storing it on a miss.
+
+    Results are stored in their JSON-encoded form so every backend returns
+    exactly what the endpoint would have serialised.
+    """
+    cache = get_cache()
+    key = cache_key(namespace, user_id, params)
+    value = cache.get(key)
+    if value is None:
+        value = jsonable_encoder(compute())
+        cache.set(key, value, _ttl())
+    return value
+
+
+def invalidate_user(user_id: int):
+    """Drop every cached analytics result for a user. Call after committing a write."""
+    get_cache().delete_prefix(user_prefix(user_id))
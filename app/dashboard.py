@@ -0,0 +1,547 @@
+"""Dashboard aggregation engine.
+
+Builds every /analytics/dashboard chart from a user's entries and responses.
+Two engines are available, picked with the DASHBOARD_ENGINE setting:
+
+- "python" (default): responses are indexed by entry and by question once,
+  then each chart is produced from a single pass over the entries.
+- "sql": the aggregates are computed with GROUP BY / CASE queries so only
+  small result sets leave the database. Works on SQLite and Postgres.
+- "rollup": as "sql", but weekly volume, this month and the monthly trend
+  are summed from the daily_training_rollup table (see app.rollups).
+"""
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from heapq import nlargest
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Integer, and_, case, cast, extract, func, select
+from sqlalchemy.orm import Session
+from app.models import DailyTrainingRollup, Entry, Response, Question
+from app.techniques import classify_technique
+
+# Question kinds the dashboard cares about
+RPE = "rpe"
+ROUNDS = "rounds"
+SESSION_TYPE = "session_type"
+TRAINING = "training"
+TECHNIQUE = "technique"
+
+ENGINES = ("python", "sql", "rollup")
+
+
+def dashboard_engine() -> str:
+    """Engine selected by the DASHBOARD_ENGINE setting, read on every call."""
+    engine = os.getenv("DASHBOARD_ENGINE", "python").lower()
+    return engine if engine in ENGINES else "python"
+
+
+def empty_dashboard() -> Dict[str, Any]:
+    return {
+        "total_sessions": 0,
+        "this_month": 0,
+        "avg_rpe": 0,
+        "total_rounds": 0,
+        "session_types": {},
+        "training_types": {},
+        "rpe_distribution": {},
+        "monthly_trend": []
+    }
+
+
+def question_kinds(question_text: str) -> tuple:
+    """Return the dashboard kinds a question's text maps to."""
+    kinds = []
+    if "Rate of Perceived Exertion" in question_text:
+        kinds.append(RPE)
+    if "Rounds Rolled" in question_text:
+        kinds.append(ROUNDS)
+    if "Session Type" in question_text:
+        kinds.append(SESSION_TYPE)
+    if question_text == "Training":
+        kinds.append(TRAINING)
+    if "Class Technique" in question_text:
+        kinds.append(TECHNIQUE)
+    return tuple(kinds)
+
+
+def period_start(period: str, now: datetime) -> Optional[datetime]:
+    """Start of the dashboard window for a period, or None for "all"."""
+    if period == "7d":
+        return now - timedelta(days=7)
+    elif period == "30d":
+        return now - timedelta(days=30)
+    elif period == "this_month":
+        return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    elif period == "6m":
+        return now - timedelta(days=180)
+    elif period == "1y":
+        return now - timedelta(days=365)
+    return None
+
+
+def volume_buckets(period: str, now: datetime) -> List[Dict[str, Any]]:
+    """Training volume buckets for a period, newest first.
+
+    Each bucket holds naive start/end datetimes, whether the end is inclusive,
+    the labels shown on the chart, and "days": the first and last whole
+    calendar days the rollup engine sums for the bucket (the bucket snapped
+    to days ending on its end day).
+    """
+    buckets = []
+    if period == "7d":
+        # Daily for last 7 days
+        for i in range(7):
+            day_start = (now - timedelta(days=i+1)).replace(tzinfo=None)
+            label = (day_start + timedelta(hours=12)).strftime("%d/%m")
+            buckets.append({
+                "start": day_start,
+                "end": day_start + timedelta(days=1),
+                "inclusive": False,
+                "period": label,
+                "date_range": label,
+                "days": ((day_start + timedelta(days=1)).date(),) * 2,
+            })
+    elif period in ("6m", "1y"):
+        # Calendar months
+        for i in range(6 if period == "6m" else 12):
+            month_start = (now - timedelta(days=30*i)).replace(day=1, tzinfo=None)
+            if i == 0:
+                month_end = now.replace(tzinfo=None)
+            else:
+                month_end = month_start.replace(day=28) + timedelta(days=4)
+                month_end = month_end - timedelta(days=month_end.day)
+            label = month_start.strftime("%b %Y")
+            buckets.append({
+                "start": month_start,
+                "end": month_end,
+                "inclusive": True,
+                "period": label,
+                "date_range": label,
+                "days": (month_start.date(), month_end.date()),
+            })
+    else:
+        # Last 4 weeks for 30d and any other period
+        for i in range(4):
+            week_start = (now - timedelta(days=7*(i+1))).replace(tzinfo=None)
+            week_end = week_start + timedelta(days=7)
+            start_str = week_start.strftime("%d/%m")
+            end_str = (week_end - timedelta(days=1)).strftime("%d/%m")
+            buckets.append({
+                "start": week_start,
+                "end": week_end,
+                "inclusive": True,
+                "period": f"Week {4-i}",
+                "date_range": f"{start_str} - {end_str}",
+                "days": ((week_start + timedelta(days=1)).date(), week_end.date()),
+            })
+    return buckets
+
+
+class ResponseIndex:
+    """Responses grouped by entry and question kind, built in one pass.
+
+    Per-entry values follow the dashboard's existing rules: the first numeric
+    RPE answer, the first numeric rounds answer, the sum of all numeric
+    rounds answers, and the first session type answer. The recommendations
+    router reads the same index for its RPE trend and technique counts.
+    """
+
+    def __init__(self, responses: List):
+        self.kinds_by_text: Dict[str, tuple] = {}
+        self.first_rpe: Dict[int, int] = {}
+        self.first_rounds: Dict[int, int] = {}
+        self.rounds_sum: Dict[int, int] = {}
+        self.first_session_type: Dict[int, str] = {}
+
+        self.rpe_values: List[int] = []
+        self.total_rounds = 0
+        self.session_types: Dict[str, int] = {}
+        self.training_types: Dict[str, int] = {}
+        self.submissions: Dict[str, int] = {}
+        self.positions: Dict[str, int] = {}
+        self.technique_responses: List = []
+
+        for r in responses:
+            kinds = self._kinds(r)
+            if not kinds:
+                continue
+            entry_id = r.entry_id
+            answer = r.answer
+            if RPE in kinds and answer.isdigit():
+                rpe = int(answer)
+                self.rpe_values.append(rpe)
+                self.first_rpe.setdefault(entry_id, rpe)
+            if ROUNDS in kinds and answer.isdigit():
+                rounds = int(answer)
+                self.total_rounds += rounds
+                self.rounds_sum[entry_id] = self.rounds_sum.get(entry_id, 0) + rounds
+                self.first_rounds.setdefault(entry_id, rounds)
+            if SESSION_TYPE in kinds:
+                self.session_types[answer] = self.session_types.get(answer, 0) + 1
+                self.first_session_type.setdefault(entry_id, answer)
+            if TRAINING in kinds:
+                self.training_types[answer] = self.training_types.get(answer, 0) + 1
+            if TECHNIQUE in kinds:
+                self.technique_responses.append(r)
+                classified = classify_technique(answer)
+                if classified:
+                    position, submission = classified
+                    if submission is not None:
+                        self.submissions[submission] = self.submissions.get(submission, 0) + 1
+                    self.positions[position] = self.positions.get(position, 0) + 1
+
+    def _kinds(self, response) -> tuple:
+        question = response.question
+        if not question:
+            return ()
+        kinds = self.kinds_by_text.get(question.question_text)
+        if kinds is None:
+            kinds = self.kinds_by_text[question.question_text] = question_kinds(question.question_text)
+        return kinds
+
+
+def build_dashboard(entries: List, responses: List, period: str, now: datetime) -> Dict[str, Any]:
+    """Compute the dashboard payload from naive-dated entries and their responses.
+
+    `now` is the timezone-aware request time; month figures use local time
+    as they always have.
+    """
+    if not entries:
+        return empty_dashboard()
+
+    index = ResponseIndex(responses)
+    rpe_values = index.rpe_values
+    avg_rpe = sum(rpe_values) / len(rpe_values) if rpe_values else 0
+
+    rpe_distribution: Dict[int, int] = {}
+    for rpe in rpe_values:
+        rpe_distribution[rpe] = rpe_distribution.get(rpe, 0) + 1
+
+    buckets = volume_buckets(period, now)
+    bucket_sessions = [0] * len(buckets)
+    bucket_rounds = [0] * len(buckets)
+    sessions_by_month = Counter()
+    rounds_by_session_type = {"Gi": 0, "No Gi": 0}
+    rpe_rounds_correlation = []
+
+    for entry in entries:
+        entry_id = entry.id
+        entry_date = entry.date
+        sessions_by_month[(entry_date.year, entry_date.month)] += 1
+
+        for i, bucket in enumerate(buckets):
+            if bucket["start"] <= entry_date and (
+                entry_date <= bucket["end"] if bucket["inclusive"] else entry_date < bucket["end"]
+            ):
+                bucket_sessions[i] += 1
+                bucket_rounds[i] += index.rounds_sum.get(entry_id, 0)
+
+        entry_rounds = index.first_rounds.get(entry_id)
+        entry_session_type = index.first_session_type.get(entry_id)
+        if entry_session_type and entry_rounds and entry_session_type in rounds_by_session_type:
+            rounds_by_session_type[entry_session_type] += entry_rounds
+
+        entry_rpe = index.first_rpe.get(entry_id)
+        if entry_rpe and entry_rounds:
+            rpe_rounds_correlation.append({
+                "rpe": entry_rpe,
+                "rounds": entry_rounds
+            })
+
+    # This month and monthly trend (last 6 months)
+    local_now = datetime.now()
+    this_month = sessions_by_month[(local_now.year, local_now.month)]
+    monthly_trend = []
+    for i in range(6):
+        target_date = local_now - timedelta(days=30*i)
+        monthly_trend.append({
+            "month": target_date.strftime("%b %Y"),
+            "sessions": sessions_by_month[(target_date.year, target_date.month)]
+        })
+
+    # RPE trend over time (last 10 sessions, ties kept in entry order)
+    rpe_trend = []
+    last_ten = nlargest(10, enumerate(entries), key=lambda pair: (pair[1].date, pair[0]))
+    for _, entry in reversed(last_ten):
+        entry_rpe = index.first_rpe.get(entry.id)
+        if entry_rpe:
+            rpe_trend.append({
+                "date": entry.date.strftime("%d/%m"),
+                "rpe": entry_rpe
+            })
+
+    weekly_volume = [
+        {
+            "period": bucket["period"],
+            "date_range": bucket["date_range"],
+            "rounds": bucket_rounds[i],
+            "sessions": bucket_sessions[i]
+        }
+        for i, bucket in enumerate(buckets)
+    ]
+    weekly_volume.reverse()  # Show oldest to newest
+
+    return {
+        "total_sessions": len(entries),
+        "this_month": this_month,
+        "avg_rpe": round(avg_rpe, 1),
+        "total_rounds": index.total_rounds,
+        "session_types": index.session_types,
+        "training_types": index.training_types,
+        "submissions": index.submissions,
+        "positions": index.positions,
+        "rpe_distribution": rpe_distribution,
+        "monthly_trend": list(reversed(monthly_trend)),
+        "rpe_trend": rpe_trend,
+        "weekly_volume": weekly_volume,
+        "rounds_by_session_type": rounds_by_session_type,
+        "rpe_rounds_correlation": rpe_rounds_correlation
+    }
+
+
+# --- SQL engine ---
+
+def _is_digit(column, dialect_name: str):
+    """SQL equivalent of str.isdigit() for ASCII digits."""
+    if dialect_name == "postgresql":
+        return column.op("~")("^[0-9]+$")
+    return and_(column != "", column.op("NOT GLOB")("*[^0-9]*"))
+
+
+def _question_ids(db: Session) -> Dict[str, List[int]]:
+    ids: Dict[str, List[int]] = {RPE: [], ROUNDS: [], SESSION_TYPE: [], TRAINING: [], TECHNIQUE: []}
+    for question_id, question_text in db.query(Question.id, Question.question_text).all():
+        for kind in question_kinds(question_text):
+            ids[kind].append(question_id)
+    return ids
+
+
+def first_answer(entry_filter, question_ids: List[int], extra=None):
+    """Subquery of (entry_id, answer) holding each entry's first answer to the given questions."""
+    conditions = [Response.question_id.in_(question_ids)]
+    if extra is not None:
+        conditions.append(extra)
+    first_ids = (
+        select(func.min(Response.id).label("response_id"))
+        .join(Entry, Response.entry_id == Entry.id)
+        .where(entry_filter, *conditions)
+        .group_by(Response.entry_id)
+        .subquery()
+    )
+    return (
+        select(Response.entry_id.label("entry_id"), Response.answer.label("answer"))
+        .join(first_ids, Response.id == first_ids.c.response_id)
+        .subquery()
+    )
+
+
+def _answer_counts(db: Session, entry_filter, question_ids: List[int], extra=None) -> List[tuple]:
+    """(answer, count) pairs for the given questions, in order of first appearance."""
+    if not question_ids:
+        return []
+    query = db.query(Response.answer, func.count(Response.id)).join(
+        Entry, Response.entry_id == Entry.id
+    ).filter(entry_filter, Response.question_id.in_(question_ids))
+    if extra is not None:
+        query = query.filter(extra)
+    return query.group_by(Response.answer).order_by(func.min(Response.id)).all()
+
+
+def _rollup_volume(db: Session, user_id: int, buckets: List[Dict[str, Any]], local_now: datetime,
+                   since: Optional[datetime]):
+    """Bucket sessions/rounds and sessions per month from daily rollup rows.
+
+    Reads at most a year plus the monthly trend window of rows, limited to
+    the period like the other charts.
+    """
+    trend_start = (local_now - timedelta(days=30*5)).date().replace(day=1)
+    first_day = min([trend_start] + [bucket["days"][0] for bucket in buckets])
+    if since is not None:
+        first_day = max(first_day, since.date())
+    rows = db.query(
+        DailyTrainingRollup.day, DailyTrainingRollup.sessions, DailyTrainingRollup.rounds
+    ).filter(
+        DailyTrainingRollup.user_id == user_id,
+        DailyTrainingRollup.day >= first_day,
+        DailyTrainingRollup.day <= local_now.date()
+    ).all()
+
+    bucket_sessions = [0] * len(buckets)
+    bucket_rounds = [0] * len(buckets)
+    sessions_by_month = Counter()
+    for day, sessions, rounds in rows:
+        sessions_by_month[(day.year, day.month)] += sessions
+        for i, bucket in enumerate(buckets):
+            bucket_first, bucket_last = bucket["days"]
+            if bucket_first <= day <= bucket_last:
+                bucket_sessions[i] += sessions
+                bucket_rounds[i] += rounds
+    return bucket_sessions, bucket_rounds, sessions_by_month
+
+
+def build_dashboard_sql(db: Session, user_id: int, period: str, now: datetime,
+                        use_rollups: bool = False) -> Dict[str, Any]:
+    """Compute the dashboard payload with aggregate queries.
+
+    Produces the same figures as build_dashboard() for well-formed data.
+    Non-numeric RPE answers are skipped rather than failing the request, and
+    the RPE/rounds correlation points come back grouped by value.
+
+    With use_rollups the volume charts come from daily_training_rollup, so
+    buckets are whole calendar days and rounds are each entry's first
+    numeric rounds answer.
+    """
+    dialect_name = db.get_bind().dialect.name
+    start_date = period_start(period, now)
+    entry_filter = Entry.user_id == user_id
+    if start_date:
+        entry_filter = and_(entry_filter, Entry.date >= start_date.replace(tzinfo=None))
+
+    question_ids = _question_ids(db)
+    rpe_ids = question_ids[RPE]
+    rounds_ids = question_ids[ROUNDS]
+
+    # Per-entry rounds (sum of numeric answers) for the totals and volume buckets
+    rounds_per_entry = (
+        db.query(
+            Response.entry_id.label("entry_id"),
+            func.sum(cast(Response.answer, Integer)).label("rounds"),
+        )
+        .join(Entry, Response.entry_id == Entry.id)
+        .filter(entry_filter, Response.question_id.in_(rounds_ids), _is_digit(Response.answer, dialect_name))
+        .group_by(Response.entry_id)
+        .subquery()
+    )
+    entry_rounds = func.coalesce(rounds_per_entry.c.rounds, 0)
+
+    buckets = volume_buckets(period, now)
+    columns = [func.count(Entry.id), func.coalesce(func.sum(entry_rounds), 0)]
+    for bucket in ([] if use_rollups else buckets):
+        upper = Entry.date <= bucket["end"] if bucket["inclusive"] else Entry.date < bucket["end"]
+        in_bucket = and_(Entry.date >= bucket["start"], upper)
+        columns.append(func.coalesce(func.sum(case((in_bucket, 1), else_=0)), 0))
+        columns.append(func.coalesce(func.sum(case((in_bucket, entry_rounds), else_=0)), 0))
+
+    totals = db.query(*columns).select_from(Entry).outerjoin(
+        rounds_per_entry, rounds_per_entry.c.entry_id == Entry.id
+    ).filter(entry_filter).one()
+
+    total_sessions = int(totals[0])
+    if not total_sessions:
+        return empty_dashboard()
+    total_rounds = int(totals[1])
+    local_now = datetime.now()
+
+    if use_rollups:
+        bucket_sessions, bucket_rounds, sessions_by_month = _rollup_volume(db, user_id, buckets, local_now, start_date)
+    else:
+        bucket_sessions = [int(totals[2 + 2 * i]) for i in range(len(buckets))]
+        bucket_rounds = [int(totals[3 + 2 * i]) for i in range(len(buckets))]
+
+        # Sessions per calendar month
+        year = extract("year", Entry.date)
+        month = extract("month", Entry.date)
+        sessions_by_month = {
+            (int(y), int(m)): count
+            for y, m, count in db.query(year, month, func.count(Entry.id)).filter(entry_filter).group_by(year, month).all()
+        }
+
+    weekly_volume = [
+        {
+            "period": bucket["period"],
+            "date_range": bucket["date_range"],
+            "rounds": bucket_rounds[i],
+            "sessions": bucket_sessions[i]
+        }
+        for i, bucket in enumerate(buckets)
+    ]
+    weekly_volume.reverse()  # Show oldest to newest
+
+    this_month = sessions_by_month.get((local_now.year, local_now.month), 0)
+    monthly_trend = []
+    for i in range(6):
+        target_date = local_now - timedelta(days=30*i)
+        monthly_trend.append({
+            "month": target_date.strftime("%b %Y"),
+            "sessions": sessions_by_month.get((target_date.year, target_date.month), 0)
+        })
+
+    # RPE distribution and average
+    rpe_distribution: Dict[int, int] = {}
+    rpe_digit = _is_digit(Response.answer, dialect_name)
+    for answer, count in _answer_counts(db, entry_filter, rpe_ids, rpe_digit):
+        rpe = int(answer)
+        rpe_distribution[rpe] = rpe_distribution.get(rpe, 0) + count
+    rpe_count = sum(rpe_distribution.values())
+    avg_rpe = sum(rpe * count for rpe, count in rpe_distribution.items()) / rpe_count if rpe_count else 0
+
+    session_types = dict(_answer_counts(db, entry_filter, question_ids[SESSION_TYPE]))
+    training_types = dict(_answer_counts(db, entry_filter, question_ids[TRAINING]))
+
+    # Techniques are grouped in SQL, then classified once per distinct answer
+    submissions: Dict[str, int] = {}
+    positions: Dict[str, int] = {}
+    for answer, count in _answer_counts(db, entry_filter, question_ids[TECHNIQUE]):
+        classified = classify_technique(answer)
+        if classified:
+            position, submission = classified
+            if submission is not None:
+                submissions[submission] = submissions.get(submission, 0) + count
+            positions[position] = positions.get(position, 0) + count
+
+    # Per-entry first answers for the rounds split, correlation and RPE trend
+    first_rpe = first_answer(entry_filter, rpe_ids, rpe_digit)
+    first_rounds = first_answer(entry_filter, rounds_ids, _is_digit(Response.answer, dialect_name))
+    first_session_type = first_answer(entry_filter, question_ids[SESSION_TYPE])
+    rpe_value = cast(first_rpe.c.answer, Integer)
+    rounds_value = cast(first_rounds.c.answer, Integer)
+
+    rounds_by_session_type = {"Gi": 0, "No Gi": 0}
+    split = db.query(first_session_type.c.answer, func.sum(rounds_value)).select_from(Entry).join(
+        first_session_type, first_session_type.c.entry_id == Entry.id
+    ).join(
+        first_rounds, first_rounds.c.entry_id == Entry.id
+    ).filter(
+        entry_filter, first_session_type.c.answer.in_(list(rounds_by_session_type))
+    ).group_by(first_session_type.c.answer).all()
+    for session_type, rounds in split:
+        rounds_by_session_type[session_type] += int(rounds or 0)
+
+    rpe_rounds_correlation = []
+    pairs = db.query(rpe_value, rounds_value, func.count(Entry.id)).select_from(Entry).join(
+        first_rpe, first_rpe.c.entry_id == Entry.id
+    ).join(
+        first_rounds, first_rounds.c.entry_id == Entry.id
+    ).filter(
+        entry_filter, rpe_value > 0, rounds_value > 0
+    ).group_by(rpe_value, rounds_value).order_by(func.min(Entry.id)).all()
+    for rpe, rounds, count in pairs:
+        rpe_rounds_correlation.extend({"rpe": int(rpe), "rounds": int(rounds)} for _ in range(count))
+
+    # RPE trend over the last 10 sessions
+    last_ten = db.query(Entry.id, Entry.date, rpe_value).outerjoin(
+        first_rpe, first_rpe.c.entry_id == Entry.id
+    ).filter(entry_filter).order_by(Entry.date.desc(), Entry.id.desc()).limit(10).all()
+    rpe_trend = [
+        {"date": entry_date.strftime("%d/%m"), "rpe": int(rpe)}
+        for _, entry_date, rpe in reversed(last_ten)
+        if rpe
+    ]
+
+    return {
+        "total_sessions": total_sessions,
+        "this_month": this_month,
+        "avg_rpe": round(avg_rpe, 1),
+        "total_rounds": total_rounds,
+        "session_types": session_types,
+        "training_types": training_types,
+        "submissions": submissions,
+        "positions": positions,
+        "rpe_distribution": rpe_distribution,
+        "monthly_trend": list(reversed(monthly_trend)),
+        "rpe_trend": rpe_trend,
+        "weekly_volume": weekly_volume,
+        "rounds_by_session_type": rounds_by_session_type,
+        "rpe_rounds_correlation": rpe_rounds_correlation
+    }
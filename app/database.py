@@ -1,24 +1,82 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.db_pool import pool_settings
 import os
 
-# Get database URL from environment or use SQLite for local development
-DATABASE_URL = os.getenv("DATABASE_URL")
+# SQLite tuning, applied to every new connection. WAL lets readers carry on
+# while a write is in flight; NORMAL sync is safe in WAL mode (a power cut can
+# lose the last commits but not corrupt the file).
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", 20000)),  # negative = KiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+}
 
-if DATABASE_URL:
+
+def apply_sqlite_pragmas(engine, pragmas=None):
+    """Run the pragmas on each connection the engine opens."""
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+
+def database_url():
+    """DATABASE_URL from the environment, or the local SQLite file for development."""
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        os.makedirs("data", exist_ok=True)
+        return "sqlite:///./data/bjj_journal.db"
     # Railway provides postgres:// but SQLAlchemy requires postgresql://
-    SQLALCHEMY_DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
-else:
-    # Local development (SQLite)
-    os.makedirs("data", exist_ok=True)
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./data/bjj_journal.db"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
+    return url.replace("postgres://", "postgresql://", 1)
+
+
+def create_database_engine(url):
+    """The sync engine; any SQLite URL (local default or DATABASE_URL) gets the pragmas."""
+    if url.startswith("sqlite"):
+        return apply_sqlite_pragmas(create_engine(
+            url, connect_args={"check_same_thread": False}, **pool_settings()
+        ))
+    return create_engine(url, **pool_settings())
+
+
+SQLALCHEMY_DATABASE_URL = database_url()
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the async route handlers, over the same database. Created
+# on first use so the async drivers (aiosqlite, asyncpg) are only needed then.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+_async_engine = None
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def async_database_url(url):
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS[scheme.split('+')[0]]}://{rest}"
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL),
+                                            **pool_settings(asynchronous=True))
+        if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+            apply_sqlite_pragmas(_async_engine.sync_engine)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
 Base = declarative_base()
 
 def get_db():
@@ -26,4 +84,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,100 @@
+"""Connection pool settings and usage metrics for the database engine.
+
+Pool sizing comes from the environment:
+
+    DB_POOL_SIZE        connections kept open (default 5)
+    DB_MAX_OVERFLOW     extra connections allowed during bursts (default 10)
+    DB_POOL_TIMEOUT     seconds to wait for a free connection (default 30)
+    DB_POOL_RECYCLE     seconds before a connection is replaced (default 1800),
+                        so idle connections are not cut by the server first
+    DB_POOL_PRE_PING    test each connection on checkout (default true)
+
+The sync engine and the async engine each get their own pool of this size.
+InstrumentedQueuePool (and InstrumentedAsyncQueuePool for the async engine)
+records how long callers wait for a connection and how often they give up,
+which pool_stats() reports alongside the pool's own counts.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def pool_settings(asynchronous: bool = False) -> Dict[str, Any]:
+    """create_engine() (or create_async_engine()) keyword arguments for the pool, read from the environment."""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool,
+        "pool_size": _env_int("DB_POOL_SIZE", 5),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() not in ("0", "false", "no"),
+    }
+
+
+class CheckoutStats:
+    """Pool mixin that counts checkouts, checkout wait time and timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_ms_total = 0.0
+            self.wait_ms_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        waited = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+        return connection
+
+
+class InstrumentedQueuePool(CheckoutStats, QueuePool):
+    """QueuePool that counts checkouts, checkout wait time and timeouts."""
+
+
+class InstrumentedAsyncQueuePool(CheckoutStats, AsyncAdaptedQueuePool):
+    """The async engine's pool, with the same counters."""
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Current pool usage. Pools other than QueuePool only report their class."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, CheckoutStats):
+        with pool._stats_lock:
+            stats.update({
+                "checkouts": pool.checkouts,
+                "timeouts": pool.timeouts,
+                "wait_ms_avg": round(pool.wait_ms_total / pool.checkouts, 3) if pool.checkouts else 0.0,
+                "wait_ms_max": round(pool.wait_ms_max, 3),
+            })
+    return stats
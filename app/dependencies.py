@@ -1,14 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 import hashlib
 import bcrypt
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.database import get_async_db, get_db
 from app.models import User
 from app.schemas import TokenData
+from app.log import bind_user
+from app import auth_cache
 
 # Security configuration
 SECRET_KEY = "your-secret-key-change-in-production"
@@ -57,24 +61,68 @@ def authenticate_user(db: Session, username: str, password: str):
     migrate_user_password(db, user, password)
     return user
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_token(token: str) -> Tuple[str, Optional[float]]:
+    """(username, expiry timestamp) of a bearer token; 401 if it is invalid or expired."""
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_data = TokenData(username=username)
     except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    return token_data.username, payload.get("exp")
+
+def _cached_user(token: str) -> Optional[User]:
+    """A detached User rebuilt from the token cache, ready to merge into a session without a query."""
+    values = auth_cache.lookup(token)
+    if values is None:
+        return None
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+# Plain def: FastAPI runs it in the threadpool, so the blocking query stays off the event loop
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    token = credentials.credentials
+    cached = _cached_user(token)
+    if cached is not None:
+        user = db.merge(cached, load=False)
+    else:
+        username, expires_at = decode_token(token)
+        loaded_generation = auth_cache.generation(username)
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise _credentials_exception()
+        auth_cache.remember(token, user, expires_at, loaded_generation)
+    bind_user(user.id)
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """get_current_user for async routes: the user is loaded in the request's AsyncSession."""
+    token = credentials.credentials
+    cached = _cached_user(token)
+    if cached is not None:
+        user = await db.merge(cached, load=False)
+    else:
+        username, expires_at = decode_token(token)
+        loaded_generation = auth_cache.generation(username)
+        user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+        if user is None:
+            raise _credentials_exception()
+        auth_cache.remember(token, user, expires_at, loaded_generation)
+    bind_user(user.id)
+    return user
@@ -0,0 +1,158 @@
+"""Structured, leveled logging.
+
+Every record carries the request id and user id of the request it was logged
+from, plus any `fields` passed in `extra`. LOG_FORMAT=json writes one JSON
+object per line for log shippers; the default is key=value text. LOG_LEVEL
+sets the level (INFO by default).
+
+Per-user debug tracing: `trace()` records are dropped unless the current
+user is being traced, in which case they are written at INFO regardless of
+LOG_LEVEL. Traced users come from TRACE_USER_IDS (comma separated) and can
+be changed at runtime with `set_user_trace()` or the /debug/trace endpoints.
+The check is a set lookup, so leaving trace calls in hot paths is cheap.
+"""
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LOGGER_NAME = "bjj"
+
+_request_context: contextvars.ContextVar = contextvars.ContextVar("request_context", default=None)
+_traced_users: Set[int] = {
+    int(user_id) for user_id in os.getenv("TRACE_USER_IDS", "").split(",") if user_id.strip().isdigit()
+}
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the app's namespace, e.g. get_logger(__name__)."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+# --- Request context ---
+
+def begin_request() -> Dict[str, Any]:
+    """Start a context for the current request. The dict is shared with any
+    threads the request runs in, so values set later are visible here."""
+    context = {"request_id": uuid.uuid4().hex[:12], "user_id": None, "queries": 0,
+               "started": time.perf_counter()}
+    _request_context.set(context)
+    return context
+
+
+def request_context() -> Optional[Dict[str, Any]]:
+    return _request_context.get()
+
+
+def bind_user(user_id: int):
+    context = _request_context.get()
+    if context is not None:
+        context["user_id"] = user_id
+
+
+def elapsed_ms(context: Dict[str, Any]) -> float:
+    return round((time.perf_counter() - context["started"]) * 1000, 1)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    request = _request_context.get()
+    if request is not None:
+        request["queries"] = request.get("queries", 0) + 1
+
+
+def count_queries():
+    """Count SQL statements per request on every engine, for the request log line."""
+    if not event.contains(Engine, "before_cursor_execute", _count_query):
+        event.listen(Engine, "before_cursor_execute", _count_query)
+
+
+# --- Per-user tracing ---
+
+def set_user_trace(user_id: int, enabled: bool):
+    if enabled:
+        _traced_users.add(user_id)
+    else:
+        _traced_users.discard(user_id)
+
+
+def traced_users() -> Set[int]:
+    return set(_traced_users)
+
+
+def is_traced(user_id: Optional[int] = None) -> bool:
+    if not _traced_users:
+        return False
+    if user_id is None:
+        context = _request_context.get()
+        user_id = context and context["user_id"]
+    return user_id in _traced_users
+
+
+def trace(logger: logging.Logger, message: str, **fields):
+    """Detailed diagnostics, only written while the current user is traced."""
+    if is_traced():
+        logger.info(message, extra={"fields": dict(fields, trace=True)})
+
+
+# --- Formatting ---
+
+class ContextFilter(logging.Filter):
+    """Copy the request id and user id onto every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _request_context.get()
+        record.request_id = context["request_id"] if context else None
+        record.user_id = context["user_id"] if context else None
+        if not hasattr(record, "fields"):
+            record.fields = {}
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": record.request_id,
+            "user_id": record.user_id,
+        }
+        payload.update(record.fields)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record, '%Y-%m-%d %H:%M:%S')} {record.levelname} {record.name}: {record.getMessage()}"
+        context = {"request_id": record.request_id, "user_id": record.user_id}
+        context.update(record.fields)
+        line += "".join(f" {key}={value}" for key, value in context.items() if value is not None)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None):
+    """Install the app's handler on the "bjj" logger. Safe to call more than once."""
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+
+    for handler in list(logger.handlers):
+        if getattr(handler, "_bjj_handler", False):
+            logger.removeHandler(handler)
+    handler = logging.StreamHandler(sys.stdout)
+    handler._bjj_handler = True
+    handler.addFilter(ContextFilter())
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    logger.addHandler(handler)
+    logger.propagate = False
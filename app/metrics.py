@@ -0,0 +1,158 @@
+"""Typed per-entry metrics.
+
+RPE, rounds, session type, training type and technique live in free-text
+responses. They are parsed once when an entry is written and stored in the
+entry_metrics table, so read paths can range-scan typed columns instead of
+matching question text on every request.
+"""
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from app.dashboard import RPE, ROUNDS, SESSION_TYPE, TRAINING, TECHNIQUE, question_kinds
+from app.models import Entry, EntryMetrics, Question, Response
+from app.techniques import parse_technique
+
+SUMMARY_QUESTION = "Summarise this session with a few words"
+SUMMARY_COLUMNS = ("id", "date", "session_type", "rpe", "rounds", "summary")
+
+
+def _to_int(answer: str) -> Optional[int]:
+    answer = answer.strip()
+    return int(answer) if answer.isdigit() else None
+
+
+def question_kind_map(db: Session) -> Dict[int, tuple]:
+    """Map each question id to the metric kinds it feeds."""
+    return {
+        question_id: question_kinds(question_text)
+        for question_id, question_text in db.query(Question.id, Question.question_text).all()
+    }
+
+
+def parse_metrics(responses: Iterable, kinds_by_question: Dict[int, tuple]) -> Dict[str, object]:
+    """Parse typed metric values from objects with question_id and answer.
+
+    The first usable answer wins for each metric, matching the dashboard.
+    """
+    values: Dict[str, object] = {}
+    for r in responses:
+        kinds = kinds_by_question.get(r.question_id, ())
+        answer = r.answer
+        if RPE in kinds and "rpe" not in values:
+            rpe = _to_int(answer)
+            if rpe is not None:
+                values["rpe"] = rpe
+        if ROUNDS in kinds and "rounds" not in values:
+            rounds = _to_int(answer)
+            if rounds is not None:
+                values["rounds"] = rounds
+        if SESSION_TYPE in kinds and "session_type" not in values:
+            values["session_type"] = answer
+        if TRAINING in kinds and "training_type" not in values:
+            values["training_type"] = answer
+        if TECHNIQUE in kinds and "technique" not in values:
+            values["technique"] = answer
+            parsed = parse_technique(answer)
+            if parsed is not None:
+                values["position"], values["skill"] = parsed
+    return values
+
+
+def sync_entry_metrics(db: Session, entry: Entry, responses: Iterable,
+                       kinds_by_question: Optional[Dict[int, tuple]] = None) -> EntryMetrics:
+    """Create or refresh the metrics row for an entry from its responses.
+
+    The caller commits.
+    """
+    if kinds_by_question is None:
+        kinds_by_question = question_kind_map(db)
+    values = parse_metrics(responses, kinds_by_question)
+
+    metrics = entry.metrics
+    if metrics is None:
+        metrics = EntryMetrics(entry_id=entry.id)
+        entry.metrics = metrics
+    for column, value in metrics_columns(entry.user_id, entry.date, entry.session_type, values).items():
+        setattr(metrics, column, value)
+    return metrics
+
+
+def metrics_columns(user_id: int, entry_date, entry_session_type: str, values: Dict[str, object]) -> Dict[str, object]:
+    """entry_metrics column values for an entry, from parse_metrics() output."""
+    return {
+        "user_id": user_id,
+        "date": entry_date,
+        "session_type": values.get("session_type", entry_session_type),
+        "training_type": values.get("training_type"),
+        "rpe": values.get("rpe"),
+        "rounds": values.get("rounds"),
+        "technique": values.get("technique"),
+        "position": values.get("position"),
+        "skill": values.get("skill"),
+    }
+
+
+def backfill_entry_metrics(db: Session, user_id: Optional[int] = None, batch_size: int = 500) -> int:
+    """Rebuild metrics rows for existing entries, committing every batch.
+
+    Returns the number of entries processed.
+    """
+    kinds_by_question = question_kind_map(db)
+    query = db.query(Entry).options(
+        selectinload(Entry.responses), selectinload(Entry.metrics)
+    ).order_by(Entry.id)
+    if user_id is not None:
+        query = query.filter(Entry.user_id == user_id)
+
+    processed = 0
+    last_id = 0
+    while True:
+        batch = query.filter(Entry.id > last_id).limit(batch_size).all()
+        if not batch:
+            break
+        for entry in batch:
+            responses = sorted(entry.responses, key=lambda r: r.id)
+            sync_entry_metrics(db, entry, responses, kinds_by_question)
+        db.commit()
+        processed += len(batch)
+        last_id = batch[-1].id
+        db.expunge_all()
+    return processed
+
+
+def session_type_column():
+    """An entry's session type as answered in the journal.
+
+    Both clients send "training" in Entry.session_type and put Gi/No Gi in
+    the session type answer, which entry_metrics holds; the entry's own
+    column is the fallback for entries without metrics. Needs entry_metrics
+    joined.
+    """
+    return func.coalesce(EntryMetrics.session_type, Entry.session_type)
+
+
+def entry_summary_query(db: Session, user_id: int):
+    """Entry rows projected to SUMMARY_COLUMNS, for list views.
+
+    Session type, RPE and rounds come from entry_metrics; the summary line is each entry's
+    first answer to the summary question, looked up per returned row through
+    the (entry_id, question_id) index so a page costs the same however long
+    the history is. No other responses are read.
+    """
+    summary_ids = [question_id for question_id, in db.query(Question.id).filter(
+        Question.question_text == SUMMARY_QUESTION
+    ).all()]
+    summary = (
+        select(Response.answer)
+        .where(Response.entry_id == Entry.id, Response.question_id.in_(summary_ids))
+        .order_by(Response.id)
+        .limit(1)
+        .correlate(Entry)
+        .scalar_subquery()
+    )
+    return db.query(
+        Entry.id, Entry.date, session_type_column().label("session_type"),
+        EntryMetrics.rpe, EntryMetrics.rounds, summary.label("summary")
+    ).outerjoin(
+        EntryMetrics, EntryMetrics.entry_id == Entry.id
+    ).filter(Entry.user_id == user_id)
@@ -0,0 +1,258 @@
+"""Copy every table from one database into another (SQLite to Postgres in production).
+
+Tables are copied in foreign-key order, each in id-ordered chunks read with a
+keyset (`id > last_id`) and written with one multi-row INSERT ... RETURNING per
+chunk. The target allocates new ids; foreign keys are remapped through an id
+map built as parents are copied. Rows whose unique key (a username, a
+question's text, ...) already exists in the target are mapped onto the
+existing row instead of being copied again.
+
+Progress is checkpointed in the target itself: each chunk commits together
+with its checkpoint and id-map rows, so an interrupted run resumes exactly
+where it stopped. Tables with no dependency on each other are copied in
+parallel when more than one worker is allowed.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import (
+    Boolean, Column, Integer, MetaData, String, Table, func, insert, inspect, select, tuple_
+)
+from sqlalchemy.engine import Engine
+from app.database import Base
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+CHUNK_SIZE = 1000
+
+# Bookkeeping tables, created in the target only
+migration_metadata = MetaData()
+checkpoints = Table(
+    "migration_checkpoints", migration_metadata,
+    Column("table_name", String, primary_key=True),
+    Column("last_id", Integer, nullable=False, default=0),
+    Column("copied", Integer, nullable=False, default=0),
+    Column("matched", Integer, nullable=False, default=0),
+    Column("orphaned", Integer, nullable=False, default=0),
+    Column("done", Boolean, nullable=False, default=False),
+)
+id_map_table = Table(
+    "migration_id_map", migration_metadata,
+    Column("table_name", String, primary_key=True),
+    Column("old_id", Integer, primary_key=True),
+    Column("new_id", Integer, nullable=False),
+)
+
+# Tables matched on columns that are not declared unique (the target seeds its own questions)
+MATCH_KEYS = {"questions": ("question_text",)}
+
+# Columns holding ids that are not declared as foreign keys
+JSON_ID_LISTS = {("entry_imports", "entry_ids"): "entries"}
+
+
+def _id_column(table: Table):
+    return list(table.primary_key.columns)[0]
+
+
+def _parents(table: Table) -> Dict[str, str]:
+    """Foreign-key column name -> referenced table name."""
+    return {fk.parent.name: fk.column.table.name for fk in table.foreign_keys}
+
+
+def _unique_key(table: Table) -> Optional[Tuple[str, ...]]:
+    """The first unique key other than the primary key, used to match rows already in the target."""
+    if table.name in MATCH_KEYS:
+        return MATCH_KEYS[table.name]
+    for column in table.columns:
+        if column.unique and not column.primary_key:
+            return (column.name,)
+    for index in sorted(table.indexes, key=lambda i: i.name):
+        if index.unique:
+            return tuple(column.name for column in index.columns)
+    return None
+
+
+def dependency_levels(tables: List[Table]) -> List[List[Table]]:
+    """Group tables so every table's parents are in an earlier group."""
+    level: Dict[str, int] = {}
+    for table in tables:  # sorted_tables order: parents come first
+        parents = [name for name in _parents(table).values() if name != table.name]
+        level[table.name] = 1 + max((level[name] for name in parents), default=-1)
+    groups: List[List[Table]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for table in tables:
+        groups[level[table.name]].append(table)
+    return groups
+
+
+class Migration:
+    """One source -> target copy. Call run(); it resumes from the target's checkpoints."""
+
+    def __init__(self, source: Engine, target: Engine, chunk_size: int = CHUNK_SIZE, workers: int = 1):
+        self.source = source
+        self.target = target
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.tables = list(Base.metadata.sorted_tables)
+        self.referenced = {name for table in self.tables for name in _parents(table).values()}
+        self.referenced.update(JSON_ID_LISTS.values())
+        self.id_map: Dict[str, Dict[int, int]] = {name: {} for name in self.referenced}
+        self.source_columns: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def prepare(self):
+        # An older source database may predate some tables or columns; missing
+        # tables are skipped and missing columns take the target's defaults
+        inspector = inspect(self.source)
+        existing = set(inspector.get_table_names())
+        self.source_columns = {
+            table.name: [column["name"] for column in inspector.get_columns(table.name)]
+            for table in self.tables if table.name in existing
+        }
+        Base.metadata.create_all(bind=self.target)
+        migration_metadata.create_all(bind=self.target)
+        with self.target.connect() as conn:
+            for name, old_id, new_id in conn.execute(select(id_map_table)):
+                self.id_map.setdefault(name, {})[old_id] = new_id
+
+    def reset(self):
+        """Forget previous progress so the next run starts from scratch."""
+        migration_metadata.drop_all(bind=self.target)
+        self.id_map = {name: {} for name in self.referenced}
+
+    def run(self) -> Dict[str, Dict[str, int]]:
+        """Copy every table, then return verify()'s report."""
+        self.prepare()
+        for group in dependency_levels(self.tables):
+            if self.workers > 1 and len(group) > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    list(pool.map(self.copy_table, group))
+            else:
+                for table in group:
+                    self.copy_table(table)
+        return self.verify()
+
+    def _checkpoint(self, conn, table: Table) -> Dict[str, Any]:
+        row = conn.execute(select(checkpoints).where(checkpoints.c.table_name == table.name)).mappings().first()
+        if row is None:
+            conn.execute(insert(checkpoints).values(table_name=table.name))
+            conn.commit()
+            return {"last_id": 0, "copied": 0, "matched": 0, "orphaned": 0, "done": False}
+        return dict(row)
+
+    def _remap(self, table: Table, rows: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Rewrite foreign keys of (old id, row) pairs to target ids, dropping orphans."""
+        parents = _parents(table)
+        remapped = []
+        for old_id, row in rows:
+            new_ids = {column: self.id_map[parent].get(row[column])
+                       for column, parent in parents.items() if row[column] is not None}
+            if None in new_ids.values():
+                continue  # the parent row no longer exists in the source
+            row.update(new_ids)
+            for (name, column), parent in JSON_ID_LISTS.items():
+                if name == table.name and row.get(column):
+                    row[column] = json.dumps([self.id_map[parent].get(i, i) for i in json.loads(row[column])])
+            remapped.append((old_id, row))
+        return remapped
+
+    def _existing(self, conn, table: Table, rows: List[Dict[str, Any]]) -> Dict[tuple, int]:
+        """Target ids of rows that already exist, keyed by their unique key values."""
+        key = _unique_key(table)
+        if key is None or not rows:
+            return {}
+        columns = [table.c[name] for name in key]
+        values = {tuple(row[name] for name in key) for row in rows}
+        id_column = _id_column(table)
+        query = select(id_column, *columns).where(tuple_(*columns).in_(list(values)))
+        return {tuple(found[1:]): found[0] for found in conn.execute(query)}
+
+    def copy_table(self, table: Table):
+        if table.name not in self.source_columns:
+            return
+        id_column = _id_column(table)
+        columns = [column for column in table.columns if column.name in self.source_columns[table.name]]
+        with self.target.connect() as conn:
+            state = self._checkpoint(conn, table)
+            if state["done"]:
+                return
+            while True:
+                with self.source.connect() as src:
+                    rows = [dict(row) for row in src.execute(
+                        select(*columns).where(id_column > state["last_id"]).order_by(id_column).limit(self.chunk_size)
+                    ).mappings()]
+                if not rows:
+                    break
+                last_id = rows[-1][id_column.name]
+                remapped = self._remap(table, [(row.pop(id_column.name), row) for row in rows])
+
+                existing = self._existing(conn, table, [row for _, row in remapped])
+                key = _unique_key(table)
+                mapping = {}
+                new_rows, new_old_ids = [], []
+                for old_id, row in remapped:
+                    match = existing.get(tuple(row[name] for name in key)) if existing else None
+                    if match is not None:
+                        mapping[old_id] = match
+                    else:
+                        new_rows.append(row)
+                        new_old_ids.append(old_id)
+                if new_rows:
+                    new_ids = list(conn.scalars(
+                        insert(table).returning(id_column, sort_by_parameter_order=True), new_rows
+                    ))
+                    mapping.update(zip(new_old_ids, new_ids))
+
+                if table.name in self.referenced and mapping:
+                    conn.execute(insert(id_map_table), [
+                        {"table_name": table.name, "old_id": old_id, "new_id": new_id}
+                        for old_id, new_id in mapping.items()
+                    ])
+                state["last_id"] = last_id
+                state["copied"] += len(new_rows)
+                state["matched"] += len(mapping) - len(new_rows)
+                state["orphaned"] += len(rows) - len(remapped)
+                self._save(conn, table, state)
+                conn.commit()
+                if table.name in self.referenced:
+                    with self._lock:
+                        self.id_map[table.name].update(mapping)
+                if len(rows) < self.chunk_size:
+                    break
+            state["done"] = True
+            self._save(conn, table, state)
+            conn.commit()
+
+    def _save(self, conn, table: Table, state: Dict[str, Any]):
+        conn.execute(checkpoints.update().where(checkpoints.c.table_name == table.name).values(
+            last_id=state["last_id"], copied=state["copied"], matched=state["matched"],
+            orphaned=state["orphaned"], done=state["done"],
+        ))
+
+    def verify(self) -> Dict[str, Dict[str, int]]:
+        """Per-table counts: source rows, rows copied, matched to existing rows, orphans skipped, target rows.
+
+        A table is consistent when source == copied + matched + orphaned.
+        """
+        report = {}
+        with self.source.connect() as src, self.target.connect() as dst:
+            states = {row["table_name"]: row for row in dst.execute(select(checkpoints)).mappings()}
+            for table in self.tables:
+                state = states.get(table.name, {})
+                report[table.name] = {
+                    "source": (src.execute(select(func.count()).select_from(table)).scalar()
+                               if table.name in self.source_columns else 0),
+                    "copied": state.get("copied", 0),
+                    "matched": state.get("matched", 0),
+                    "orphaned": state.get("orphaned", 0),
+                    "target": dst.execute(select(func.count()).select_from(table)).scalar(),
+                }
+        return report
+
+
+def mismatches(report: Dict[str, Dict[str, int]]) -> List[str]:
+    """Tables whose source rows are not all accounted for."""
+    return [
+        name for name, counts in report.items()
+        if counts["source"] != counts["copied"] + counts["matched"] + counts["orphaned"]
+        or counts["target"] < counts["copied"] + counts["matched"]
+    ]
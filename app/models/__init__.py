@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, Date
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -36,6 +36,9 @@ class UserProfile(Base):
 
 class Entry(Base):
     __tablename__ = "entries"
+    __table_args__ = (
+        Index("ix_entries_user_id_date", "user_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -47,6 +50,7 @@ class Entry(Base):
     
     user = relationship("User", back_populates="entries")
     responses = relationship("Response", back_populates="entry", cascade="all, delete-orphan")
+    metrics = relationship("EntryMetrics", back_populates="entry", uselist=False, cascade="all, delete-orphan")
 
 class Question(Base):
     __tablename__ = "questions"
@@ -62,6 +66,9 @@ class Question(Base):
 
 class Response(Base):
     __tablename__ = "responses"
+    __table_args__ = (
+        Index("ix_responses_entry_id_question_id", "entry_id", "question_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     entry_id = Column(Integer, ForeignKey("entries.id"), nullable=False)
@@ -71,8 +78,67 @@ class Response(Base):
     entry = relationship("Entry", back_populates="responses")
     question = relationship("Question", back_populates="responses")
 
+class EntryMetrics(Base):
+    """Typed values parsed from an entry's responses, written with the entry."""
+    __tablename__ = "entry_metrics"
+    __table_args__ = (
+        Index("ix_entry_metrics_user_id_date", "user_id", "date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entry_id = Column(Integer, ForeignKey("entries.id"), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    date = Column(DateTime(timezone=True), nullable=False)
+    session_type = Column(String)
+    training_type = Column(String)
+    rpe = Column(Integer)
+    rounds = Column(Integer)
+    technique = Column(Text)
+    position = Column(String)  # "Closed Guard" from "Closed Guard - Armbar"
+    skill = Column(String)  # "Armbar" from "Closed Guard - Armbar"
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    entry = relationship("Entry", back_populates="metrics")
+
+class EntryImport(Base):
+    """A completed POST /entries/bulk, kept so retries with the same key are not re-imported."""
+    __tablename__ = "entry_imports"
+    __table_args__ = (
+        Index("ix_entry_imports_user_id_idempotency_key", "user_id", "idempotency_key", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    idempotency_key = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)  # sha256 of the request body
+    entry_ids = Column(Text, nullable=False)  # JSON list of created entry ids
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class DailyTrainingRollup(Base):
+    """Per-user, per-day training totals summed from entry_metrics."""
+    __tablename__ = "daily_training_rollup"
+    __table_args__ = (
+        Index("ix_daily_training_rollup_user_id_day", "user_id", "day", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    sessions = Column(Integer, nullable=False, default=0)
+    rounds = Column(Integer, nullable=False, default=0)
+    rpe_sum = Column(Integer, nullable=False, default=0)
+    rpe_count = Column(Integer, nullable=False, default=0)
+    gi_sessions = Column(Integer, nullable=False, default=0)
+    nogi_sessions = Column(Integer, nullable=False, default=0)
+    gi_rounds = Column(Integer, nullable=False, default=0)
+    nogi_rounds = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class UserGoal(Base):
     __tablename__ = "user_goals"
+    __table_args__ = (
+        Index("ix_user_goals_user_id_is_active", "user_id", "is_active"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -109,11 +175,15 @@ class StreakHistory(Base):
     end_date = Column(Date)
     is_current = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     user = relationship("User", back_populates="streak_history")
 
 class TechniqueGoal(Base):
     __tablename__ = "technique_goals"
+    __table_args__ = (
+        Index("ix_technique_goals_user_id_is_active", "user_id", "is_active"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -131,6 +201,10 @@ class TechniqueGoal(Base):
 
 class InjuryLog(Base):
     __tablename__ = "injury_logs"
+    __table_args__ = (
+        # Active injuries are the ones without an end_date
+        Index("ix_injury_logs_user_id_end_date", "user_id", "end_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,76 @@
+"""Keyset (cursor) pagination over entries ordered newest first.
+
+A cursor names one entry by its (date, id) sort key. Pages are fetched with
+`WHERE (date, id) < cursor` (or `>` for newer entries), which stays on the
+(user_id, date) index however deep the client scrolls, unlike OFFSET.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from app.models import Entry
+
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(entry) -> str:
+    raw = f"{entry.date.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def older_than(cursor: str):
+    cursor_date, cursor_id = decode_cursor(cursor)
+    return or_(Entry.date < cursor_date, and_(Entry.date == cursor_date, Entry.id < cursor_id))
+
+
+def newer_than(cursor: str):
+    cursor_date, cursor_id = decode_cursor(cursor)
+    return or_(Entry.date > cursor_date, and_(Entry.date == cursor_date, Entry.id > cursor_id))
+
+
+def paginate_entries(query, limit: Optional[int], before: Optional[str] = None,
+                     after: Optional[str] = None) -> Tuple[List, Optional[str], Optional[str]]:
+    """Run an Entry query as one page, newest first.
+
+    Returns (entries, next_cursor, prev_cursor): next_cursor fetches older
+    entries with `before`, prev_cursor fetches newer ones with `after`. Either
+    is None when there is nothing further in that direction. Without a limit
+    every matching entry is returned.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+
+    if after:
+        query = query.filter(newer_than(after)).order_by(Entry.date.asc(), Entry.id.asc())
+    else:
+        if before:
+            query = query.filter(older_than(before))
+        query = query.order_by(Entry.date.desc(), Entry.id.desc())
+
+    if limit is None:
+        entries = query.all()
+        has_more = False
+    else:
+        entries = query.limit(limit + 1).all()
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+    if after:
+        entries.reverse()
+
+    if not entries:
+        return entries, None, None
+    more_older = has_more if not after else True
+    more_newer = has_more if after else bool(before)
+    next_cursor = encode_cursor(entries[-1]) if more_older else None
+    prev_cursor = encode_cursor(entries[0]) if more_newer else None
+    return entries, next_cursor, prev_cursor
@@ -0,0 +1,168 @@
+"""Daily training rollups.
+
+One daily_training_rollup row per user and day holds that day's session
+count, rounds, RPE sum/count and Gi/No Gi split, summed from entry_metrics.
+The entries router refreshes the days an entry write touches, so volume
+charts sum at most a year of small rows instead of scanning every entry.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
+from app.models import DailyTrainingRollup, Entry, EntryMetrics
+from app.metrics import parse_metrics, question_kind_map
+
+GI = "Gi"
+NO_GI = "No Gi"
+TOTAL_FIELDS = ("sessions", "rounds", "rpe_sum", "rpe_count",
+                "gi_sessions", "nogi_sessions", "gi_rounds", "nogi_rounds")
+RANGES_PER_QUERY = 200
+
+
+def _day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _empty_totals() -> Dict[str, int]:
+    return dict.fromkeys(TOTAL_FIELDS, 0)
+
+
+def _add_session(totals: Dict[str, int], rpe: Optional[int], rounds: Optional[int], session_type: Optional[str]):
+    rounds = rounds or 0
+    totals["sessions"] += 1
+    totals["rounds"] += rounds
+    if rpe is not None:
+        totals["rpe_sum"] += rpe
+        totals["rpe_count"] += 1
+    if session_type == GI:
+        totals["gi_sessions"] += 1
+        totals["gi_rounds"] += rounds
+    elif session_type == NO_GI:
+        totals["nogi_sessions"] += 1
+        totals["nogi_rounds"] += rounds
+
+
+def day_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """Sorted days merged into (first, last) runs of consecutive days."""
+    ranges: List[Tuple[date, date]] = []
+    for day in days:
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def refresh_daily_rollups(db: Session, user_id: int, dates: Iterable):
+    """Recompute the rollup rows for the days in `dates` from entry_metrics.
+
+    Metrics are read for the touched days only: runs of consecutive days
+    become one (user_id, date) index range each, up to RANGES_PER_QUERY
+    ranges per query, so moving an entry across months does not scan the
+    months in between. Then one rollup query, however many days are
+    touched. Pending changes are flushed first; days left without sessions
+    lose their row. The caller commits.
+    """
+    db.flush()
+    days = sorted({_day(d) for d in dates if d})
+    if not days:
+        return
+    totals = {day: _empty_totals() for day in days}
+    ranges = day_ranges(days)
+    for start in range(0, len(ranges), RANGES_PER_QUERY):
+        metrics = db.query(
+            EntryMetrics.date, EntryMetrics.rpe, EntryMetrics.rounds, EntryMetrics.session_type
+        ).filter(
+            EntryMetrics.user_id == user_id,
+            or_(*[
+                and_(EntryMetrics.date >= datetime.combine(first, time.min),
+                     EntryMetrics.date < datetime.combine(last + timedelta(days=1), time.min))
+                for first, last in ranges[start:start + RANGES_PER_QUERY]
+            ])
+        )
+        for metric_date, rpe, rounds, session_type in metrics:
+            day_totals = totals.get(_day(metric_date))
+            if day_totals is not None:
+                _add_session(day_totals, rpe, rounds, session_type)
+
+    existing = {
+        rollup.day: rollup
+        for rollup in db.query(DailyTrainingRollup).filter(
+            and_(DailyTrainingRollup.user_id == user_id, DailyTrainingRollup.day.in_(days))
+        )
+    }
+    for day, day_totals in totals.items():
+        rollup = existing.get(day)
+        if not day_totals["sessions"]:
+            if rollup is not None:
+                db.delete(rollup)
+            continue
+        if rollup is None:
+            rollup = DailyTrainingRollup(user_id=user_id, day=day)
+            db.add(rollup)
+        for field, value in day_totals.items():
+            setattr(rollup, field, value)
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """Drop and recompute rollups from entry_metrics. Returns the number of days written."""
+    rollups = db.query(DailyTrainingRollup)
+    metrics = db.query(EntryMetrics.user_id, EntryMetrics.date)
+    if user_id is not None:
+        rollups = rollups.filter(DailyTrainingRollup.user_id == user_id)
+        metrics = metrics.filter(EntryMetrics.user_id == user_id)
+    rollups.delete(synchronize_session=False)
+
+    days_by_user: Dict[int, set] = defaultdict(set)
+    for metric_user_id, metric_date in metrics.yield_per(1000):
+        days_by_user[metric_user_id].add(_day(metric_date))
+    written = 0
+    for metric_user_id, days in days_by_user.items():
+        refresh_daily_rollups(db, metric_user_id, days)
+        written += len(days)
+    db.commit()
+    return written
+
+
+def expected_rollups(db: Session, user_id: Optional[int] = None,
+                     batch_size: int = 500) -> Dict[Tuple[int, date], Dict[str, int]]:
+    """Day totals recomputed from raw entries and responses, bypassing entry_metrics."""
+    kinds_by_question = question_kind_map(db)
+    query = db.query(Entry).options(selectinload(Entry.responses)).order_by(Entry.id)
+    if user_id is not None:
+        query = query.filter(Entry.user_id == user_id)
+
+    expected: Dict[Tuple[int, date], Dict[str, int]] = defaultdict(_empty_totals)
+    last_id = 0
+    while True:
+        batch = query.filter(Entry.id > last_id).limit(batch_size).all()
+        if not batch:
+            break
+        for entry in batch:
+            values = parse_metrics(sorted(entry.responses, key=lambda r: r.id), kinds_by_question)
+            _add_session(expected[(entry.user_id, _day(entry.date))], values.get("rpe"),
+                         values.get("rounds"), values.get("session_type", entry.session_type))
+        last_id = batch[-1].id
+        db.expunge_all()
+    return dict(expected)
+
+
+def check_rollups(db: Session, user_id: Optional[int] = None) -> List[Dict]:
+    """Compare stored rollups with raw entries. Returns one dict per mismatched day."""
+    expected = expected_rollups(db, user_id)
+    query = db.query(DailyTrainingRollup)
+    if user_id is not None:
+        query = query.filter(DailyTrainingRollup.user_id == user_id)
+    stored = {
+        (r.user_id, r.day): {field: getattr(r, field) for field in TOTAL_FIELDS}
+        for r in query.all()
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        want, have = expected.get(key), stored.get(key)
+        if want != have:
+            mismatches.append({"user_id": key[0], "day": key[1], "expected": want, "stored": have})
+    return mismatches
+
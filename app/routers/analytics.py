@@ -1,35 +1,42 @@
 from fastapi import APIRouter, Depends, Query
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional
-from app.database import get_db
-from app.models import Entry, Response, Question, User
-from app.dependencies import get_current_user
+from app.database import get_async_db
+from app.models import Entry, Response, User
+from app.dependencies import get_current_user_async
+from app.dashboard import build_dashboard, build_dashboard_sql, dashboard_engine, empty_dashboard, period_start
+from app.cache import cached_for_user
+from app.log import get_logger, trace
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
+logger = get_logger(__name__)
 
 @router.get("/dashboard")
-def get_dashboard_stats(
+async def get_dashboard_stats(
     period: Optional[str] = Query("30d", description="Time period: 7d, 30d, this_month, 6m, 1y, all"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ) -> Dict[str, Any]:
+    # The dashboard builders are synchronous; run_sync drives them over the async connection
+    return await db.run_sync(lambda session: cached_for_user(
+        "dashboard", current_user.id, {"period": period, "engine": dashboard_engine()},
+        lambda: compute_dashboard(session, current_user, period)
+    ))
+
+def compute_dashboard(db: Session, current_user: User, period: Optional[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    engine = dashboard_engine()
     try:
         # Calculate date filter
         now = datetime.now(timezone.utc)
-        if period == "7d":
-            start_date = now - timedelta(days=7)
-        elif period == "30d":
-            start_date = now - timedelta(days=30)
-        elif period == "this_month":
-            start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        elif period == "6m":
-            start_date = now - timedelta(days=180)
-        elif period == "1y":
-            start_date = now - timedelta(days=365)
-        else:  # "all"
-            start_date = None
+        if engine in ("sql", "rollup"):
+            result = build_dashboard_sql(db, current_user.id, period, now, use_rollups=engine == "rollup")
+            _log_dashboard(engine, period, started, sessions=result["total_sessions"])
+            return result
+        start_date = period_start(period, now)
         
         # Get filtered entries
         if start_date:
@@ -45,259 +52,27 @@ def get_dashboard_stats(
             if entry.date and entry.date.tzinfo is not None:
                 entry.date = entry.date.replace(tzinfo=None)
         
-        print(f"DEBUG: Found {len(entries)} entries for user {current_user.username} (ID: {current_user.id})")
-        for entry in entries:
-            print(f"  Entry {entry.id}: date={entry.date}, session_type={entry.session_type}")
-        
         if not entries:
-            return {
-                "total_sessions": 0,
-                "this_month": 0,
-                "avg_rpe": 0,
-                "total_rounds": 0,
-                "session_types": {},
-                "training_types": {},
-                "rpe_distribution": {},
-                "monthly_trend": []
-            }
-        
-        # Basic stats
-        total_sessions = len(entries)
-        
-        # This month sessions
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        this_month = len([e for e in entries if e.date.month == current_month and e.date.year == current_year])
+            _log_dashboard(engine, period, started, entries=0, responses=0)
+            return empty_dashboard()
         
         # Get all responses for analysis - with error handling
         entry_ids = [e.id for e in entries]
-        print(f"DEBUG: Looking for responses for entry IDs: {entry_ids}")
+        trace(logger, "dashboard entries loaded", entry_ids=entry_ids)
         try:
             responses = db.query(Response).options(joinedload(Response.question)).filter(Response.entry_id.in_(entry_ids)).all()
-            print(f"DEBUG: Found {len(responses)} responses")
-            for r in responses:
-                print(f"  Response: entry_id={r.entry_id}, question_id={r.question_id}, answer='{r.answer}'")
-        except Exception as e:
-            print(f"DEBUG: Error getting responses: {e}")
+        except Exception:
+            logger.warning("dashboard responses query failed", exc_info=True)
             responses = []
         
-        # Debug: Check what we have
-        print(f"DEBUG: Found {len(entries)} entries but {len(responses)} responses ({len(responses)/len(entries)*100:.0f}% if entries else 0)")
-        
-        # Continue processing even if no responses to see what happens
-        
-        # RPE analysis
-        rpe_responses = [r for r in responses if r.question and "Rate of Perceived Exertion" in r.question.question_text]
-        avg_rpe = sum(int(r.answer) for r in rpe_responses) / len(rpe_responses) if rpe_responses else 0
-        
-        # RPE distribution
-        rpe_distribution = {}
-        for r in rpe_responses:
-            rpe = int(r.answer)
-            rpe_distribution[rpe] = rpe_distribution.get(rpe, 0) + 1
-        
-        # Total rounds
-        rounds_responses = [r for r in responses if r.question and "Rounds Rolled" in r.question.question_text]
-        total_rounds = sum(int(r.answer) for r in rounds_responses if r.answer.isdigit())
-        
-        # Session types
-        session_type_responses = [r for r in responses if r.question and "Session Type" in r.question.question_text]
-        session_types = {}
-        for r in session_type_responses:
-            session_types[r.answer] = session_types.get(r.answer, 0) + 1
-        
-        # Training types
-        training_type_responses = [r for r in responses if r.question and r.question.question_text == "Training"]
-        training_types = {}
-        for r in training_type_responses:
-            training_types[r.answer] = training_types.get(r.answer, 0) + 1
-        
-        # Submissions analysis
-        technique_responses = [r for r in responses if r.question and "Class Technique" in r.question.question_text]
-        submissions = {}
-        positions = {}
-        
-        submission_keywords = [
-            'Choke', 'Triangle', 'Armbar', 'Kimura', 'Omoplata', 'Americana', 
-            'Heel Hook', 'Toe Hold', 'Kneebar', 'Lock', 'Slicer', 'Crusher',
-            'Guillotine', 'D\'Arce', 'Anaconda', 'Bow and Arrow', 'Cross Collar',
-            'Baseball', 'Ezekiel', 'Paper Cutter', 'Loop', 'Peruvian', 'Japanese',
-            'Gogoplata', 'Von Flue', 'Twister', 'Crank', 'Wrist', 'Mata Leão',
-            'Brabo', 'Kata Gatame', 'Monoplata', 'Tarikoplata', 'Mir Lock',
-            'Shoulder Lock', 'Scissor', 'Necktie', 'Buggy', 'Estima', 'Banana Split'
-        ]
-        
-        for r in technique_responses:
-            if " - " in r.answer:
-                parts = r.answer.split(" - ")
-                if len(parts) >= 2:
-                    position = parts[0].strip()
-                    technique_type = parts[1].strip()
-                    
-                    # Check if it's a specific submission name
-                    is_submission = any(keyword.lower() in technique_type.lower() for keyword in submission_keywords)
-                    
-                    if is_submission:
-                        # Count by submission name for submissions chart
-                        submissions[technique_type] = submissions.get(technique_type, 0) + 1
-                        # Count by position for positions chart (as "Position - Attacks/Submissions")
-                        full_technique = f"{position} - Attacks/Submissions"
-                        positions[full_technique] = positions.get(full_technique, 0) + 1
-                    else:
-                        # Not a submission, count normally
-                        full_technique = f"{position} - {technique_type}"
-                        positions[full_technique] = positions.get(full_technique, 0) + 1
-        
-        # Monthly trend (last 6 months)
-        monthly_trend = []
-        for i in range(6):
-            target_date = datetime.now() - timedelta(days=30*i)
-            month_entries = [e for e in entries if e.date.month == target_date.month and e.date.year == target_date.year]
-            monthly_trend.append({
-                "month": target_date.strftime("%b %Y"),
-                "sessions": len(month_entries)
-            })
-        
-        # RPE trend over time (last 10 sessions)
-        rpe_trend = []
-        entries_sorted = sorted(entries, key=lambda x: x.date)
-        for entry in entries_sorted[-10:]:
-            entry_rpe = next((int(r.answer) for r in responses if r.entry_id == entry.id and r.question and "Rate of Perceived Exertion" in r.question.question_text), None)
-            if entry_rpe:
-                rpe_trend.append({
-                    "date": entry.date.strftime("%d/%m"),
-                    "rpe": entry_rpe
-                })
-        
-        # Weekly training volume based on period
-        weekly_volume = []
-        if period == "7d":
-            # Show daily for last 7 days
-            for i in range(7):
-                day_start = (now - timedelta(days=i+1)).replace(tzinfo=None)
-                day_end = (day_start + timedelta(days=1))
-                day_entries = [e for e in entries if day_start <= e.date < day_end]
-                day_rounds = sum(int(r.answer) for r in responses if r.entry_id in [e.id for e in day_entries] and r.question and "Rounds Rolled" in r.question.question_text and r.answer.isdigit())
-                
-                weekly_volume.append({
-                    "period": (day_start + timedelta(hours=12)).strftime("%d/%m"),
-                    "date_range": (day_start + timedelta(hours=12)).strftime("%d/%m"),
-                    "rounds": day_rounds,
-                    "sessions": len(day_entries)
-                })
-        elif period == "30d":
-            # Show 4 weeks for last 30 days
-            for i in range(4):
-                week_start = (now - timedelta(days=7*(i+1))).replace(tzinfo=None)
-                week_end = week_start + timedelta(days=7)
-                week_entries = [e for e in entries if week_start <= e.date <= week_end]
-                week_rounds = sum(int(r.answer) for r in responses if r.entry_id in [e.id for e in week_entries] and r.question and "Rounds Rolled" in r.question.question_text and r.answer.isdigit())
-                
-                start_str = week_start.strftime("%d/%m")
-                end_str = (week_end - timedelta(days=1)).strftime("%d/%m")
-                
-                weekly_volume.append({
-                    "period": f"Week {4-i}",
-                    "date_range": f"{start_str} - {end_str}",
-                    "rounds": week_rounds,
-                    "sessions": len(week_entries)
-                })
-        elif period == "6m":
-            # Show 6 months
-            for i in range(6):
-                month_start = (now - timedelta(days=30*i)).replace(day=1, tzinfo=None)
-                if i == 0:
-                    month_end = now.replace(tzinfo=None)
-                else:
-                    month_end = month_start.replace(day=28) + timedelta(days=4)
-                    month_end = month_end - timedelta(days=month_end.day)
-                
-                month_entries = [e for e in entries if month_start <= e.date <= month_end]
-                month_rounds = sum(int(r.answer) for r in responses if r.entry_id in [e.id for e in month_entries] and r.question and "Rounds Rolled" in r.question.question_text and r.answer.isdigit())
-                
-                weekly_volume.append({
-                    "period": month_start.strftime("%b %Y"),
-                    "date_range": month_start.strftime("%b %Y"),
-                    "rounds": month_rounds,
-                    "sessions": len(month_entries)
-                })
-        elif period == "1y":
-            # Show 12 months
-            for i in range(12):
-                month_start = (now - timedelta(days=30*i)).replace(day=1, tzinfo=None)
-                if i == 0:
-                    month_end = now.replace(tzinfo=None)
-                else:
-                    month_end = month_start.replace(day=28) + timedelta(days=4)
-                    month_end = month_end - timedelta(days=month_end.day)
-                
-                month_entries = [e for e in entries if month_start <= e.date <= month_end]
-                month_rounds = sum(int(r.answer) for r in responses if r.entry_id in [e.id for e in month_entries] and r.question and "Rounds Rolled" in r.question.question_text and r.answer.isdigit())
-                
-                weekly_volume.append({
-                    "period": month_start.strftime("%b %Y"),
-                    "date_range": month_start.strftime("%b %Y"),
-                    "rounds": month_rounds,
-                    "sessions": len(month_entries)
-                })
-        else:
-            # Show last 4 weeks for other periods
-            for i in range(4):
-                week_start = (now - timedelta(days=7*(i+1))).replace(tzinfo=None)
-                week_end = week_start + timedelta(days=7)
-                week_entries = [e for e in entries if week_start <= e.date <= week_end]
-                week_rounds = sum(int(r.answer) for r in responses if r.entry_id in [e.id for e in week_entries] and r.question and "Rounds Rolled" in r.question.question_text and r.answer.isdigit())
-                
-                start_str = week_start.strftime("%d/%m")
-                end_str = (week_end - timedelta(days=1)).strftime("%d/%m")
-                
-                weekly_volume.append({
-                    "period": f"Week {4-i}",
-                    "date_range": f"{start_str} - {end_str}",
-                    "rounds": week_rounds,
-                    "sessions": len(week_entries)
-                })
-        
-        weekly_volume.reverse()  # Show oldest to newest
-        
-        # Rounds by session type
-        rounds_by_session_type = {"Gi": 0, "No Gi": 0}
-        for entry in entries:
-            entry_session_type = next((r.answer for r in responses if r.entry_id == entry.id and r.question and "Session Type" in r.question.question_text), None)
-            entry_rounds = next((int(r.answer) for r in responses if r.entry_id == entry.id and r.question and "Rounds Rolled" in r.question.question_text and r.answer.isdigit()), 0)
-            if entry_session_type and entry_rounds and entry_session_type in rounds_by_session_type:
-                rounds_by_session_type[entry_session_type] += entry_rounds
-        
-        # RPE vs Rounds correlation data
-        rpe_rounds_correlation = []
-        for entry in entries:
-            entry_rpe = next((int(r.answer) for r in responses if r.entry_id == entry.id and r.question and "Rate of Perceived Exertion" in r.question.question_text), None)
-            entry_rounds = next((int(r.answer) for r in responses if r.entry_id == entry.id and r.question and "Rounds Rolled" in r.question.question_text and r.answer.isdigit()), None)
-            if entry_rpe and entry_rounds:
-                rpe_rounds_correlation.append({
-                    "rpe": entry_rpe,
-                    "rounds": entry_rounds
-                })
-    
-        return {
-            "total_sessions": total_sessions,
-            "this_month": this_month,
-            "avg_rpe": round(avg_rpe, 1),
-            "total_rounds": total_rounds,
-            "session_types": session_types,
-            "training_types": training_types,
-            "submissions": submissions,
-            "positions": positions,
-            "rpe_distribution": rpe_distribution,
-            "monthly_trend": list(reversed(monthly_trend)),
-            "rpe_trend": rpe_trend,
-            "weekly_volume": weekly_volume,
-            "rounds_by_session_type": rounds_by_session_type,
-            "rpe_rounds_correlation": rpe_rounds_correlation
-        }
-    except Exception as e:
-        print(f"DEBUG: Exception in dashboard: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        # Re-raise to see the actual error
-        raise
\ No newline at end of file
+        result = build_dashboard(entries, responses, period, now)
+        _log_dashboard(engine, period, started, entries=len(entries), responses=len(responses))
+        return result
+    except Exception:
+        logger.exception("dashboard failed", extra={"fields": {"engine": engine, "period": period}})
+        raise
+
+def _log_dashboard(engine: str, period: Optional[str], started: float, **counts):
+    logger.info("dashboard computed", extra={"fields": dict(
+        engine=engine, period=period, duration_ms=round((time.perf_counter() - started) * 1000, 1), **counts
+    )})
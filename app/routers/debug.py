@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Header, HTTPException
+from typing import Optional
+import os
+from app.log import get_logger, set_user_trace, traced_users
+from app.routers.recommendations import rules as recommendation_rules
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+logger = get_logger(__name__)
+
+
+def _check_token(token: Optional[str]):
+    """Tracing is operator-only: requires DEBUG_TRACE_TOKEN to be set and sent as X-Debug-Token."""
+    expected = os.getenv("DEBUG_TRACE_TOKEN")
+    if not expected or token != expected:
+        raise HTTPException(status_code=404, detail="Not found")
+
+
+@router.get("/trace")
+def list_traced_users(x_debug_token: Optional[str] = Header(None)):
+    _check_token(x_debug_token)
+    return {"user_ids": sorted(traced_users())}
+
+
+@router.put("/trace/{user_id}")
+def enable_trace(user_id: int, x_debug_token: Optional[str] = Header(None)):
+    """Start writing trace() diagnostics for this user's requests (this worker only)."""
+    _check_token(x_debug_token)
+    set_user_trace(user_id, True)
+    logger.info("user trace enabled", extra={"fields": {"traced_user_id": user_id}})
+    return {"user_ids": sorted(traced_users())}
+
+
+@router.delete("/trace/{user_id}")
+def disable_trace(user_id: int, x_debug_token: Optional[str] = Header(None)):
+    _check_token(x_debug_token)
+    set_user_trace(user_id, False)
+    logger.info("user trace disabled", extra={"fields": {"traced_user_id": user_id}})
+    return {"user_ids": sorted(traced_users())}
+
+
+@router.get("/rules")
+def recommendation_rule_stats(x_debug_token: Optional[str] = Header(None)):
+    """Per-rule run counts, hits and timings of the recommendation rules (this worker only)."""
+    _check_token(x_debug_token)
+    return {"rules": recommendation_rules.stats()}
+
+
+@router.delete("/rules")
+def reset_recommendation_rule_stats(x_debug_token: Optional[str] = Header(None)):
+    _check_token(x_debug_token)
+    recommendation_rules.reset_stats()
+    return {"rules": recommendation_rules.stats()}
@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import date
-from app.database import get_db
-from app.models import Entry, Response, User, InjuryLog
-from app.schemas import Entry as EntrySchema, EntryCreate
-from app.dependencies import get_current_user
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi import Response as HTTPResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from app.database import get_async_db, get_db
+from app.models import Entry, EntryMetrics, Response, User, InjuryLog
+from app.schemas import Entry as EntrySchema, EntryCreate, EntryBulkCreate, EntryBulkResult
+from app.dependencies import get_current_user, get_current_user_async
+from app.cache import invalidate_user
+from app.metrics import SUMMARY_COLUMNS, entry_summary_query, session_type_column, sync_entry_metrics
+from app.streaks import refresh_progress_for_dates
+from app.rollups import refresh_daily_rollups
+from app.log import get_logger
+from app.pagination import MAX_PAGE_SIZE, paginate_entries
+from app.bulk_import import BulkImportError, IdempotencyConflict, import_entries
 
 router = APIRouter(prefix="/entries", tags=["entries"])
+logger = get_logger(__name__)
 
 @router.post("/", response_model=EntrySchema)
 def create_entry(
@@ -44,34 +55,129 @@ def create_entry(
             )
             db.add(db_response)
         
+        sync_entry_metrics(db, db_entry, entry.responses)
+        refresh_progress_for_dates(db, current_user.id, [db_entry.date])
+        refresh_daily_rollups(db, current_user.id, [db_entry.date])
         db.commit()
+        invalidate_user(current_user.id)
         db.refresh(db_entry)
+        logger.info("entry created", extra={"fields": {"entry_id": db_entry.id, "responses": len(entry.responses)}})
         return db_entry
     except Exception as e:
-        print(f"Error creating entry: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("entry create failed", extra={"fields": {"error_type": type(e).__name__}})
         raise HTTPException(status_code=500, detail=f"Error creating entry: {str(e)}")
 
-@router.get("/", response_model=List[EntrySchema])
-def get_entries(
+@router.post("/bulk", response_model=EntryBulkResult)
+def create_entries_bulk(
+    payload: EntryBulkCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    entries = db.query(Entry).filter(Entry.user_id == current_user.id).order_by(Entry.date.desc()).all()
+    """Import many entries in one transaction; all are created or none are.
+
+    Invalid items are reported together as a 422 with one error per item.
+    Retrying with the same Idempotency-Key returns the original entry ids.
+    """
+    try:
+        entry_ids, replayed = import_entries(db, current_user.id, payload.entries, idempotency_key)
+    except BulkImportError as e:
+        raise HTTPException(status_code=422, detail={"message": str(e), "errors": e.errors})
+    except IdempotencyConflict:
+        raise HTTPException(status_code=409, detail="Idempotency-Key was already used for a different request")
+    if not replayed:
+        invalidate_user(current_user.id)
+    logger.info("entries imported", extra={"fields": {"entries": len(entry_ids), "replayed": replayed}})
+    return EntryBulkResult(created=len(entry_ids), entry_ids=entry_ids, replayed=replayed)
+
+@router.get("/", response_model=List[EntrySchema])
+async def get_entries(
+    response: HTTPResponse,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit for every entry"),
+    before: Optional[str] = Query(None, description="Cursor from X-Next-Cursor: entries older than it"),
+    after: Optional[str] = Query(None, description="Cursor from X-Prev-Cursor: entries newer than it"),
+    date_from: Optional[date] = Query(None, description="Only entries on or after this day"),
+    date_to: Optional[date] = Query(None, description="Only entries on or before this day"),
+    session_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """List entries newest first, optionally one keyset page at a time."""
+    entries, next_cursor, prev_cursor = await db.run_sync(
+        list_entries, current_user.id, limit, before, after, date_from, date_to, session_type
+    )
+    _set_cursor_headers(response, next_cursor, prev_cursor)
     return entries
 
+def list_entries(db: Session, user_id: int, limit: Optional[int], before: Optional[str], after: Optional[str],
+                 date_from: Optional[date], date_to: Optional[date], session_type: Optional[str]):
+    """One page of entries with responses loaded. Returns (entries, next_cursor, prev_cursor)."""
+    # Responses and their questions are loaded in one SELECT each, not per entry
+    query = db.query(Entry).options(
+        selectinload(Entry.responses).selectinload(Response.question)
+    ).filter(Entry.user_id == user_id)
+    query = _filter_entries(query, date_from, date_to, session_type)
+    return paginate_entries(query, limit, before, after)
+
+@router.get("/summary")
+async def get_entry_summaries(
+    response: HTTPResponse,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit for every entry"),
+    before: Optional[str] = Query(None, description="Cursor from X-Next-Cursor: entries older than it"),
+    after: Optional[str] = Query(None, description="Cursor from X-Prev-Cursor: entries newer than it"),
+    date_from: Optional[date] = Query(None, description="Only entries on or after this day"),
+    date_to: Optional[date] = Query(None, description="Only entries on or before this day"),
+    session_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Compact history rows: {"columns": [...], "rows": [[...], ...]}, newest first.
+
+    Takes the same paging and filter parameters as GET /entries/.
+    """
+    def page(session: Session):
+        query = _filter_entries(entry_summary_query(session, current_user.id), date_from, date_to, session_type,
+                                metrics_joined=True)
+        return paginate_entries(query, limit, before, after)
+
+    rows, next_cursor, prev_cursor = await db.run_sync(page)
+    _set_cursor_headers(response, next_cursor, prev_cursor)
+    return {
+        "columns": list(SUMMARY_COLUMNS),
+        "rows": [[row.id, row.date.isoformat(), row.session_type, row.rpe, row.rounds, row.summary] for row in rows],
+    }
+
+def _filter_entries(query, date_from: Optional[date], date_to: Optional[date], session_type: Optional[str],
+                    metrics_joined: bool = False):
+    if date_from:
+        query = query.filter(Entry.date >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.filter(Entry.date < datetime.combine(date_to + timedelta(days=1), time.min))
+    if session_type:
+        # Match the answered session type (the clients send "training" on the entry itself)
+        if not metrics_joined:
+            query = query.outerjoin(EntryMetrics, EntryMetrics.entry_id == Entry.id)
+        query = query.filter(session_type_column() == session_type)
+    return query
+
+def _set_cursor_headers(response: HTTPResponse, next_cursor: Optional[str], prev_cursor: Optional[str]):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if prev_cursor:
+        response.headers["X-Prev-Cursor"] = prev_cursor
+
 @router.get("/{entry_id}", response_model=EntrySchema)
-def get_entry(
+async def get_entry(
     entry_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    entry = db.query(Entry).filter(
-        Entry.id == entry_id, 
-        Entry.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Entry).options(
+            selectinload(Entry.responses).selectinload(Response.question)
+        ).where(Entry.id == entry_id, Entry.user_id == current_user.id)
+    )
+    entry = result.scalars().first()
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
     return entry
@@ -92,6 +198,7 @@ def update_entry(
         raise HTTPException(status_code=404, detail="Entry not found")
     
     # Update entry fields
+    previous_date = db_entry.date
     db_entry.date = entry.date
     db_entry.session_type = entry.session_type
     
@@ -107,8 +214,13 @@ def update_entry(
         )
         db.add(db_response)
     
+    sync_entry_metrics(db, db_entry, entry.responses)
+    refresh_progress_for_dates(db, current_user.id, [previous_date, db_entry.date])
+    refresh_daily_rollups(db, current_user.id, [previous_date, db_entry.date])
     db.commit()
+    invalidate_user(current_user.id)
     db.refresh(db_entry)
+    logger.info("entry updated", extra={"fields": {"entry_id": db_entry.id, "responses": len(entry.responses)}})
     return db_entry
 
 @router.get("/pending", response_model=List[EntrySchema])
@@ -156,8 +268,13 @@ def complete_pending_entry(
         )
         db.add(db_response)
     
+    sync_entry_metrics(db, db_entry, entry.responses)
+    refresh_progress_for_dates(db, current_user.id, [db_entry.date])
+    refresh_daily_rollups(db, current_user.id, [db_entry.date])
     db.commit()
+    invalidate_user(current_user.id)
     db.refresh(db_entry)
+    logger.info("pending entry completed", extra={"fields": {"entry_id": db_entry.id}})
     return db_entry
 
 @router.delete("/{entry_id}")
@@ -173,6 +290,11 @@ def delete_entry(
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
     
+    entry_date = entry.date
     db.delete(entry)
+    refresh_progress_for_dates(db, current_user.id, [entry_date])
+    refresh_daily_rollups(db, current_user.id, [entry_date])
     db.commit()
+    invalidate_user(current_user.id)
+    logger.info("entry deleted", extra={"fields": {"entry_id": entry_id}})
     return {"message": "Entry deleted successfully"}
\ No newline at end of file
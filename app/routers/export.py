@@ -0,0 +1,136 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from typing import Any, Dict, Iterator
+import csv
+import io
+import json
+from app.database import get_db
+from app.models import Entry, Response, Question, User, InjuryLog, UserGoal, TechniqueGoal
+from app.dependencies import get_current_user
+from app.log import get_logger
+
+router = APIRouter(prefix="/export", tags=["export"])
+logger = get_logger(__name__)
+
+# Rows are fetched from the database in batches of this size
+EXPORT_BATCH_SIZE = 500
+CSV_COLUMNS = ["record_type", "record_id", "date", "field", "value"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _columns(obj, skip=("user_id",)) -> Dict[str, Any]:
+    return {c.name: _jsonable(getattr(obj, c.name)) for c in obj.__table__.columns if c.name not in skip}
+
+
+def export_records(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
+    """Yield the user's journal as records: entries (with responses), injuries, goals, technique goals.
+
+    Entries and responses come from one ordered join read with yield_per, so
+    only one batch of rows is held in memory at a time.
+    """
+    questions = dict(db.query(Question.id, Question.question_text).all())
+
+    rows = db.query(
+        Entry.id, Entry.date, Entry.session_type, Entry.injured_during_session,
+        Entry.created_at, Entry.updated_at, Response.question_id, Response.answer
+    ).outerjoin(
+        Response, Response.entry_id == Entry.id
+    ).filter(
+        Entry.user_id == user_id
+    ).order_by(Entry.date, Entry.id, Response.id).yield_per(EXPORT_BATCH_SIZE)
+
+    current = None
+    for row in rows:
+        if current is None or current["id"] != row.id:
+            if current is not None:
+                yield current
+            current = {
+                "type": "entry",
+                "id": row.id,
+                "date": _jsonable(row.date),
+                "session_type": row.session_type,
+                "injured_during_session": row.injured_during_session,
+                "created_at": _jsonable(row.created_at),
+                "updated_at": _jsonable(row.updated_at),
+                "responses": [],
+            }
+        if row.question_id is not None:
+            current["responses"].append({
+                "question_id": row.question_id,
+                "question": questions.get(row.question_id),
+                "answer": row.answer,
+            })
+    if current is not None:
+        yield current
+
+    for record_type, model, order in (
+        ("injury", InjuryLog, InjuryLog.injury_date),
+        ("goal", UserGoal, UserGoal.start_date),
+        ("technique_goal", TechniqueGoal, TechniqueGoal.created_at),
+    ):
+        query = db.query(model).filter(model.user_id == user_id).order_by(order, model.id)
+        for obj in query.yield_per(EXPORT_BATCH_SIZE):
+            yield dict(type=record_type, **_columns(obj))
+
+
+def _record_date(record: Dict[str, Any]):
+    return record.get("date") or record.get("injury_date") or record.get("start_date") or record.get("created_at")
+
+
+def ndjson_lines(records: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record) + "\n"
+
+
+def csv_lines(records: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Long-format CSV: one row per field, so every record type shares the same columns.
+
+    Entry responses become one row each, with the question text as the field.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for record in records:
+        record_type, record_id, record_date = record["type"], record["id"], _record_date(record)
+        for field, value in record.items():
+            if field in ("type", "id", "responses"):
+                continue
+            writer.writerow([record_type, record_id, record_date, field, value])
+        for response in record.get("responses", ()):
+            writer.writerow([record_type, record_id, record_date,
+                             response["question"] or f"question {response['question_id']}", response["answer"]])
+        yield flush()
+
+
+@router.get("")
+def export_journal(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the current user's whole journal as NDJSON or CSV."""
+    records = export_records(db, current_user.id)
+    body = ndjson_lines(records) if format == "ndjson" else csv_lines(records)
+    filename = f"bjj_journal_{current_user.username}_{date.today().strftime('%Y%m%d')}.{format}"
+    logger.info("export started", extra={"fields": {"format": format}})
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
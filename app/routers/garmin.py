@@ -6,8 +6,14 @@ from pydantic import BaseModel
 from app.database import get_db
 from app.models import Entry, Response, User
 from app.dependencies import get_current_user
+from app.cache import cached_for_user, invalidate_user
+from app.log import get_logger
+from app.metrics import sync_entry_metrics
+from app.rollups import refresh_daily_rollups
+from app.streaks import refresh_progress_for_dates
 
 router = APIRouter(prefix="/garmin", tags=["garmin"])
+logger = get_logger(__name__)
 
 class GarminActivityData(BaseModel):
     activity_name: str
@@ -60,8 +66,14 @@ def receive_garmin_activity(
     )
     
     db.add(entry)
+    db.flush()
+    sync_entry_metrics(db, entry, [])
+    refresh_progress_for_dates(db, user.id, [entry.date])
+    refresh_daily_rollups(db, user.id, [entry.date])
     db.commit()
     db.refresh(entry)
+    invalidate_user(user.id)
+    logger.info("garmin activity received", extra={"fields": {"entry_id": entry.id, "activity_id": activity.activity_id}})
     
     return {
         "message": "Activity received",
@@ -75,7 +87,12 @@ def get_widget_data(
     current_user: User = Depends(get_current_user)
 ):
     """Get summary data for Garmin watch widget"""
-    
+    return cached_for_user(
+        "widget-data", current_user.id, None,
+        lambda: compute_widget_data(db, current_user)
+    )
+
+def compute_widget_data(db: Session, current_user: User) -> WidgetData:
     # Get user's entries
     entries = db.query(Entry).filter(Entry.user_id == current_user.id).all()
     
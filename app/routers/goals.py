@@ -1,131 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func, Integer
-from datetime import date, datetime, timedelta
+from sqlalchemy import and_, desc, func, select, Integer
+from datetime import date, datetime, time, timedelta
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import User, UserGoal, WeeklyProgress, StreakHistory, Entry, TechniqueGoal, Response, Question
 from app.schemas import UserGoalCreate, UserGoal as UserGoalSchema, WeeklyProgressCreate, WeeklyProgress as WeeklyProgressSchema, StreakHistory as StreakHistorySchema, CurrentStreakResponse, TechniqueGoalCreate, TechniqueGoalResponse, TechniqueGoalComplete
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_user_async
+from app.cache import invalidate_user
+from app.streaks import apply_week_change, calculate_sessions_in_week, get_week_start, update_weekly_progress, week_bounds
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
-def get_week_start(target_date: date) -> date:
-    """Get the Monday of the week containing the target date"""
-    days_since_monday = target_date.weekday()
-    return target_date - timedelta(days=days_since_monday)
-
-def calculate_sessions_in_week(db: Session, user_id: int, week_start: date) -> int:
-    """Count training sessions in a specific week"""
-    week_end = week_start + timedelta(days=6)
-    return db.query(Entry).filter(
-        and_(
-            Entry.user_id == user_id,
-            func.date(Entry.date) >= week_start,
-            func.date(Entry.date) <= week_end
-        )
-    ).count()
-
-def update_weekly_progress(db: Session, user_id: int, week_start: date):
-    """Update or create weekly progress record"""
-    # Get current goal
-    current_goal = db.query(UserGoal).filter(
-        and_(UserGoal.user_id == user_id, UserGoal.is_active == True)
-    ).first()
-    
-    if not current_goal:
-        return
-    
-    # Get or create weekly progress
-    progress = db.query(WeeklyProgress).filter(
-        and_(
-            WeeklyProgress.user_id == user_id,
-            WeeklyProgress.week_start_date == week_start
-        )
-    ).first()
-    
-    if not progress:
-        progress = WeeklyProgress(
-            user_id=user_id,
-            week_start_date=week_start,
-            sessions_completed=0,
-            goal_met=False,
-            is_paused=False,
-            streak_count=0
-        )
-        db.add(progress)
-    
-    # Update sessions completed
-    progress.sessions_completed = calculate_sessions_in_week(db, user_id, week_start)
-    progress.goal_met = progress.sessions_completed >= current_goal.weekly_sessions_target and not progress.is_paused
-    
-    # Calculate streak
-    calculate_streak(db, user_id, week_start)
-    
-    db.commit()
-
-def calculate_streak(db: Session, user_id: int, current_week: date):
-    """Calculate and update streak information"""
-    # Get all weekly progress ordered by week
-    all_progress = db.query(WeeklyProgress).filter(
-        WeeklyProgress.user_id == user_id
-    ).order_by(WeeklyProgress.week_start_date).all()
-    
-    if not all_progress:
-        return
-    
-    # Calculate current streak
-    current_streak = 0
-    max_streak = 0
-    temp_streak = 0
-    
-    for progress in all_progress:
-        if progress.goal_met or progress.is_paused:
-            temp_streak += 1
-            if progress.week_start_date <= current_week:
-                current_streak = temp_streak
-        else:
-            temp_streak = 0
-        
-        max_streak = max(max_streak, temp_streak)
-    
-    # Update streak counts in progress records
-    for i, progress in enumerate(all_progress):
-        if progress.week_start_date <= current_week:
-            if progress.goal_met or progress.is_paused:
-                # Count backwards to find streak start
-                streak_count = 1
-                for j in range(i - 1, -1, -1):
-                    if all_progress[j].goal_met or all_progress[j].is_paused:
-                        streak_count += 1
-                    else:
-                        break
-                progress.streak_count = streak_count
-            else:
-                progress.streak_count = 0
-    
-    # Update streak history
-    update_streak_history(db, user_id, current_streak, max_streak)
-    
-    db.commit()
-
-def update_streak_history(db: Session, user_id: int, current_streak: int, max_streak: int):
-    """Update streak history records"""
-    # Mark all previous streaks as not current
-    db.query(StreakHistory).filter(
-        and_(StreakHistory.user_id == user_id, StreakHistory.is_current == True)
-    ).update({StreakHistory.is_current: False})
-    
-    # Create or update current streak record
-    if current_streak > 0:
-        current_streak_record = StreakHistory(
-            user_id=user_id,
-            streak_length=current_streak,
-            start_date=date.today() - timedelta(weeks=current_streak-1),
-            is_current=True
-        )
-        db.add(current_streak_record)
-
 @router.post("/", response_model=UserGoalSchema)
 def create_or_update_goal(
     goal: UserGoalCreate,
@@ -154,6 +41,8 @@ def create_or_update_goal(
     # Update progress for current week
     current_week = get_week_start(date.today())
     update_weekly_progress(db, current_user.id, current_week)
+    db.commit()
+    invalidate_user(current_user.id)
     
     return new_goal
 
@@ -185,61 +74,58 @@ def update_goal(
     # Update progress for current week
     current_week = get_week_start(date.today())
     update_weekly_progress(db, current_user.id, current_week)
+    db.commit()
+    invalidate_user(current_user.id)
     
     return new_goal
 
 @router.get("/current", response_model=Optional[UserGoalSchema])
-def get_current_goal(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_current_goal(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's current active goal"""
-    return db.query(UserGoal).filter(
+    return await db.scalar(select(UserGoal).where(
         and_(UserGoal.user_id == current_user.id, UserGoal.is_active == True)
-    ).first()
+    ).limit(1))
 
 @router.get("/history", response_model=List[UserGoalSchema])
-def get_goal_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_goal_history(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's goal history"""
-    return db.query(UserGoal).filter(
+    result = await db.scalars(select(UserGoal).where(
         UserGoal.user_id == current_user.id
-    ).order_by(desc(UserGoal.created_at)).all()
+    ).order_by(desc(UserGoal.created_at)))
+    return result.all()
+
+def _week_progress_query(user_id: int, week_start: date):
+    return select(WeeklyProgress).where(
+        and_(
+            WeeklyProgress.user_id == user_id,
+            WeeklyProgress.week_start_date == week_start
+        )
+    ).limit(1)
 
 @router.get("/progress/current-week", response_model=Optional[WeeklyProgressSchema])
-def get_current_week_progress(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_current_week_progress(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get current week's progress"""
+    """Get current week's progress; null until an entry, goal change or pause touches the week"""
     current_week = get_week_start(date.today())
-    update_weekly_progress(db, current_user.id, current_week)
-    
-    return db.query(WeeklyProgress).filter(
-        and_(
-            WeeklyProgress.user_id == current_user.id,
-            WeeklyProgress.week_start_date == current_week
-        )
-    ).first()
+    return await db.scalar(_week_progress_query(current_user.id, current_week))
 
 @router.get("/progress/weekly/{week_date}", response_model=Optional[WeeklyProgressSchema])
-def get_weekly_progress(
+async def get_weekly_progress(
     week_date: date,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get progress for a specific week"""
     week_start = get_week_start(week_date)
-    update_weekly_progress(db, current_user.id, week_start)
-    
-    return db.query(WeeklyProgress).filter(
-        and_(
-            WeeklyProgress.user_id == current_user.id,
-            WeeklyProgress.week_start_date == week_start
-        )
-    ).first()
+    return await db.scalar(_week_progress_query(current_user.id, week_start))
 
 @router.post("/progress/pause-week")
 def pause_week(
@@ -262,7 +148,7 @@ def pause_week(
         progress = WeeklyProgress(
             user_id=current_user.id,
             week_start_date=week_start,
-            sessions_completed=0,
+            sessions_completed=calculate_sessions_in_week(db, current_user.id, week_start),
             goal_met=False,
             is_paused=True,
             streak_count=0
@@ -276,55 +162,48 @@ def pause_week(
                                                            UserGoal.is_active == True)
                                                   ).first().weekly_sessions_target)
     
-    db.commit()
-    
     # Recalculate streaks
-    calculate_streak(db, current_user.id, week_start)
+    apply_week_change(db, current_user.id, progress)
+    db.commit()
+    invalidate_user(current_user.id)
     
     return {"message": "Week pause status updated"}
 
 @router.get("/streaks/current", response_model=CurrentStreakResponse)
-def get_current_streak(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_current_streak(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get current streak information"""
+    """Get current streak information (read-only; progress is refreshed when data changes)"""
     current_week = get_week_start(date.today())
-    update_weekly_progress(db, current_user.id, current_week)
     
     # Get current week progress
-    current_progress = db.query(WeeklyProgress).filter(
-        and_(
-            WeeklyProgress.user_id == current_user.id,
-            WeeklyProgress.week_start_date == current_week
-        )
-    ).first()
+    current_progress = await db.scalar(_week_progress_query(current_user.id, current_week))
     
     # Get current goal
-    current_goal = db.query(UserGoal).filter(
+    current_goal = await db.scalar(select(UserGoal).where(
         and_(UserGoal.user_id == current_user.id, UserGoal.is_active == True)
-    ).first()
+    ).limit(1))
     
     # Get longest streak
-    longest_streak = db.query(func.max(StreakHistory.streak_length)).filter(
+    longest_streak = await db.scalar(select(func.max(StreakHistory.streak_length)).where(
         StreakHistory.user_id == current_user.id
-    ).scalar() or 0
+    )) or 0
     
     # Calculate rounds for current week
-    from app.models import Response, Question
-    week_end = current_week + timedelta(days=6)
-    rounds_query = db.query(func.sum(func.cast(Response.answer, Integer))).join(
+    week_from, week_to = week_bounds(current_week)
+    rounds_query = await db.scalar(select(func.sum(func.cast(Response.answer, Integer))).join(
         Entry, Response.entry_id == Entry.id
     ).join(
         Question, Response.question_id == Question.id
-    ).filter(
+    ).where(
         and_(
             Entry.user_id == current_user.id,
-            func.date(Entry.date) >= current_week,
-            func.date(Entry.date) <= week_end,
+            Entry.date >= week_from,
+            Entry.date < week_to,
             Question.question_text == 'Rounds Rolled'
         )
-    ).scalar()
+    ))
     
     current_week_rounds = rounds_query or 0
     
@@ -345,15 +224,16 @@ def get_current_streak(
     )
 
 @router.get("/streaks/longest", response_model=List[StreakHistorySchema])
-def get_longest_streaks(
+async def get_longest_streaks(
     limit: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get longest streaks achieved"""
-    return db.query(StreakHistory).filter(
+    result = await db.scalars(select(StreakHistory).where(
         StreakHistory.user_id == current_user.id
-    ).order_by(desc(StreakHistory.streak_length)).limit(limit).all()
+    ).order_by(desc(StreakHistory.streak_length)).limit(limit))
+    return result.all()
 
 
 # --- Technique Goals ---
@@ -384,6 +264,7 @@ def create_technique_goal(
     )
     db.add(new_goal)
     db.commit()
+    invalidate_user(current_user.id)
     db.refresh(new_goal)
     return new_goal
 
@@ -403,6 +284,7 @@ def delete_technique_goal(
     goal.status = "archived"
     goal.completed_at = datetime.utcnow()
     db.commit()
+    invalidate_user(current_user.id)
     return {"message": "Technique goal archived"}
 
 
@@ -419,42 +301,50 @@ def get_technique_goals_progress(
     if not goals:
         return []
 
-    results = []
-    for goal in goals:
-        created_at = goal.created_at
-        if created_at and created_at.tzinfo is not None:
-            created_at = created_at.replace(tzinfo=None)
+    def naive(value):
+        return value.replace(tzinfo=None) if value and value.tzinfo is not None else value
 
-        # Count sessions that included this position since goal was created
-        session_count = db.query(func.count(func.distinct(Entry.id))).join(
-            Response, Response.entry_id == Entry.id
-        ).join(
-            Question, Response.question_id == Question.id
-        ).filter(
-            and_(
-                Entry.user_id == current_user.id,
-                Entry.date >= created_at,
-                Question.question_text == 'Class Technique',
-                Response.answer.like(f"{goal.position} - %")
-            )
-        ).scalar() or 0
+    # One query for every Class Technique answer since the oldest goal's creation day;
+    # per-goal counts, last trained dates and streaks are computed in memory below.
+    # Goals without created_at (rows copied in by a migration or restore) count every session
+    earliest = min(naive(g.created_at) or datetime.min for g in goals)
+    technique_rows = db.query(Entry.id, Entry.date, Response.answer).join(
+        Response, Response.entry_id == Entry.id
+    ).join(
+        Question, Response.question_id == Question.id
+    ).filter(
+        and_(
+            Entry.user_id == current_user.id,
+            Entry.date >= datetime.combine(earliest.date(), time.min),
+            Question.question_text == 'Class Technique'
+        )
+    ).all()
+    # Positions match case-insensitively, like the ILIKE match in /techniques/history
+    technique_rows = [(entry_id, entry_date, answer.casefold()) for entry_id, entry_date, answer in technique_rows]
 
-        # Find last trained date for this position
-        last_entry = db.query(func.max(Entry.date)).join(
-            Response, Response.entry_id == Entry.id
-        ).join(
-            Question, Response.question_id == Question.id
-        ).filter(
-            and_(
-                Entry.user_id == current_user.id,
-                Entry.date >= created_at,
-                Question.question_text == 'Class Technique',
-                Response.answer.like(f"{goal.position} - %")
-            )
-        ).scalar()
+    now = datetime.utcnow()
+    current_week_start = get_week_start(date.today())
+    results = []
+    for goal in goals:
+        created_at = naive(goal.created_at)
+        counted_since = created_at or datetime.min
+        prefix = f"{goal.position} - ".casefold()
+
+        session_ids = set()
+        last_entry = None
+        trained_weeks = set()
+        for entry_id, entry_date, answer in technique_rows:
+            if not answer.startswith(prefix):
+                continue
+            trained_weeks.add(get_week_start(naive(entry_date).date()))
+            # Count sessions that included this position since goal was created
+            if naive(entry_date) >= counted_since:
+                session_ids.add(entry_id)
+                if last_entry is None or entry_date > last_entry:
+                    last_entry = entry_date
+        session_count = len(session_ids)
 
         # Calculate weeks since goal created
-        now = datetime.utcnow()
         days_elapsed = (now - created_at).days if created_at else 0
         weeks_elapsed = max(1, round(days_elapsed / 7, 1))
 
@@ -462,35 +352,18 @@ def get_technique_goals_progress(
         days_left = None
         total_days = None
         if goal.timeline_weeks:
-            deadline = created_at + timedelta(weeks=goal.timeline_weeks)
-            days_left = (deadline - now).days
             total_days = goal.timeline_weeks * 7
+            if created_at:
+                deadline = created_at + timedelta(weeks=goal.timeline_weeks)
+                days_left = (deadline - now).days
 
         # Calculate weekly streak: consecutive weeks (current → past) with at least 1 session
-        current_week_start = get_week_start(date.today())
         streak = 0
         # Don't look further back than goal creation
         goal_start_date = created_at.date() if created_at else date.today()
         check_week = current_week_start
-        while check_week >= goal_start_date:
-            week_end = check_week + timedelta(days=6)
-            week_sessions = db.query(func.count(func.distinct(Entry.id))).join(
-                Response, Response.entry_id == Entry.id
-            ).join(
-                Question, Response.question_id == Question.id
-            ).filter(
-                and_(
-                    Entry.user_id == current_user.id,
-                    func.date(Entry.date) >= check_week,
-                    func.date(Entry.date) <= week_end,
-                    Question.question_text == 'Class Technique',
-                    Response.answer.like(f"{goal.position} - %")
-                )
-            ).scalar() or 0
-            if week_sessions > 0:
-                streak += 1
-            else:
-                break
+        while check_week >= goal_start_date and check_week in trained_weeks:
+            streak += 1
             check_week -= timedelta(days=7)
 
         results.append({
@@ -532,6 +405,7 @@ def complete_technique_goal(
         goal.self_rating = data.self_rating
         goal.completed_at = datetime.utcnow()
         db.commit()
+        invalidate_user(current_user.id)
         return {"message": "Goal marked as completed", "status": "completed"}
 
     elif data.action == "archive":
@@ -540,6 +414,7 @@ def complete_technique_goal(
         goal.self_rating = data.self_rating
         goal.completed_at = datetime.utcnow()
         db.commit()
+        invalidate_user(current_user.id)
         return {"message": "Goal archived", "status": "archived"}
 
     elif data.action == "extend":
@@ -547,6 +422,7 @@ def complete_technique_goal(
             raise HTTPException(status_code=400, detail="extend_weeks must be at least 1")
         goal.timeline_weeks = (goal.timeline_weeks or 0) + data.extend_weeks
         db.commit()
+        invalidate_user(current_user.id)
         return {"message": f"Goal extended by {data.extend_weeks} weeks", "status": "active"}
 
     else:
@@ -622,7 +498,7 @@ def get_technique_goals_history(
                 Entry.date >= created,
                 Entry.date <= end_date,
                 Question.question_text == 'Class Technique',
-                Response.answer.like(f"{goal.position} - %")
+                Response.answer.ilike(f"{goal.position} - %")
             )
         ).scalar() or 0
 
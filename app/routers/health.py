@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import time
+from app.database import get_async_db, get_db
+from app.db_pool import pool_stats
+from app.log import get_logger
+
+router = APIRouter(prefix="/health", tags=["health"])
+logger = get_logger(__name__)
+
+
+@router.get("/db")
+async def database_health(db: Session = Depends(get_db), async_db: AsyncSession = Depends(get_async_db)):
+    """Round-trip a trivial query on the sync and async engines and report their pool usage.
+
+    503 when either engine cannot reach the database.
+    """
+    started = time.perf_counter()
+    try:
+        await run_in_threadpool(db.execute, text("SELECT 1"))
+    except Exception as e:
+        logger.exception("database health check failed")
+        sync = {"status": "error", "error": type(e).__name__}
+    else:
+        sync = {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 3)}
+    sync["pool"] = pool_stats(db.get_bind())
+
+    started = time.perf_counter()
+    try:
+        await async_db.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.exception("async database health check failed")
+        async_ = {"status": "error", "error": type(e).__name__}
+    else:
+        async_ = {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 3)}
+    async_["pool"] = pool_stats(async_db.get_bind())
+
+    body = {**sync, "async": async_}
+    if sync["status"] != "ok" or async_["status"] != "ok":
+        body["status"] = "error"
+        return JSONResponse(status_code=503, content=body)
+    return body
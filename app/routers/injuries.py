@@ -5,6 +5,7 @@ from app.database import get_db
 from app.models import User, InjuryLog
 from app.schemas import InjuryLogCreate, InjuryLogResponse
 from app.dependencies import get_current_user
+from app.cache import invalidate_user
 
 router = APIRouter(prefix="/injuries", tags=["injuries"])
 
@@ -24,6 +25,7 @@ def create_injury(
     )
     db.add(new_injury)
     db.commit()
+    invalidate_user(current_user.id)
     db.refresh(new_injury)
     return new_injury
 
@@ -79,6 +81,7 @@ def update_injury(
     injury.notes = injury_data.notes
     
     db.commit()
+    invalidate_user(current_user.id)
     db.refresh(injury)
     return injury
 
@@ -97,4 +100,5 @@ def delete_injury(
     
     db.delete(injury)
     db.commit()
+    invalidate_user(current_user.id)
     return {"message": "Injury deleted successfully"}
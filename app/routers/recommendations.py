@@ -1,19 +1,56 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session, joinedload
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.database import get_db
-from app.models import Entry, Response, Question, User, InjuryLog, UserGoal, TechniqueGoal
+from app.models import Entry, Response, User, InjuryLog, UserGoal, TechniqueGoal
 from app.dependencies import get_current_user
+from app.cache import cached_for_user
+from app.dashboard import ResponseIndex
+from app.log import get_logger
+from app.rules import RuleSet
+from app.techniques import position_and_skill_type
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
+logger = get_logger(__name__)
 
 
-def get_entries_with_responses(db: Session, user_id: int, days: int = 90):
-    """Fetch entries and their responses for a user within the last N days."""
+class TrainingSnapshot:
+    """Everything the recommendation rules read about one user, loaded up front.
+
+    The rules take their inputs from here and never touch the database, so
+    they can be run (and benchmarked) on snapshots built from plain objects.
+    """
+
+    def __init__(self, entries: List, responses: List, active_injuries: List[str],
+                 goal=None, technique_goals: Optional[List] = None):
+        self.entries = entries
+        self.responses = responses
+        self.active_injuries = active_injuries
+        self.goal = goal
+        self.technique_goals = technique_goals or []
+
+        self.index = ResponseIndex(responses)
+        self.entry_dates = {entry.id: entry.date for entry in entries}
+        self.technique_data = extract_technique_data(responses, self.entry_dates, self.index)
+        self.rpe_data = extract_rpe_values(entries, responses, self.index)
+        self.total_sessions = len(entries)
+        self.gates = check_data_gates(self.total_sessions, self.technique_data, self.rpe_data, entries)
+        self.stale_days = get_stale_window_days(entries)
+
+
+def load_training_snapshot(db: Session, user_id: int, days: int = 90) -> TrainingSnapshot:
+    """Load a user's last N days of training and their active injuries and goals in four SELECTs.
+
+    Entries arrive with their responses and questions in one joined query.
+    Responses are then ordered by id, as the rules have always seen them.
+    The active injuries, weekly goal and technique goals are each one
+    filtered SELECT, leaving the User's own collections untouched.
+    """
     since = datetime.utcnow() - timedelta(days=days)
     entries = (
         db.query(Entry)
+        .options(joinedload(Entry.responses).joinedload(Response.question))
         .filter(Entry.user_id == user_id, Entry.date >= since)
         .order_by(Entry.date.desc())
         .all()
@@ -22,68 +59,67 @@ def get_entries_with_responses(db: Session, user_id: int, days: int = 90):
     for entry in entries:
         if entry.date and entry.date.tzinfo is not None:
             entry.date = entry.date.replace(tzinfo=None)
-    entry_ids = [e.id for e in entries]
-    responses = (
-        db.query(Response)
-        .options(joinedload(Response.question))
-        .filter(Response.entry_id.in_(entry_ids))
-        .all()
-    ) if entry_ids else []
-    return entries, responses
-
-
-def get_active_injuries(db: Session, user_id: int) -> List[str]:
-    """Return list of injured area names that are currently active."""
-    injuries = db.query(InjuryLog).filter(
-        InjuryLog.user_id == user_id,
-        InjuryLog.end_date.is_(None)
-    ).all()
-    return [i.injured_area.lower() for i in injuries]
+    responses = sorted((r for entry in entries for r in entry.responses), key=lambda r: r.id)
+
+    injuries = db.query(InjuryLog.injured_area).filter(
+        InjuryLog.user_id == user_id, InjuryLog.end_date.is_(None)
+    ).order_by(InjuryLog.id).all()
+    goal = db.query(UserGoal).filter(
+        UserGoal.user_id == user_id, UserGoal.is_active == True
+    ).order_by(UserGoal.id).first()
+    technique_goals = db.query(TechniqueGoal).filter(
+        TechniqueGoal.user_id == user_id, TechniqueGoal.is_active == True
+    ).order_by(TechniqueGoal.id).all()
+    return TrainingSnapshot(
+        entries,
+        responses,
+        active_injuries=[area.lower() for area, in injuries],
+        goal=goal,
+        technique_goals=technique_goals,
+    )
 
 
-def extract_rpe_values(entries: List, responses: List) -> List[Dict]:
-    """Return list of {date, rpe} dicts sorted oldest to newest."""
+def extract_rpe_values(entries: List, responses: List, index: Optional[ResponseIndex] = None) -> List[Dict]:
+    """Return list of {date, rpe} dicts sorted oldest to newest, one per entry with a numeric RPE."""
+    if index is None:
+        index = ResponseIndex(responses)
     result = []
     for entry in entries:
-        rpe = next(
-            (int(r.answer) for r in responses
-             if r.entry_id == entry.id
-             and r.question
-             and "Rate of Perceived Exertion" in r.question.question_text
-             and r.answer.isdigit()),
-            None
-        )
+        rpe = index.first_rpe.get(entry.id)
         if rpe is not None:
             result.append({"date": entry.date, "rpe": rpe})
     return sorted(result, key=lambda x: x["date"])
 
 
-def extract_technique_data(responses: List) -> Dict[str, Any]:
+def extract_technique_data(responses: List, entry_dates: Optional[Dict[int, datetime]] = None,
+                           index: Optional[ResponseIndex] = None) -> Dict[str, Any]:
     """
     Parse Class Technique responses into position and skill type frequency maps.
+    Named submissions ("Mount - Armbar") count as Attacks/Submissions.
+    Entry dates come from `entry_dates` (entry id -> date) when given, so
+    responses never load their entry.
     """
     position_counts: Dict[str, int] = {}
     skill_counts: Dict[str, int] = {}
     position_last_seen: Dict[str, datetime] = {}
     position_skills: Dict[str, Dict[str, int]] = {}
 
-    technique_responses = [
-        r for r in responses
-        if r.question and "Class Technique" in r.question.question_text
-        and " - " in r.answer
-    ]
+    if index is None:
+        index = ResponseIndex(responses)
 
-    for r in technique_responses:
-        parts = r.answer.split(" - ")
-        if len(parts) < 2:
+    for r in index.technique_responses:
+        parsed = position_and_skill_type(r.answer)
+        if parsed is None:
             continue
-        position = parts[0].strip()
-        skill = parts[1].strip()
+        position, skill = parsed
 
         position_counts[position] = position_counts.get(position, 0) + 1
         skill_counts[skill] = skill_counts.get(skill, 0) + 1
 
-        entry_date = r.entry.date if hasattr(r, 'entry') and r.entry else datetime.min
+        if entry_dates is not None:
+            entry_date = entry_dates.get(r.entry_id, datetime.min)
+        else:
+            entry_date = r.entry.date if hasattr(r, 'entry') and r.entry else datetime.min
         if position not in position_last_seen or entry_date > position_last_seen[position]:
             position_last_seen[position] = entry_date
 
@@ -147,16 +183,15 @@ def get_stale_window_days(entries: List) -> int:
 
 
 # --- Recommendation functions with tightened thresholds (Phase 2) ---
+# Each numbered rule is its own function so the rule registry below can time
+# and skip it; the recommend_* functions run a category's rules in order.
 
-def recommend_positions(technique_data: Dict, active_injuries: List[str], stale_days: int) -> List[Dict]:
+def stale_positions(technique_data: Dict, stale_days: int) -> List[Dict]:
+    """Rule 1 - Stale position (medium) — only positions trained 3+ times."""
     recs = []
     position_counts = technique_data["position_counts"]
-    position_last_seen = technique_data["position_last_seen"]
-    position_skills = technique_data["position_skills"]
     now = datetime.utcnow()
-
-    # Rule 1 - Stale position (medium) — only positions trained 3+ times
-    for position, last_seen in position_last_seen.items():
+    for position, last_seen in technique_data["position_last_seen"].items():
         if position_counts.get(position, 0) < 3:
             continue
         days_ago = (now - last_seen).days
@@ -169,9 +204,14 @@ def recommend_positions(technique_data: Dict, active_injuries: List[str], stale_
                 action=f"Log a session focused on {position}.",
                 data={"position": position, "days_since_trained": days_ago}
             ))
+    return recs
+
 
-    # Rule 2 - Limited skill diversity (low) — 5+ sessions in position
-    for position, skills in position_skills.items():
+def narrow_positions(technique_data: Dict) -> List[Dict]:
+    """Rule 2 - Limited skill diversity (low) — 5+ sessions in position."""
+    recs = []
+    position_counts = technique_data["position_counts"]
+    for position, skills in technique_data["position_skills"].items():
         if position_counts.get(position, 0) >= 5 and len(skills) == 1:
             only_skill = list(skills.keys())[0]
             recs.append(build_recommendation(
@@ -182,57 +222,63 @@ def recommend_positions(technique_data: Dict, active_injuries: List[str], stale_
                 action="Incorporate additional skill types such as sweeps, escapes, or transitions.",
                 data={"position": position, "current_skill": only_skill, "count": position_counts[position]}
             ))
+    return recs
+
 
-    # Rule 3 - No guard passing at all (high)
+def guard_passing_balance(technique_data: Dict) -> List[Dict]:
+    """Rule 3 - No guard passing at all (high), else Rule 4 - guard/passing imbalance (medium)."""
+    position_counts = technique_data["position_counts"]
     guard_positions = [p for p in position_counts if "Guard" in p and "Passing" not in p]
     passing_positions = [p for p in position_counts if "Pass" in p or p in ["Guard Passing"]]
     guard_total = sum(position_counts[p] for p in guard_positions)
     passing_total = sum(position_counts[p] for p in passing_positions)
 
     if guard_total >= 5 and passing_total == 0:
-        recs.append(build_recommendation(
+        return [build_recommendation(
             type_="position",
             priority="high",
             title="Prioritise guard passing",
             message=f"You've logged {guard_total} guard sessions but no guard passing work in the past 90 days.",
             action="Add a guard passing-focused session.",
             data={"guard_sessions": guard_total, "passing_sessions": passing_total}
-        ))
-    elif guard_total > 0 and passing_total > 0 and guard_total / max(passing_total, 1) >= 4:
-        # Rule 4 - Guard/passing imbalance (medium)
-        recs.append(build_recommendation(
+        )]
+    if guard_total > 0 and passing_total > 0 and guard_total / max(passing_total, 1) >= 4:
+        return [build_recommendation(
             type_="position",
             priority="medium",
             title="Address guard passing imbalance",
             message=f"You've trained guard {guard_total} times but only passed {passing_total} times.",
             action="Log a session focused on guard passing to improve balance.",
             data={"guard_sessions": guard_total, "passing_sessions": passing_total}
-        ))
-
-    return recs
+        )]
+    return []
 
 
-def recommend_submissions(technique_data: Dict, total_sessions: int) -> List[Dict]:
-    recs = []
-    skill_counts = technique_data["skill_counts"]
-    position_skills = technique_data["position_skills"]
-    position_counts = technique_data["position_counts"]
+def recommend_positions(technique_data: Dict, active_injuries: List[str], stale_days: int) -> List[Dict]:
+    return (stale_positions(technique_data, stale_days)
+            + narrow_positions(technique_data)
+            + guard_passing_balance(technique_data))
 
-    attack_count = skill_counts.get("Attacks/Submissions", 0)
 
-    # Rule 1 - Low submission frequency (high) — 15+ sessions required
+def low_submission_frequency(technique_data: Dict, total_sessions: int) -> List[Dict]:
+    """Rule 1 - Low submission frequency (high) — 15+ sessions required."""
+    attack_count = technique_data["skill_counts"].get("Attacks/Submissions", 0)
     if total_sessions >= 15 and attack_count / total_sessions < 0.2:
-        recs.append(build_recommendation(
+        return [build_recommendation(
             type_="submission",
             priority="high",
             title="Increase submission focus",
             message=f"Submissions were included in {attack_count} of your last {total_sessions} sessions ({int(attack_count/total_sessions*100)}%).",
             action="Prioritise attacks and submissions in your next session.",
             data={"submission_sessions": attack_count, "total_sessions": total_sessions}
-        ))
+        )]
+    return []
+
 
-    # Rule 2 - No submissions from position (medium) — 6+ sessions required
-    for position, skills in position_skills.items():
+def positions_without_submissions(technique_data: Dict) -> List[Dict]:
+    """Rule 2 - No submissions from position (medium) — 6+ sessions required."""
+    recs = []
+    for position, skills in technique_data["position_skills"].items():
         count = sum(skills.values())
         has_attacks = "Attacks/Submissions" in skills
         if count >= 6 and not has_attacks:
@@ -244,81 +290,98 @@ def recommend_submissions(technique_data: Dict, total_sessions: int) -> List[Dic
                 action="Explore and drill submission options from this position.",
                 data={"position": position, "sessions": count}
             ))
-
     return recs
 
 
-def recommend_intensity(rpe_data: List[Dict], total_sessions: int, active_injuries: List[str]) -> List[Dict]:
-    recs = []
+def recommend_submissions(technique_data: Dict, total_sessions: int) -> List[Dict]:
+    return low_submission_frequency(technique_data, total_sessions) + positions_without_submissions(technique_data)
 
-    if not rpe_data:
-        return recs
 
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    recent_rpe = [r["rpe"] for r in rpe_data if r["date"] >= week_ago]
-    avg_recent = sum(recent_rpe) / len(recent_rpe) if recent_rpe else None
-
-    month_ago = datetime.utcnow() - timedelta(days=30)
-    month_rpe = [r["rpe"] for r in rpe_data if r["date"] >= month_ago]
-    avg_month = sum(month_rpe) / len(month_rpe) if month_rpe else None
-
-    if avg_recent is not None:
-        # Rule 1 - High training intensity
-        if avg_recent > 7.5:
-            priority = "high" if active_injuries else "medium"
-            msg = f"Your average RPE over the past 7 days is {avg_recent:.1f}/9."
-            if active_injuries:
-                msg += f" With an active injury ({', '.join(active_injuries)}), this increases your recovery risk."
-            recs.append(build_recommendation(
-                type_="intensity",
-                priority=priority,
-                title="High training intensity detected",
-                message=msg,
-                action="Schedule a lower-intensity technical or drilling session.",
-                data={"avg_rpe_7d": round(avg_recent, 1), "active_injuries": active_injuries}
-            ))
-        # Rule 2 - Low training intensity
-        elif avg_recent < 4.0 and total_sessions >= 3:
-            recs.append(build_recommendation(
-                type_="intensity",
-                priority="low",
-                title="Low intensity week",
-                message=f"Your average RPE over the past 7 days is {avg_recent:.1f}/9. You may be ready to increase intensity.",
-                action="Consider adding a higher-intensity sparring session.",
-                data={"avg_rpe_7d": round(avg_recent, 1)}
-            ))
+def average_rpe(rpe_data: List[Dict], days: int) -> Optional[float]:
+    """Mean RPE over the last N days, or None without data."""
+    since = datetime.utcnow() - timedelta(days=days)
+    values = [r["rpe"] for r in rpe_data if r["date"] >= since]
+    return sum(values) / len(values) if values else None
+
+
+def high_intensity(rpe_data: List[Dict], active_injuries: List[str]) -> List[Dict]:
+    """Rule 1 - High training intensity (high with an active injury, else medium)."""
+    avg_recent = average_rpe(rpe_data, 7)
+    if avg_recent is None or avg_recent <= 7.5:
+        return []
+    priority = "high" if active_injuries else "medium"
+    msg = f"Your average RPE over the past 7 days is {avg_recent:.1f}/9."
+    if active_injuries:
+        msg += f" With an active injury ({', '.join(active_injuries)}), this increases your recovery risk."
+    return [build_recommendation(
+        type_="intensity",
+        priority=priority,
+        title="High training intensity detected",
+        message=msg,
+        action="Schedule a lower-intensity technical or drilling session.",
+        data={"avg_rpe_7d": round(avg_recent, 1), "active_injuries": active_injuries}
+    )]
+
+
+def low_intensity(rpe_data: List[Dict], total_sessions: int) -> List[Dict]:
+    """Rule 2 - Low training intensity (low)."""
+    avg_recent = average_rpe(rpe_data, 7)
+    if avg_recent is None or not (avg_recent < 4.0 and total_sessions >= 3):
+        return []
+    return [build_recommendation(
+        type_="intensity",
+        priority="low",
+        title="Low intensity week",
+        message=f"Your average RPE over the past 7 days is {avg_recent:.1f}/9. You may be ready to increase intensity.",
+        action="Consider adding a higher-intensity sparring session.",
+        data={"avg_rpe_7d": round(avg_recent, 1)}
+    )]
+
+
+def rising_intensity(rpe_data: List[Dict]) -> List[Dict]:
+    """Rule 3 - Increasing intensity trend (medium)."""
+    if len(rpe_data) < 3:
+        return []
+    last_three = [r["rpe"] for r in rpe_data[-3:]]
+    if not (last_three[0] < last_three[1] < last_three[2] and last_three[2] >= 7):
+        return []
+    return [build_recommendation(
+        type_="intensity",
+        priority="medium",
+        title="Rising intensity trend",
+        message=f"Your last three sessions have increased in intensity ({last_three[0]} → {last_three[1]} → {last_three[2]}).",
+        action="Plan a recovery or technical session to avoid overtraining.",
+        data={"rpe_trend": last_three}
+    )]
+
+
+def injured_high_load(rpe_data: List[Dict], active_injuries: List[str]) -> List[Dict]:
+    """Rule 4 - High load while injured (high)."""
+    if not active_injuries:
+        return []
+    avg_month = average_rpe(rpe_data, 30)
+    if not (avg_month and avg_month > 6.5):
+        return []
+    return [build_recommendation(
+        type_="intensity",
+        priority="high",
+        title="High intensity during injury",
+        message=f"You have active injuries ({', '.join(active_injuries)}) and a monthly average RPE of {avg_month:.1f}/9.",
+        action="Reduce training intensity and protect the affected areas.",
+        data={"avg_rpe_30d": round(avg_month, 1), "active_injuries": active_injuries}
+    )]
 
-    # Rule 3 - Increasing intensity trend
-    if len(rpe_data) >= 3:
-        last_three = [r["rpe"] for r in rpe_data[-3:]]
-        if last_three[0] < last_three[1] < last_three[2] and last_three[2] >= 7:
-            recs.append(build_recommendation(
-                type_="intensity",
-                priority="medium",
-                title="Rising intensity trend",
-                message=f"Your last three sessions have increased in intensity ({last_three[0]} → {last_three[1]} → {last_three[2]}).",
-                action="Plan a recovery or technical session to avoid overtraining.",
-                data={"rpe_trend": last_three}
-            ))
 
-    # Rule 4 - High load while injured
-    if active_injuries and avg_month and avg_month > 6.5:
-        recs.append(build_recommendation(
-            type_="intensity",
-            priority="high",
-            title="High intensity during injury",
-            message=f"You have active injuries ({', '.join(active_injuries)}) and a monthly average RPE of {avg_month:.1f}/9.",
-            action="Reduce training intensity and protect the affected areas.",
-            data={"avg_rpe_30d": round(avg_month, 1), "active_injuries": active_injuries}
-        ))
-
-    return recs
+def recommend_intensity(rpe_data: List[Dict], total_sessions: int, active_injuries: List[str]) -> List[Dict]:
+    return (high_intensity(rpe_data, active_injuries)
+            + low_intensity(rpe_data, total_sessions)
+            + rising_intensity(rpe_data)
+            + injured_high_load(rpe_data, active_injuries))
 
 
-def recommend_goal_adjustment(db: Session, user_id: int, entries: List) -> List[Dict]:
+def recommend_goal_adjustment(goal, entries: List) -> List[Dict]:
     """Suggest adjusting goals when actual training consistently misses or exceeds the target."""
     recs = []
-    goal = db.query(UserGoal).filter(UserGoal.user_id == user_id, UserGoal.is_active == True).first()
     if not goal:
         return recs
 
@@ -362,14 +425,9 @@ def recommend_goal_adjustment(db: Session, user_id: int, entries: List) -> List[
     return recs
 
 
-def recommend_technique_goals(db: Session, user_id: int, technique_data: Dict, entries: List) -> List[Dict]:
+def recommend_technique_goals(goals: List, technique_data: Dict) -> List[Dict]:
     """Generate recommendations based on user's active technique goals vs actual training."""
     recs = []
-    goals = db.query(TechniqueGoal).filter(
-        TechniqueGoal.user_id == user_id,
-        TechniqueGoal.is_active == True
-    ).all()
-
     if not goals:
         return recs
 
@@ -458,6 +516,71 @@ def recommend_technique_goals(db: Session, user_id: int, technique_data: Dict, e
     return recs
 
 
+# --- Rule registry ---
+# Registration order decides ties within a priority, as the category order
+# did before. Each rule declares the best priority it can produce and the
+# check_data_gates() key it needs.
+
+rules = RuleSet()
+
+
+@rules.rule("position", "medium", gate="position")
+def _stale_positions(s: TrainingSnapshot) -> List[Dict]:
+    return stale_positions(s.technique_data, s.stale_days)
+
+
+@rules.rule("position", "low", gate="position")
+def _narrow_positions(s: TrainingSnapshot) -> List[Dict]:
+    return narrow_positions(s.technique_data)
+
+
+@rules.rule("position", "high", gate="position")
+def _guard_passing_balance(s: TrainingSnapshot) -> List[Dict]:
+    return guard_passing_balance(s.technique_data)
+
+
+@rules.rule("submission", "high", gate="submission")
+def _low_submission_frequency(s: TrainingSnapshot) -> List[Dict]:
+    return low_submission_frequency(s.technique_data, s.total_sessions)
+
+
+@rules.rule("submission", "medium", gate="submission")
+def _positions_without_submissions(s: TrainingSnapshot) -> List[Dict]:
+    return positions_without_submissions(s.technique_data)
+
+
+@rules.rule("intensity", "high", gate="intensity")
+def _high_intensity(s: TrainingSnapshot) -> List[Dict]:
+    return high_intensity(s.rpe_data, s.active_injuries)
+
+
+@rules.rule("intensity", "low", gate="intensity")
+def _low_intensity(s: TrainingSnapshot) -> List[Dict]:
+    return low_intensity(s.rpe_data, s.total_sessions)
+
+
+@rules.rule("intensity", "medium", gate="intensity")
+def _rising_intensity(s: TrainingSnapshot) -> List[Dict]:
+    return rising_intensity(s.rpe_data)
+
+
+@rules.rule("intensity", "high", gate="intensity")
+def _injured_high_load(s: TrainingSnapshot) -> List[Dict]:
+    return injured_high_load(s.rpe_data, s.active_injuries)
+
+
+# Goal adjustment (no gate — just needs an active goal + enough history)
+@rules.rule("goal", "medium")
+def _goal_adjustment(s: TrainingSnapshot) -> List[Dict]:
+    return recommend_goal_adjustment(s.goal, s.entries)
+
+
+# Technique goal recommendations (no gate — just needs active technique goals)
+@rules.rule("technique_goal", "high")
+def _technique_goals(s: TrainingSnapshot) -> List[Dict]:
+    return recommend_technique_goals(s.technique_goals, s.technique_data)
+
+
 # --- Main endpoint ---
 
 @router.get("/")
@@ -465,53 +588,34 @@ def get_recommendations(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
-    entries, responses = get_entries_with_responses(db, current_user.id, days=90)
-    active_injuries = get_active_injuries(db, current_user.id)
-    technique_data = extract_technique_data(responses)
-    rpe_data = extract_rpe_values(entries, responses)
-
-    total_sessions = len(entries)
-
-    # Phase 1: Check data gates
-    gates = check_data_gates(total_sessions, technique_data, rpe_data, entries)
-    stale_days = get_stale_window_days(entries)
-
-    all_recs = []
-    if gates["position"]:
-        all_recs += recommend_positions(technique_data, active_injuries, stale_days)
-    if gates["submission"]:
-        all_recs += recommend_submissions(technique_data, total_sessions)
-    if gates["intensity"]:
-        all_recs += recommend_intensity(rpe_data, total_sessions, active_injuries)
-
-    # Goal adjustment (no gate — just needs an active goal + enough history)
-    all_recs += recommend_goal_adjustment(db, current_user.id, entries)
-
-    # Technique goal recommendations (no gate — just needs active technique goals)
-    all_recs += recommend_technique_goals(db, current_user.id, technique_data, entries)
-
-    # Sort by priority: high → medium → low
-    priority_order = {"high": 0, "medium": 1, "low": 2}
-    all_recs.sort(key=lambda r: priority_order.get(r["priority"], 3))
-
-    # Return only the top 1 recommendation per type
-    seen_types = set()
-    filtered_recs = []
-    for rec in all_recs:
-        if rec["type"] not in seen_types:
-            seen_types.add(rec["type"])
-            filtered_recs.append(rec)
+    return cached_for_user(
+        "recommendations", current_user.id, None,
+        lambda: compute_recommendations(db, current_user.id)
+    )
+
+
+def compute_recommendations(db: Session, user_id: int) -> Dict[str, Any]:
+    return recommend(load_training_snapshot(db, user_id, days=90))
+
+
+def recommend(snapshot: TrainingSnapshot) -> Dict[str, Any]:
+    """Evaluate the rules over a snapshot; the top recommendation per type, high priority first."""
+    filtered_recs = rules.evaluate(snapshot, snapshot.gates)
+    total_sessions = snapshot.total_sessions
 
+    logger.info("recommendations computed", extra={"fields": {
+        "entries": total_sessions, "responses": len(snapshot.responses), "recommendations": len(filtered_recs)
+    }})
     return {
         "total": len(filtered_recs),
         "recommendations": filtered_recs,
         "meta": {
             "sessions_analysed": total_sessions,
-            "active_injuries": active_injuries,
-            "positions_tracked": len(technique_data["position_counts"]),
-            "rpe_data_points": len(rpe_data),
+            "active_injuries": snapshot.active_injuries,
+            "positions_tracked": len(snapshot.technique_data["position_counts"]),
+            "rpe_data_points": len(snapshot.rpe_data),
             "low_data": total_sessions < 5,
-            "data_gates": gates,
-            "stale_window_days": stale_days,
+            "data_gates": snapshot.gates,
+            "stale_window_days": snapshot.stale_days,
         }
     }
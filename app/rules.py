@@ -0,0 +1,129 @@
+"""Declarative recommendation rules, evaluated best priority first.
+
+A rule is a function of a context object (the recommendations router passes
+a TrainingSnapshot) returning a list of recommendation dicts of one type. It
+is registered with that type, the best priority it can produce and an
+optional data gate:
+
+    rules = RuleSet()
+
+    @rules.rule("intensity", "high", gate="intensity")
+    def high_intensity(snapshot): ...
+
+Only the top recommendation per type is returned, so evaluate() runs rules
+in priority order and skips a rule once its type already holds a result the
+rule could not beat. The winner is the same as running every rule in
+registration order and keeping the first best-priority result per type.
+
+Each rule's time and outcomes are counted in-process; stats() reports them.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PRIORITIES = ("high", "medium", "low")
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+
+def _rank(priority: str) -> int:
+    return PRIORITY_RANK.get(priority, len(PRIORITIES))
+
+
+class Rule:
+    """One registered rule and its counters."""
+
+    def __init__(self, name: str, type_: str, priority: str, func: Callable[[Any], List[Dict]],
+                 gate: Optional[str], order: int):
+        if priority not in PRIORITY_RANK:
+            raise ValueError(f"Unknown priority {priority!r} for rule {name}")
+        self.name = name
+        self.type = type_
+        self.priority = priority
+        self.func = func
+        self.gate = gate
+        self.order = order
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.runs = 0
+        self.hits = 0
+        self.recommendations = 0
+        self.gated = 0
+        self.skipped = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class RuleSet:
+    """An ordered registry of rules with shared counters."""
+
+    def __init__(self):
+        self.rules: List[Rule] = []
+        self._lock = threading.Lock()
+
+    def rule(self, type_: str, priority: str, gate: Optional[str] = None, name: Optional[str] = None):
+        """Register the decorated function as a rule producing `type_` recommendations up to `priority`."""
+        def register(func):
+            self.rules.append(Rule(name or func.__name__.lstrip("_"), type_, priority, func, gate, len(self.rules)))
+            return func
+        return register
+
+    def evaluate(self, context: Any, gates: Optional[Dict[str, bool]] = None) -> List[Dict]:
+        """The top recommendation per type, best priority first.
+
+        A rule runs only when its gate (if any) is open in `gates` and its
+        type has no result yet that is better than, or as good as and
+        registered before, anything the rule could produce.
+        """
+        gates = gates or {}
+        best: Dict[str, Tuple[Tuple[int, int, int], Dict]] = {}
+        for rule in sorted(self.rules, key=lambda r: (_rank(r.priority), r.order)):
+            if rule.gate is not None and not gates.get(rule.gate):
+                with self._lock:
+                    rule.gated += 1
+                continue
+            current = best.get(rule.type)
+            if current is not None and current[0][:2] < (_rank(rule.priority), rule.order):
+                with self._lock:
+                    rule.skipped += 1
+                continue
+
+            started = time.perf_counter()
+            recs = rule.func(context)
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                rule.runs += 1
+                rule.hits += 1 if recs else 0
+                rule.recommendations += len(recs)
+                rule.total_ms += elapsed
+                rule.max_ms = max(rule.max_ms, elapsed)
+
+            for position, rec in enumerate(recs):
+                key = (_rank(rec["priority"]), rule.order, position)
+                current = best.get(rec["type"])
+                if current is None or key < current[0]:
+                    best[rec["type"]] = (key, rec)
+        return [rec for _, rec in sorted(best.values(), key=lambda item: item[0])]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-rule counters in registration order."""
+        with self._lock:
+            return [{
+                "name": rule.name,
+                "type": rule.type,
+                "priority": rule.priority,
+                "gate": rule.gate,
+                "runs": rule.runs,
+                "hits": rule.hits,
+                "recommendations": rule.recommendations,
+                "gated": rule.gated,
+                "skipped": rule.skipped,
+                "total_ms": round(rule.total_ms, 3),
+                "avg_ms": round(rule.total_ms / rule.runs, 3) if rule.runs else 0.0,
+                "max_ms": round(rule.max_ms, 3),
+            } for rule in self.rules]
+
+    def reset_stats(self):
+        with self._lock:
+            for rule in self.rules:
+                rule.reset_stats()
@@ -58,6 +58,14 @@ class Entry(BaseModel):
     class Config:
         from_attributes = True
 
+class EntryBulkCreate(BaseModel):
+    entries: List[EntryCreate]
+
+class EntryBulkResult(BaseModel):
+    created: int
+    entry_ids: List[int]
+    replayed: bool = False
+
 # Auth schemas
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,295 @@
+"""Weekly progress and incremental streak maintenance.
+
+A week counts towards a streak when its goal was met or it was paused, and a
+streak is a run of such weeks on consecutive Mondays. When one week's status
+changes only the run it belongs to is recounted, and each run keeps a single
+StreakHistory row that is updated in place.
+
+Progress is refreshed by the routers that change entries, goals or pauses,
+so the streak and progress endpoints only ever read. A week nothing has been
+written to has no progress row, and the endpoints return null for it;
+backfill_weekly_progress fills in the weeks the old read-time refresh used to
+create.
+"""
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from app.models import Entry, UserGoal, WeeklyProgress, StreakHistory
+
+WEEK = timedelta(days=7)
+
+
+def get_week_start(target_date: date) -> date:
+    """Get the Monday of the week containing the target date"""
+    days_since_monday = target_date.weekday()
+    return target_date - timedelta(days=days_since_monday)
+
+
+def week_bounds(week_start: date):
+    """Half-open [start, end) datetime range for a week, so Entry.date stays index-friendly"""
+    start = datetime.combine(week_start, time.min)
+    return start, start + WEEK
+
+
+def sessions_in_week_query(db: Session, user_id: int, week_start: date):
+    week_from, week_to = week_bounds(week_start)
+    return db.query(Entry).filter(
+        and_(
+            Entry.user_id == user_id,
+            Entry.date >= week_from,
+            Entry.date < week_to
+        )
+    )
+
+
+def calculate_sessions_in_week(db: Session, user_id: int, week_start: date) -> int:
+    """Count training sessions in a specific week"""
+    return sessions_in_week_query(db, user_id, week_start).count()
+
+
+def update_weekly_progress(db: Session, user_id: int, week_start: date):
+    """Update or create weekly progress record. The caller commits."""
+    # Get current goal
+    current_goal = db.query(UserGoal).filter(
+        and_(UserGoal.user_id == user_id, UserGoal.is_active == True)
+    ).first()
+    
+    if not current_goal:
+        return
+    
+    # Get or create weekly progress
+    progress = _progress_for_week(db, user_id, week_start)
+    
+    is_new = progress is None
+    if is_new:
+        progress = WeeklyProgress(
+            user_id=user_id,
+            week_start_date=week_start,
+            sessions_completed=0,
+            goal_met=False,
+            is_paused=False,
+            streak_count=0
+        )
+        db.add(progress)
+    counted_before = counts_towards_streak(progress)
+    
+    # Update sessions completed
+    progress.sessions_completed = calculate_sessions_in_week(db, user_id, week_start)
+    progress.goal_met = progress.sessions_completed >= current_goal.weekly_sessions_target and not progress.is_paused
+    
+    # Recount the streak only when this week's status changed
+    if is_new or counts_towards_streak(progress) != counted_before:
+        apply_week_change(db, user_id, progress)
+
+
+def refresh_progress_for_dates(db: Session, user_id: int, dates: Iterable):
+    """Write hook for entry changes: refresh every week touched by `dates`.
+
+    Pending entry changes are flushed first so the session counts see them.
+    The caller commits.
+    """
+    db.flush()
+    weeks = {get_week_start(d.date() if isinstance(d, datetime) else d) for d in dates if d}
+    for week_start in sorted(weeks):
+        update_weekly_progress(db, user_id, week_start)
+
+
+def counts_towards_streak(progress: Optional[WeeklyProgress]) -> bool:
+    return bool(progress and (progress.goal_met or progress.is_paused))
+
+
+def _progress_for_week(db: Session, user_id: int, week_start: date) -> Optional[WeeklyProgress]:
+    return db.query(WeeklyProgress).filter(
+        and_(WeeklyProgress.user_id == user_id, WeeklyProgress.week_start_date == week_start)
+    ).first()
+
+
+def _run_start(week_start: date, streak_count: int) -> date:
+    return week_start - WEEK * (streak_count - 1)
+
+
+def apply_week_change(db: Session, user_id: int, progress: WeeklyProgress):
+    """Recount the streak run around `progress` after its goal_met/is_paused changed.
+
+    Touches the previous week, the weeks that continue the run forward and the
+    history rows for those runs. The caller commits.
+    """
+    db.flush()
+    week = progress.week_start_date
+    previous = _progress_for_week(db, user_id, week - WEEK)
+    previous_count = previous.streak_count if counts_towards_streak(previous) else 0
+
+    progress.streak_count = previous_count + 1 if counts_towards_streak(progress) else 0
+
+    # Walk forward through the run that follows this week
+    run_end = progress
+    running = progress.streak_count
+    expected = week + WEEK
+    later = db.query(WeeklyProgress).filter(
+        and_(WeeklyProgress.user_id == user_id, WeeklyProgress.week_start_date > week)
+    ).order_by(WeeklyProgress.week_start_date)
+    for row in later.yield_per(52):
+        if row.week_start_date != expected or not counts_towards_streak(row):
+            break
+        running += 1
+        row.streak_count = running
+        run_end = row
+        expected += WEEK
+
+    # Runs that now exist between the start of the previous run and the end of the walk
+    runs: List[Tuple[date, date, int]] = []
+    range_start = week
+    if counts_towards_streak(progress):
+        range_start = _run_start(week, progress.streak_count)
+        runs.append((range_start, run_end.week_start_date, run_end.streak_count))
+    else:
+        if previous_count:
+            range_start = _run_start(previous.week_start_date, previous_count)
+            runs.append((range_start, previous.week_start_date, previous_count))
+        if run_end is not progress:
+            runs.append((week + WEEK, run_end.week_start_date, run_end.streak_count))
+
+    _sync_history(db, user_id, runs, range_start, run_end.week_start_date)
+
+
+def _sync_history(db: Session, user_id: int, runs: List[Tuple[date, date, int]],
+                  range_start: date, range_end: date):
+    """Make the history rows starting inside [range_start, range_end] match `runs`."""
+    existing = db.query(StreakHistory).filter(
+        and_(
+            StreakHistory.user_id == user_id,
+            StreakHistory.start_date >= range_start,
+            StreakHistory.start_date <= range_end
+        )
+    ).order_by(StreakHistory.start_date, StreakHistory.id).all()
+    by_start = {}
+    for record in existing:
+        by_start.setdefault(record.start_date, []).append(record)
+
+    records = []
+    for start, end_week, length in runs:
+        matches = by_start.pop(start, [])
+        if matches:
+            record = matches.pop(0)
+        else:
+            record = StreakHistory(user_id=user_id, start_date=start)
+            db.add(record)
+        for duplicate in matches:
+            db.delete(duplicate)
+        record.streak_length = length
+        record.end_date = end_week + timedelta(days=6)
+        record.is_current = False
+        records.append((record, end_week))
+    for leftovers in by_start.values():
+        for record in leftovers:
+            db.delete(record)
+    db.flush()
+
+    # The current streak is the run ending at the user's latest tracked week
+    latest_week = db.query(func.max(WeeklyProgress.week_start_date)).filter(
+        WeeklyProgress.user_id == user_id
+    ).scalar()
+    if latest_week is None or latest_week > range_end:
+        return
+    current = next((record for record, end_week in records if end_week == latest_week), None)
+    others = db.query(StreakHistory).filter(
+        and_(StreakHistory.user_id == user_id, StreakHistory.is_current == True)
+    )
+    if current is not None:
+        current.is_current = True
+        current.end_date = None
+        others = others.filter(StreakHistory.id != current.id)
+    others.update({StreakHistory.is_current: False}, synchronize_session=False)
+
+
+def backfill_weekly_progress(db: Session, user_id: Optional[int] = None,
+                             today: Optional[date] = None) -> int:
+    """Create missing WeeklyProgress rows for users with an active goal.
+
+    Covers every week from the goal's start or the user's first entry,
+    whichever is earlier, up to the current week, counting that week's
+    entries against the goal. Existing rows are left alone; run
+    rebuild_streaks afterwards to recount the streaks. The caller commits;
+    returns the number of rows created.
+    """
+    last_week = get_week_start(today or date.today())
+    goals = db.query(UserGoal).filter(UserGoal.is_active == True).order_by(UserGoal.id.desc())
+    if user_id is not None:
+        goals = goals.filter(UserGoal.user_id == user_id)
+
+    created = 0
+    seen = set()
+    for goal in goals.all():
+        if goal.user_id in seen:
+            continue
+        seen.add(goal.user_id)
+        sessions = Counter(
+            get_week_start(entry_date.date())
+            for entry_date, in db.query(Entry.date).filter(Entry.user_id == goal.user_id)
+        )
+        tracked = {week for week, in db.query(WeeklyProgress.week_start_date).filter(
+            WeeklyProgress.user_id == goal.user_id)}
+        week = min([get_week_start(goal.start_date)] + list(sessions))
+        while week <= last_week:
+            if week not in tracked:
+                db.add(WeeklyProgress(
+                    user_id=goal.user_id,
+                    week_start_date=week,
+                    sessions_completed=sessions[week],
+                    goal_met=sessions[week] >= goal.weekly_sessions_target,
+                    is_paused=False,
+                    streak_count=0
+                ))
+                created += 1
+            week += WEEK
+    db.flush()
+    return created
+
+
+def rebuild_streaks(db: Session, user_id: Optional[int] = None) -> int:
+    """Recount every streak from WeeklyProgress and replace the users' StreakHistory.
+
+    apply_week_change trusts the previous week's streak_count and the
+    existing history rows, so data written before incremental maintenance
+    (a history row appended per call, non-Monday start dates, adjacency
+    counts) has to be rebuilt once. Commits per user; returns the number of
+    history rows written.
+    """
+    users = db.query(WeeklyProgress.user_id).distinct()
+    if user_id is not None:
+        users = users.filter(WeeklyProgress.user_id == user_id)
+    user_ids = sorted({uid for uid, in users} | ({user_id} if user_id is not None else set()))
+
+    written = 0
+    for uid in user_ids:
+        rows = db.query(WeeklyProgress).filter(
+            WeeklyProgress.user_id == uid
+        ).order_by(WeeklyProgress.week_start_date, WeeklyProgress.id).all()
+
+        runs: List[Tuple[date, date, int]] = []
+        previous = None
+        for row in rows:
+            if not counts_towards_streak(row):
+                row.streak_count = 0
+            elif (previous is not None and counts_towards_streak(previous)
+                  and row.week_start_date == previous.week_start_date + WEEK):
+                row.streak_count = previous.streak_count + 1
+                runs[-1] = (runs[-1][0], row.week_start_date, row.streak_count)
+            else:
+                row.streak_count = 1
+                runs.append((row.week_start_date, row.week_start_date, 1))
+            previous = row
+
+        db.query(StreakHistory).filter(StreakHistory.user_id == uid).delete(synchronize_session=False)
+        latest_week = rows[-1].week_start_date if rows else None
+        for start, end_week, length in runs:
+            is_current = end_week == latest_week
+            db.add(StreakHistory(
+                user_id=uid, start_date=start, streak_length=length, is_current=is_current,
+                end_date=None if is_current else end_week + timedelta(days=6),
+            ))
+        written += len(runs)
+        db.commit()
+    return written
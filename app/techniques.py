@@ -0,0 +1,68 @@
+"""Technique taxonomy shared by the dashboard, recommendations and entry metrics.
+
+Class Technique answers look like "Position - Skill", where the skill is a
+category picked in the UI ("Sweeps", "Escapes", ...) or, for attacks, the
+submission itself ("Closed Guard - Armbar"). Submissions are recognised by
+SUBMISSION_KEYWORDS, compiled once into a single case-insensitive pattern.
+
+Users repeat the same handful of answers, so parsing and classification are
+memoized per distinct answer string.
+"""
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+SUBMISSIONS_SKILL = "Attacks/Submissions"
+
+SUBMISSION_KEYWORDS = [
+    'Choke', 'Triangle', 'Armbar', 'Kimura', 'Omoplata', 'Americana',
+    'Heel Hook', 'Toe Hold', 'Kneebar', 'Lock', 'Slicer', 'Crusher',
+    'Guillotine', 'D\'Arce', 'Anaconda', 'Bow and Arrow', 'Cross Collar',
+    'Baseball', 'Ezekiel', 'Paper Cutter', 'Loop', 'Peruvian', 'Japanese',
+    'Gogoplata', 'Von Flue', 'Twister', 'Crank', 'Wrist', 'Mata Leão',
+    'Brabo', 'Kata Gatame', 'Monoplata', 'Tarikoplata', 'Mir Lock',
+    'Shoulder Lock', 'Scissor', 'Necktie', 'Buggy', 'Estima', 'Banana Split'
+]
+
+SUBMISSION_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in SUBMISSION_KEYWORDS), re.IGNORECASE)
+
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_technique(answer: str) -> Optional[Tuple[str, str]]:
+    """(position, skill) from a "Position - Skill" answer, or None for free text."""
+    if " - " not in answer:
+        return None
+    parts = answer.split(" - ")
+    return parts[0].strip(), parts[1].strip()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def is_submission(skill: str) -> bool:
+    return SUBMISSION_PATTERN.search(skill) is not None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_technique(answer: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Split a "Position - Technique" answer into (position label, submission or None).
+
+    Submissions are grouped under "<position> - Attacks/Submissions".
+    """
+    parsed = parse_technique(answer)
+    if parsed is None:
+        return None
+    position, skill = parsed
+    if is_submission(skill):
+        return f"{position} - {SUBMISSIONS_SKILL}", skill
+    return f"{position} - {skill}", None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def position_and_skill_type(answer: str) -> Optional[Tuple[str, str]]:
+    """(position, skill category) with any named submission counted as Attacks/Submissions."""
+    parsed = parse_technique(answer)
+    if parsed is None:
+        return None
+    position, skill = parsed
+    return position, SUBMISSIONS_SKILL if is_submission(skill) else skill
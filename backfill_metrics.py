@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Populate entry_metrics for entries written before the table existed.
+
+Usage:
+    python backfill_metrics.py              # all users
+    python backfill_metrics.py --user demo  # one user
+"""
+import argparse
+from app.database import SessionLocal, engine
+from app.models import Base, User
+from app.metrics import backfill_entry_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill typed entry metrics")
+    parser.add_argument("--user", help="Only backfill this username")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user_id = None
+        if args.user:
+            user = db.query(User).filter(User.username == args.user).first()
+            if not user:
+                print(f"User not found: {args.user}")
+                return
+            user_id = user.id
+        processed = backfill_entry_metrics(db, user_id=user_id, batch_size=args.batch_size)
+        print(f"Backfilled metrics for {processed} entries")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
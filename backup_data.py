@@ -1,44 +1,56 @@
 #!/usr/bin/env python3
-import sqlite3
-import json
-from datetime import datetime
+"""Back up every table to gzipped NDJSON with a manifest of row counts and checksums.
+
+Usage:
+    python backup_data.py                  # full backup into backups/<timestamp>_full
+    python backup_data.py --incremental    # only rows changed since the latest backup
+    python backup_data.py --dir /mnt/nightly --batch-size 5000
+
+Restore with restore_data.py.
+"""
+import argparse
 import os
+import sys
+import time
+from datetime import datetime
+from app.database import engine
+from app.backup import BATCH_SIZE, create_backup, latest_backup, load_manifest
+
+
+def backup_database(root="backups", incremental=False, batch_size=BATCH_SIZE):
+    """Write a backup under `root` and return its directory."""
+    previous = None
+    if incremental:
+        base = latest_backup(root)
+        if base is None:
+            print("No previous backup found, taking a full backup")
+        else:
+            previous = load_manifest(base)
+
+    kind = "incremental" if previous else "full"
+    directory = os.path.join(root, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{kind}")
+    started = time.monotonic()
+    manifest = create_backup(engine, directory, previous=previous, batch_size=batch_size)
+
+    for name, record in manifest["tables"].items():
+        print(f"  {name}: {record['rows']} rows")
+    total = sum(record["rows"] for record in manifest["tables"].values())
+    print(f"{kind.capitalize()} backup of {total} rows saved to {directory} "
+          f"in {time.monotonic() - started:.1f}s")
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up the BJJ journal database")
+    parser.add_argument("--dir", default="backups", help="Directory holding the backups")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only export rows changed since the latest backup in --dir")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows fetched per batch")
+    args = parser.parse_args()
+
+    backup_database(args.dir, incremental=args.incremental, batch_size=args.batch_size)
+    return 0
 
-def backup_database():
-    """Export all data to JSON backup file"""
-    conn = sqlite3.connect('data/bjj_journal.db')
-    conn.row_factory = sqlite3.Row
-    
-    backup_data = {
-        'backup_date': datetime.now().isoformat(),
-        'users': [],
-        'entries': [],
-        'responses': []
-    }
-    
-    # Export users
-    cursor = conn.execute('SELECT * FROM users')
-    backup_data['users'] = [dict(row) for row in cursor.fetchall()]
-    
-    # Export entries
-    cursor = conn.execute('SELECT * FROM entries')
-    backup_data['entries'] = [dict(row) for row in cursor.fetchall()]
-    
-    # Export responses
-    cursor = conn.execute('SELECT * FROM responses')
-    backup_data['responses'] = [dict(row) for row in cursor.fetchall()]
-    
-    conn.close()
-    
-    # Save backup
-    os.makedirs('backups', exist_ok=True)
-    filename = f"backups/bjj_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    
-    with open(filename, 'w') as f:
-        json.dump(backup_data, f, indent=2, default=str)
-    
-    print(f"Backup saved to {filename}")
-    return filename
 
 if __name__ == "__main__":
-    backup_database()
\ No newline at end of file
+    sys.exit(main())
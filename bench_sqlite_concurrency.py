@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Compare SQLite read throughput while writes are in flight, rollback journal vs WAL.
+
+Usage:
+    python bench_sqlite_concurrency.py                    # 4 readers, 2 writers, 5s per mode
+    python bench_sqlite_concurrency.py --readers 8 --seconds 10
+
+Each mode runs against a fresh temporary database with the same pragmas as
+app/database.py, except for journal_mode. Writers insert entries with
+responses in small transactions; readers run the weekly-sessions count.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database import SQLITE_PRAGMAS, apply_sqlite_pragmas
+from app.models import Base, Entry, Response, User
+
+
+def run(journal_mode, readers, writers, seconds):
+    directory = tempfile.mkdtemp()
+    engine = apply_sqlite_pragmas(
+        create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                      connect_args={"check_same_thread": False}, pool_size=readers + writers),
+        dict(SQLITE_PRAGMAS, journal_mode=journal_mode),
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        db.add(User(username="bench", hashed_password="x"))
+        db.commit()
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        while time.monotonic() < stop:
+            try:
+                with Session() as db:
+                    entry = Entry(user_id=1, date=datetime.utcnow(), session_type="Gi")
+                    db.add(entry)
+                    db.flush()
+                    db.add_all(Response(entry_id=entry.id, question_id=q, answer="5") for q in range(1, 7))
+                    db.commit()
+                bump("writes")
+            except OperationalError:
+                bump("locked")
+
+    def reader():
+        while time.monotonic() < stop:
+            try:
+                with Session() as db:
+                    db.query(func.count(Entry.id)).filter(Entry.user_id == 1).scalar()
+                bump("reads")
+            except OperationalError:
+                bump("locked")
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite concurrency benchmark")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    for mode in ("DELETE", "WAL"):
+        counts = run(mode, args.readers, args.writers, args.seconds)
+        print(f"{mode:>6}: {counts['reads'] / args.seconds:8.0f} reads/s  "
+              f"{counts['writes'] / args.seconds:6.0f} writes/s  {counts['locked']} locked errors")
+
+
+if __name__ == "__main__":
+    main()
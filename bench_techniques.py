@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Time Class Technique classification: per-keyword scan vs the compiled, memoized classifier.
+
+Usage:
+    python bench_techniques.py                  # 100k answers
+    python bench_techniques.py --answers 500000 --pool 50
+
+Answers are drawn from a few hundred "Position - Skill" strings plus some free
+text, so most repeat the way real journal answers do.
+"""
+import argparse
+import random
+import time
+from app.techniques import SUBMISSION_KEYWORDS, classify_technique
+
+POSITIONS = [
+    "Closed Guard", "Open Guard", "Half Guard", "Butterfly Guard",
+    "De La Riva Guard", "X-Guard", "Spider Guard", "Side Control",
+    "Mount", "Back Control", "North-South", "Knee on Belly",
+]
+SKILLS = ["Sweeps", "Escapes", "Defense", "Setups", "Transitions", "Guard Passing"]
+SUBMISSIONS = ["Armbar", "Triangle Choke", "Kimura", "Heel Hook", "Rear Naked Choke", "Guillotine", "Ezekiel"]
+
+
+def naive_classify(answer):
+    """The dashboard's previous classifier, kept as the baseline."""
+    if " - " not in answer:
+        return None
+    parts = answer.split(" - ")
+    position = parts[0].strip()
+    technique_type = parts[1].strip()
+    if any(keyword.lower() in technique_type.lower() for keyword in SUBMISSION_KEYWORDS):
+        return f"{position} - Attacks/Submissions", technique_type
+    return f"{position} - {technique_type}", None
+
+
+def make_answers(count, pool_size, seed=0):
+    rng = random.Random(seed)
+    pool = [f"{rng.choice(POSITIONS)} - {rng.choice(SKILLS + SUBMISSIONS)}" for _ in range(pool_size)]
+    pool += ["Drilled takedowns", "Open mat"]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def timed(classify, answers):
+    started = time.perf_counter()
+    for answer in answers:
+        classify(answer)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Technique classifier benchmark")
+    parser.add_argument("--answers", type=int, default=100_000)
+    parser.add_argument("--pool", type=int, default=500, help="answer strings to draw from")
+    args = parser.parse_args()
+
+    answers = make_answers(args.answers, args.pool)
+    assert all(naive_classify(a) == classify_technique(a) for a in set(answers))
+    classify_technique.cache_clear()
+
+    naive = timed(naive_classify, answers)
+    compiled = timed(classify_technique, answers)
+    print(f"{args.answers} answers, {len(set(answers))} distinct")
+    print(f"  keyword scan: {naive * 1000:8.1f} ms")
+    print(f"  compiled:     {compiled * 1000:8.1f} ms  ({naive / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Compare daily_training_rollup rows with the raw entries they summarise.
+
+Usage:
+    python check_rollups.py              # report mismatches for all users
+    python check_rollups.py --user demo  # one user
+    python check_rollups.py --fix        # rebuild rollups, then re-check
+
+Exits with status 1 when mismatches remain.
+"""
+import argparse
+import sys
+from app.database import SessionLocal, engine
+from app.models import Base, User
+from app.metrics import backfill_entry_metrics
+from app.rollups import check_rollups, rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check daily training rollups against entries")
+    parser.add_argument("--user", help="Only check this username")
+    parser.add_argument("--fix", action="store_true", help="Rebuild metrics and rollups before checking")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user_id = None
+        if args.user:
+            user = db.query(User).filter(User.username == args.user).first()
+            if not user:
+                print(f"User not found: {args.user}")
+                return 1
+            user_id = user.id
+        if args.fix:
+            backfill_entry_metrics(db, user_id=user_id)
+            days = rebuild_rollups(db, user_id=user_id)
+            print(f"Rebuilt rollups for {days} days")
+
+        mismatches = check_rollups(db, user_id=user_id)
+        for mismatch in mismatches:
+            print(f"user {mismatch['user_id']} {mismatch['day']}: "
+                  f"expected {mismatch['expected']}, stored {mismatch['stored']}")
+        print(f"{len(mismatches)} mismatched days")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Hammer GET /health/db concurrently and report errors, latency and pool usage.
+
+Usage:
+    uvicorn main:app &                     # with the pool settings under test
+    python load_test_db.py                 # 32 workers, 2000 requests
+    python load_test_db.py --url https://... --workers 64 --requests 10000
+
+Exits with status 1 if any request failed.
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _check(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            body = json.loads(resp.read())
+            ok = resp.status == 200 and body.get("status") == "ok"
+    except (urllib.error.URLError, OSError, ValueError):
+        ok, body = False, None
+    return ok, (time.perf_counter() - started) * 1000, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the database connection pool")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the running API")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/") + "/health/db"
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda _: _check(url, args.timeout), range(args.requests)))
+    elapsed = time.monotonic() - started
+
+    latencies = sorted(latency for _, latency, _ in results)
+    errors = sum(1 for ok, _, _ in results if not ok)
+    print(f"{args.requests} requests, {args.workers} workers, {elapsed:.1f}s "
+          f"({args.requests / elapsed:.0f} req/s)")
+    print(f"latency ms: p50 {latencies[len(latencies) // 2]:.1f}, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f}, max {latencies[-1]:.1f}")
+    print(f"errors: {errors}")
+    last = next((body for ok, _, body in reversed(results) if ok), None)
+    if last:
+        print(f"pool: {json.dumps(last['pool'])}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
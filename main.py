@@ -1,13 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy import text
 from app.database import engine, SessionLocal
 from app.models import Base, Question
-from app.routers import auth, entries, questions, analytics, profile, goals, injuries, recommendations
+from app.routers import auth, entries, questions, analytics, profile, goals, injuries, recommendations, debug, export, health
+from app.log import begin_request, configure_logging, count_queries, elapsed_ms, get_logger
 import os
 
+configure_logging()
+count_queries()
+logger = get_logger("main")
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
@@ -21,18 +26,27 @@ def run_migrations():
             "ALTER TABLE technique_goals ADD COLUMN status TEXT DEFAULT 'active'",
             "ALTER TABLE technique_goals ADD COLUMN self_rating INTEGER",
             "ALTER TABLE technique_goals ADD COLUMN completed_at TIMESTAMP",
+            "ALTER TABLE streak_history ADD COLUMN updated_at TIMESTAMP",
+            # Composite indexes for per-user time-range scans
+            "CREATE INDEX IF NOT EXISTS ix_entries_user_id_date ON entries (user_id, date)",
+            "CREATE INDEX IF NOT EXISTS ix_responses_entry_id_question_id ON responses (entry_id, question_id)",
+            "CREATE INDEX IF NOT EXISTS ix_user_goals_user_id_is_active ON user_goals (user_id, is_active)",
+            "CREATE INDEX IF NOT EXISTS ix_technique_goals_user_id_is_active ON technique_goals (user_id, is_active)",
+            "CREATE INDEX IF NOT EXISTS ix_injury_logs_user_id_end_date ON injury_logs (user_id, end_date)",
         ]
         for sql in migrations:
             try:
                 conn.execute(text(sql))
                 conn.commit()
             except Exception as e:
-                print(f"Migration skipped: {e}")
+                # Postgres aborts the transaction on error; reset it for the next statement
+                conn.rollback()
+                logger.debug("migration skipped", extra={"fields": {"sql": sql, "reason": str(e).splitlines()[0]}})
 
 try:
     run_migrations()
 except Exception as e:
-    print(f"Migration error: {e}")
+    logger.exception("migration error")
 
 app = FastAPI(title="BJJ Training Journal", version="1.0.1")
 
@@ -43,8 +57,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "X-Request-ID"],
 )
 
+@app.middleware("http")
+async def log_requests(request: Request, call_next):
+    """One timing line per request, with the request id echoed back as X-Request-ID."""
+    context = begin_request()
+    try:
+        response = await call_next(request)
+    except Exception:
+        logger.exception("request failed", extra={"fields": {
+            "method": request.method, "path": request.url.path, "duration_ms": elapsed_ms(context)
+        }})
+        raise
+    logger.info("request", extra={"fields": {
+        "method": request.method,
+        "path": request.url.path,
+        "status": response.status_code,
+        "duration_ms": elapsed_ms(context),
+        "queries": context["queries"],
+    }})
+    response.headers["X-Request-ID"] = context["request_id"]
+    return response
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(entries.router)
@@ -54,6 +90,9 @@ app.include_router(profile.router)
 app.include_router(goals.router)
 app.include_router(injuries.router)
 app.include_router(recommendations.router)
+app.include_router(export.router)
+app.include_router(health.router)
+app.include_router(debug.router)
 
 @app.get("/MatTiime.logo.png")
 def serve_logo():
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Backfill weekly progress, then recount weekly streaks and rebuild streak history.
+
+Run once after upgrading from versions that wrote weekly progress and appended
+a streak_history row on every read: weeks that were only ever read have no
+progress row until this fills them in. Safe to re-run at any time.
+
+Usage:
+    python rebuild_streaks.py              # all users
+    python rebuild_streaks.py --user demo  # one user
+"""
+import argparse
+import sys
+from app.database import SessionLocal, engine
+from app.models import Base, User
+from app.streaks import backfill_weekly_progress, rebuild_streaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill weekly progress and rebuild streak counts and history")
+    parser.add_argument("--user", help="Only rebuild this username")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user_id = None
+        if args.user:
+            user = db.query(User).filter(User.username == args.user).first()
+            if not user:
+                print(f"User not found: {args.user}")
+                return 1
+            user_id = user.id
+        weeks = backfill_weekly_progress(db, user_id=user_id)
+        runs = rebuild_streaks(db, user_id=user_id)
+        db.commit()
+        print(f"Backfilled {weeks} weeks of progress, rebuilt {runs} streak history rows")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Restore a backup written by backup_data.py.
+
+Usage:
+    python restore_data.py                              # latest backup in backups/
+    python restore_data.py backups/20260301_020000_incremental
+    python restore_data.py --verify-only backups/...    # only check checksums
+
+An incremental backup is restored on top of the full backup it builds on.
+Rows are upserted by id and rows the backup no longer holds are deleted, so
+restoring into a non-empty database leaves it matching the backup.
+"""
+import argparse
+import sys
+import time
+from app.database import engine
+from app.models import Base
+from app.backup import BATCH_SIZE, BackupError, backup_chain, latest_backup, restore_backup, verify_backup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore the BJJ journal database from a backup")
+    parser.add_argument("backup", nargs="?", help="Backup directory (default: latest in --dir)")
+    parser.add_argument("--dir", default="backups", help="Directory holding the backups")
+    parser.add_argument("--verify-only", action="store_true", help="Check checksums without restoring")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows written per batch")
+    args = parser.parse_args()
+
+    directory = args.backup or latest_backup(args.dir)
+    if directory is None:
+        print(f"No backups found in {args.dir}")
+        return 1
+
+    try:
+        chain = backup_chain(directory)
+        if args.verify_only:
+            problems = [f"{step}: {problem}" for step in chain for problem in verify_backup(step)]
+            for problem in problems:
+                print(problem)
+            print(f"{len(chain)} backups checked, {len(problems)} problems")
+            return 1 if problems else 0
+
+        Base.metadata.create_all(bind=engine)
+        started = time.monotonic()
+        applied = restore_backup(engine, directory, batch_size=args.batch_size)
+    except BackupError as e:
+        print(f"Restore failed: {e}")
+        return 1
+
+    for name, rows in applied.items():
+        print(f"  {name}: {rows} rows")
+    print(f"Restored {' -> '.join(chain)} in {time.monotonic() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
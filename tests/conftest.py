@@ -1,22 +1,36 @@
-"""Shared test fixtures — in-memory SQLite DB + FastAPI test client."""
+"""Shared test fixtures — temporary SQLite DB + FastAPI test client."""
+import os
+import tempfile
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from fastapi.testclient import TestClient
 
-from app.database import Base, get_db
+from app import auth_cache
+from app.cache import get_cache
+from app.database import SQLITE_PRAGMAS, Base, apply_sqlite_pragmas, get_async_db, get_db
 from app.models import Question
 from main import app
 
 
-# In-memory SQLite for tests — StaticPool ensures all connections share the same DB
+# A file rather than :memory: so the sync and async engines see the same database
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bjj-tests-"), "test.db")
 engine = create_engine(
-    "sqlite://",
+    f"sqlite:///{TEST_DB_PATH}",
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TEST_PRAGMAS = dict(SQLITE_PRAGMAS, synchronous="OFF")  # nothing to lose if the test run crashes
+apply_sqlite_pragmas(engine, TEST_PRAGMAS)
+
+# NullPool: each TestClient request runs on its own event loop, so connections are not reused
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+apply_sqlite_pragmas(async_engine.sync_engine, TEST_PRAGMAS)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
 
 def override_get_db():
@@ -27,12 +41,20 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 
 @pytest.fixture(autouse=True)
 def setup_db():
     """Create all tables before each test, drop after."""
+    get_cache().clear()  # user ids are reused once the tables are recreated
+    auth_cache.clear()
     Base.metadata.create_all(bind=engine)
     # Seed default questions
     db = TestingSessionLocal()
@@ -73,3 +95,37 @@ def second_user_headers(client):
     resp = client.post("/auth/login", json={"username": "otheruser", "password": "otherpass"})
     token = resp.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+class QueryCounter:
+    """Records SQL statements sent to the test engines (sync and async) inside a `with` block."""
+
+    def __init__(self):
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        for target in (engine, async_engine.sync_engine):
+            event.remove(target, "before_cursor_execute", self._record)
+
+    @property
+    def selects(self):
+        return [s for s in self.statements if s.lstrip().upper().startswith("SELECT")]
+
+    @property
+    def writes(self):
+        return [s for s in self.statements
+                if s.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))]
+
+
+@pytest.fixture
+def query_counter():
+    return QueryCounter()
@@ -58,3 +58,55 @@ class TestDashboard:
         client.post("/entries/", json=_entry_payload(), headers=auth_headers)
         resp = client.get("/analytics/dashboard", headers=second_user_headers)
         assert resp.json()["total_sessions"] == 0
+
+    def test_dashboard_per_entry_charts(self, client, auth_headers):
+        client.post("/entries/", json=_entry_payload("Gi", "6", "5"), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload("No Gi", "8", "3"), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload("Gi", "4", "n/a"), headers=auth_headers)
+        data = client.get("/analytics/dashboard?period=all", headers=auth_headers).json()
+        assert data["rounds_by_session_type"] == {"Gi": 5, "No Gi": 3}
+        assert data["rpe_rounds_correlation"] == [{"rpe": 6, "rounds": 5}, {"rpe": 8, "rounds": 3}]
+        assert [p["rpe"] for p in data["rpe_trend"]] == [6, 8, 4]
+        assert data["rpe_distribution"] == {"6": 1, "8": 1, "4": 1}
+
+    def test_dashboard_techniques(self, client, auth_headers):
+        client.post("/entries/", json=_entry_payload(technique="Mount - Escapes"), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload(technique="Closed Guard - Armbar"), headers=auth_headers)
+        data = client.get("/analytics/dashboard", headers=auth_headers).json()
+        assert data["submissions"] == {"Armbar": 1}
+        assert data["positions"] == {"Mount - Escapes": 1, "Closed Guard - Attacks/Submissions": 1}
+
+
+class TestSqlDashboardEngine:
+    def test_sql_engine_matches_python_engine(self, client, auth_headers, monkeypatch):
+        client.post("/entries/", json=_entry_payload("Gi", "6", "5", "Closed Guard - Armbar"), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload("No Gi", "8", "3"), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload("Gi", "4", "n/a", "Half Guard - Sweeps"), headers=auth_headers)
+        for period in ["7d", "30d", "this_month", "6m", "1y", "all"]:
+            expected = client.get(f"/analytics/dashboard?period={period}", headers=auth_headers).json()
+            monkeypatch.setenv("DASHBOARD_ENGINE", "sql")
+            actual = client.get(f"/analytics/dashboard?period={period}", headers=auth_headers).json()
+            monkeypatch.delenv("DASHBOARD_ENGINE")
+            assert actual == expected
+
+    def test_sql_engine_empty(self, client, auth_headers, monkeypatch):
+        monkeypatch.setenv("DASHBOARD_ENGINE", "sql")
+        resp = client.get("/analytics/dashboard", headers=auth_headers)
+        assert resp.json()["total_sessions"] == 0
+        assert resp.json()["avg_rpe"] == 0
+
+
+class TestRollupDashboardEngine:
+    def test_rollup_volume_counts_todays_sessions(self, client, auth_headers, monkeypatch):
+        client.post("/entries/", json=_entry_payload("Gi", "6", "5"), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload("No Gi", "8", "3"), headers=auth_headers)
+        monkeypatch.setenv("DASHBOARD_ENGINE", "sql")
+        expected = client.get("/analytics/dashboard?period=6m", headers=auth_headers).json()
+        monkeypatch.setenv("DASHBOARD_ENGINE", "rollup")
+        actual = client.get("/analytics/dashboard?period=6m", headers=auth_headers).json()
+        assert actual == expected
+        for period in ["7d", "30d"]:
+            data = client.get(f"/analytics/dashboard?period={period}", headers=auth_headers).json()
+            assert data["weekly_volume"][-1]["sessions"] == 2
+            assert data["weekly_volume"][-1]["rounds"] == 8
+            assert data["this_month"] == 2
@@ -0,0 +1,89 @@
+"""Tests for the async read routes (entries, analytics, goals) and async authentication."""
+import asyncio
+import inspect
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.dependencies import get_current_user_async
+from app.routers import analytics, entries, goals
+from main import app
+from tests.conftest import engine
+
+ASYNC_HANDLERS = [
+    entries.get_entries,
+    entries.get_entry_summaries,
+    entries.get_entry,
+    analytics.get_dashboard_stats,
+    goals.get_current_goal,
+    goals.get_goal_history,
+    goals.get_current_week_progress,
+    goals.get_weekly_progress,
+    goals.get_current_streak,
+    goals.get_longest_streaks,
+    get_current_user_async,
+]
+
+
+def _entry_payload():
+    return {
+        "date": datetime.utcnow().isoformat(),
+        "session_type": "Gi",
+        "responses": [{"question_id": 2, "answer": "6"}, {"question_id": 5, "answer": "4"}],
+    }
+
+
+@pytest.fixture
+def sync_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+class TestAsyncRoutes:
+    @pytest.mark.parametrize("handler", ASYNC_HANDLERS, ids=lambda h: h.__name__)
+    def test_handler_is_async(self, handler):
+        assert inspect.iscoroutinefunction(handler)
+
+    def test_async_reads_use_async_engine_only(self, client, auth_headers, sync_statements):
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        client.post("/goals/", json={"weekly_sessions_target": 3, "start_date": datetime.utcnow().date().isoformat()},
+                    headers=auth_headers)
+        sync_statements.clear()
+        for path in ("/entries/", "/entries/1", "/analytics/dashboard", "/goals/current", "/goals/streaks/current"):
+            assert client.get(path, headers=auth_headers).status_code == 200
+        assert sync_statements == []
+
+    def test_streak_reads(self, client, auth_headers):
+        client.post("/goals/", json={"weekly_sessions_target": 3, "start_date": datetime.utcnow().date().isoformat()},
+                    headers=auth_headers)
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        streak = client.get("/goals/streaks/current", headers=auth_headers).json()
+        assert streak["current_week_progress"] == 1
+        assert streak["current_week_goal"] == 3
+        assert streak["current_week_rounds"] == 4
+
+    def test_bad_token_rejected(self, client):
+        resp = client.get("/entries/", headers={"Authorization": "Bearer not-a-token"})
+        assert resp.status_code == 401
+
+    def test_concurrent_requests_on_one_loop(self, client, auth_headers):
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+
+        async def burst():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await asyncio.gather(*[
+                    ac.get(path, headers=auth_headers)
+                    for path in ["/entries/", "/analytics/dashboard", "/goals/streaks/current"] * 10
+                ])
+
+        responses = asyncio.run(burst())
+        assert [r.status_code for r in responses] == [200] * 30
@@ -1,4 +1,6 @@
 """Tests for authentication endpoints."""
+from app.models import User
+from tests.conftest import TestingSessionLocal
 
 
 class TestRegister:
@@ -54,3 +56,58 @@ class TestChangePassword:
             "old_password": "a", "new_password": "b"
         })
         assert resp.status_code == 401
+
+
+class TestTokenCache:
+    def _goal_reads(self, client, headers, query_counter, count=5):
+        client.get("/goals/current", headers=headers)  # warm up
+        with query_counter:
+            for _ in range(count):
+                assert client.get("/goals/current", headers=headers).status_code == 200
+        return len(query_counter.selects)
+
+    def test_cached_token_skips_user_lookup(self, client, auth_headers, query_counter):
+        assert self._goal_reads(client, auth_headers, query_counter) == 5
+
+    def test_cache_disabled_with_zero_ttl(self, client, auth_headers, query_counter, monkeypatch):
+        monkeypatch.setenv("AUTH_CACHE_TTL", "0")
+        assert self._goal_reads(client, auth_headers, query_counter) == 10
+
+    def test_password_change_invalidates(self, client, auth_headers):
+        client.get("/goals/current", headers=auth_headers)
+        assert client.put("/auth/change-password", json={
+            "old_password": "testpass", "new_password": "second"
+        }, headers=auth_headers).status_code == 200
+        # A stale cached hash would still accept the old password here
+        assert client.put("/auth/change-password", json={
+            "old_password": "testpass", "new_password": "third"
+        }, headers=auth_headers).status_code == 400
+        assert client.put("/auth/change-password", json={
+            "old_password": "second", "new_password": "third"
+        }, headers=auth_headers).status_code == 200
+
+    def test_deleted_user_rejected(self, client, auth_headers):
+        assert client.get("/entries/", headers=auth_headers).status_code == 200
+        db = TestingSessionLocal()
+        db.delete(db.query(User).filter(User.username == "testuser").one())
+        db.commit()
+        db.close()
+        assert client.get("/entries/", headers=auth_headers).status_code == 401
+        assert client.get("/goals/techniques", headers=auth_headers).status_code == 401
+
+    def test_change_committed_during_lookup_is_not_cached(self, client, auth_headers, monkeypatch):
+        from app import auth_cache
+        original = auth_cache.remember
+
+        def change_password_first(token, user, expires_at, loaded_generation):
+            # Another request commits a password change after this one loaded the user
+            db = TestingSessionLocal()
+            db.query(User).filter(User.username == "testuser").one().hashed_password = "changed"
+            db.commit()
+            db.close()
+            original(token, user, expires_at, loaded_generation)
+
+        monkeypatch.setattr(auth_cache, "remember", change_password_first)
+        assert client.get("/goals/current", headers=auth_headers).status_code == 200
+        token = auth_headers["Authorization"].split()[1]
+        assert auth_cache.lookup(token) is None
@@ -0,0 +1,161 @@
+"""Tests for streaming full/incremental backups and restore."""
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+import app.backup
+from app.backup import BackupError, backup_chain, create_backup, restore_backup, table_counts, verify_backup
+from app.database import Base
+from app.models import Entry, Response, UserGoal
+from tests.conftest import TEST_DB_PATH, TestingSessionLocal, engine
+
+
+def _entry_payload(day, notes="Hip escapes"):
+    return {
+        "date": f"2026-03-{day:02d}T18:00:00",
+        "session_type": "Gi",
+        "responses": [
+            {"question_id": 2, "answer": "6"},
+            {"question_id": 6, "answer": notes},
+        ]
+    }
+
+
+def _seed(client, headers):
+    client.post("/entries/", json=_entry_payload(2), headers=headers)
+    client.post("/entries/", json=_entry_payload(4), headers=headers)
+    client.post("/injuries/", json={"injured_area": "Knee", "injury_date": "2026-03-01", "cause": "Takedown"},
+                headers=headers)
+    client.post("/goals/", json={"weekly_sessions_target": 3, "start_date": "2026-03-02"}, headers=headers)
+
+
+def _age_entries():
+    """Push existing entry timestamps into the past so the next backup's watermark is well behind now."""
+    db = TestingSessionLocal()
+    for entry_id, in db.query(Entry.id).all():
+        db.query(Entry).filter(Entry.id == entry_id).update(
+            {"created_at": datetime(2020, 1, entry_id), "updated_at": None})
+    db.commit()
+    db.close()
+
+
+def _rows(directory, table):
+    with gzip.open(os.path.join(directory, f"{table}.ndjson.gz"), "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def target():
+    target_engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=target_engine)
+    yield target_engine
+    target_engine.dispose()
+
+
+class TestBackup:
+    def test_full_backup_covers_every_table(self, client, auth_headers, tmp_path):
+        _seed(client, auth_headers)
+        manifest = create_backup(engine, str(tmp_path / "full"), batch_size=1)
+        assert manifest["kind"] == "full"
+        assert set(manifest["tables"]) == {table.name for table in Base.metadata.sorted_tables}
+        for name, count in table_counts(engine).items():
+            assert manifest["tables"][name]["rows"] == count
+        assert len(_rows(str(tmp_path / "full"), "responses")) == 4
+        assert verify_backup(str(tmp_path / "full")) == []
+
+    def test_restore_round_trip(self, client, auth_headers, tmp_path, target):
+        _seed(client, auth_headers)
+        create_backup(engine, str(tmp_path / "full"))
+        applied = restore_backup(target, str(tmp_path / "full"), batch_size=2)
+        assert applied == table_counts(engine)
+        assert table_counts(target) == table_counts(engine)
+
+    def test_incremental_only_exports_changes(self, client, auth_headers, tmp_path, target):
+        _seed(client, auth_headers)
+        _age_entries()
+        full = create_backup(engine, str(tmp_path / "1_full"))
+        client.post("/entries/", json=_entry_payload(6, "Armbar from mount"), headers=auth_headers)
+
+        incremental = create_backup(engine, str(tmp_path / "2_incremental"), previous=full)
+        assert incremental["kind"] == "incremental"
+        assert incremental["base"] == "1_full"
+        entries = _rows(str(tmp_path / "2_incremental"), "entries")
+        # Entry 2 is within WATERMARK_MARGIN of the watermark, so it is exported again
+        assert [entry["id"] for entry in entries] == [2, 3]
+        assert [r["answer"] for r in _rows(str(tmp_path / "2_incremental"), "responses")] == ["6", "Armbar from mount"]
+        # Tables without updated_at can change in place unnoticed, so they are exported in full
+        counts = table_counts(engine)
+        assert incremental["tables"]["questions"]["rows"] == counts["questions"]
+        assert incremental["tables"]["user_goals"]["rows"] == counts["user_goals"]
+
+        assert backup_chain(str(tmp_path / "2_incremental")) == [str(tmp_path / "1_full"),
+                                                                  str(tmp_path / "2_incremental")]
+        restore_backup(target, str(tmp_path / "2_incremental"))
+        assert table_counts(target) == table_counts(engine)
+
+    def test_backup_reads_one_snapshot(self, client, auth_headers, tmp_path, monkeypatch):
+        _seed(client, auth_headers)
+        before = table_counts(engine)
+        writer = create_engine(f"sqlite:///{TEST_DB_PATH}")
+        export_ids = app.backup._export_ids
+
+        def write_during_backup(conn, table, path, batch_size):
+            if table.name == "users":
+                # Another connection commits an entry and its responses mid-backup
+                with writer.begin() as other:
+                    other.execute(Entry.__table__.insert().values(id=50, user_id=1, date=datetime(2026, 3, 8),
+                                                                    session_type="Gi"))
+                    other.execute(Response.__table__.insert().values(entry_id=50, question_id=2, answer="7"))
+            return export_ids(conn, table, path, batch_size)
+
+        monkeypatch.setattr(app.backup, "_export_ids", write_during_backup)
+        manifest = create_backup(engine, str(tmp_path / "full"))
+        writer.dispose()
+        for name in ("entries", "responses"):
+            assert manifest["tables"][name]["rows"] == manifest["tables"][name]["ids"]["rows"] == before[name]
+        assert table_counts(engine)["entries"] == before["entries"] + 1
+
+    def test_restore_chain_replays_edits_and_deletions(self, client, auth_headers, tmp_path, target):
+        _seed(client, auth_headers)
+        _age_entries()
+        full = create_backup(engine, str(tmp_path / "1_full"))
+
+        # Editing an entry replaces its responses; a new goal deactivates the old one in place
+        client.put("/entries/1", json=_entry_payload(2, "Knee shield"), headers=auth_headers)
+        client.post("/goals/", json={"weekly_sessions_target": 4, "start_date": "2026-03-09"}, headers=auth_headers)
+        client.delete("/entries/2", headers=auth_headers)
+        create_backup(engine, str(tmp_path / "2_incremental"), previous=full)
+
+        restore_backup(target, str(tmp_path / "2_incremental"))
+        assert table_counts(target) == table_counts(engine)
+        with target.connect() as conn:
+            answers = sorted(conn.execute(Response.__table__.select()).mappings(), key=lambda r: r["id"])
+            goals = list(conn.execute(UserGoal.__table__.select()).mappings())
+        assert [(r["entry_id"], r["answer"]) for r in answers] == [(1, "6"), (1, "Knee shield")]
+        assert sorted((g["weekly_sessions_target"], g["is_active"]) for g in goals) == [(3, False), (4, True)]
+
+    def test_restore_rejects_corrupt_backup(self, client, auth_headers, tmp_path, target):
+        _seed(client, auth_headers)
+        create_backup(engine, str(tmp_path / "full"))
+        with gzip.open(str(tmp_path / "full" / "entries.ndjson.gz"), "at") as f:
+            f.write('{"id": 99}\n')
+        assert verify_backup(str(tmp_path / "full")) == ["entries: checksum mismatch"]
+        with pytest.raises(BackupError):
+            restore_backup(target, str(tmp_path / "full"))
+        assert table_counts(target)["entries"] == 0
+
+    def test_restore_rejects_corrupt_id_list(self, client, auth_headers, tmp_path, target):
+        _seed(client, auth_headers)
+        create_backup(engine, str(tmp_path / "full"))
+        with gzip.open(str(tmp_path / "full" / "entries.ids.gz"), "at") as f:
+            f.write("99\n")
+        assert verify_backup(str(tmp_path / "full")) == ["entries: ids checksum mismatch"]
+
+    def test_incomplete_backup_has_no_manifest(self, tmp_path):
+        os.makedirs(str(tmp_path / "partial"))
+        with pytest.raises(BackupError):
+            backup_chain(str(tmp_path / "partial"))
@@ -0,0 +1,96 @@
+"""Tests for the per-user analytics cache."""
+from datetime import date, datetime
+
+import pytest
+
+from app.cache import CacheBackend, MemoryCache, cache_key, get_cache
+
+
+def _entry_payload(rpe="6"):
+    return {
+        "date": datetime.utcnow().isoformat(),
+        "session_type": "Gi",
+        "responses": [
+            {"question_id": 1, "answer": "Gi"},
+            {"question_id": 2, "answer": rpe},
+            {"question_id": 5, "answer": "4"},
+        ]
+    }
+
+
+class TestMemoryCache:
+    def test_evicts_least_recently_used(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_expired_entries_are_misses(self):
+        cache = MemoryCache()
+        cache.set("a", 1, ttl=0)
+        assert cache.get("a") is None
+
+    def test_delete_prefix_only_touches_that_user(self):
+        cache = MemoryCache()
+        cache.set(cache_key("dashboard", 1, {"period": "7d"}), "one", ttl=60)
+        cache.set(cache_key("dashboard", 11, {"period": "7d"}), "eleven", ttl=60)
+        cache.delete_prefix("analytics:1:")
+        assert cache.get(cache_key("dashboard", 1, {"period": "7d"})) is None
+        assert cache.get(cache_key("dashboard", 11, {"period": "7d"})) == "eleven"
+
+    def test_incomplete_backend_fails_on_instantiation(self):
+        class GetOnly(CacheBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnly()
+
+
+class TestAnalyticsCaching:
+    def test_repeat_dashboard_request_skips_recompute(self, client, auth_headers, query_counter):
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        first = client.get("/analytics/dashboard?period=30d", headers=auth_headers)
+        with query_counter:
+            second = client.get("/analytics/dashboard?period=30d", headers=auth_headers)
+        assert second.json() == first.json()
+        # The user comes from the token cache, so nothing reaches the database
+        assert query_counter.statements == []
+
+    def test_periods_are_cached_separately(self, client, auth_headers):
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        client.get("/analytics/dashboard?period=7d", headers=auth_headers)
+        client.get("/analytics/dashboard?period=all", headers=auth_headers)
+        keys = [cache_key("dashboard", 1, {"period": p, "engine": "python"}) for p in ("7d", "all")]
+        assert all(get_cache().get(k) is not None for k in keys)
+
+    def test_entry_write_invalidates_dashboard(self, client, auth_headers):
+        client.post("/entries/", json=_entry_payload("6"), headers=auth_headers)
+        assert client.get("/analytics/dashboard", headers=auth_headers).json()["total_sessions"] == 1
+        entry_id = client.post("/entries/", json=_entry_payload("8"), headers=auth_headers).json()["id"]
+        data = client.get("/analytics/dashboard", headers=auth_headers).json()
+        assert data["total_sessions"] == 2
+        assert data["avg_rpe"] == 7.0
+        client.delete(f"/entries/{entry_id}", headers=auth_headers)
+        assert client.get("/analytics/dashboard", headers=auth_headers).json()["total_sessions"] == 1
+
+    def test_injury_write_invalidates_recommendations(self, client, auth_headers):
+        before = client.get("/recommendations/", headers=auth_headers).json()
+        assert before["meta"]["active_injuries"] == []
+        resp = client.post("/injuries/", json={
+            "injured_area": "Knee",
+            "injury_date": date.today().isoformat(),
+            "cause": "Takedown",
+        }, headers=auth_headers)
+        assert resp.status_code == 200
+        after = client.get("/recommendations/", headers=auth_headers).json()
+        assert after["meta"]["active_injuries"] == ["knee"]
+
+    def test_writes_do_not_invalidate_other_users(self, client, auth_headers, second_user_headers):
+        client.get("/analytics/dashboard", headers=second_user_headers)
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        assert get_cache().get(cache_key("dashboard", 2, {"period": "30d", "engine": "python"})) is not None
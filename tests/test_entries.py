@@ -1,5 +1,17 @@
 """Tests for entry CRUD endpoints."""
-from datetime import datetime
+from datetime import date, datetime, timedelta
+
+from app.metrics import backfill_entry_metrics
+from app.models import DailyTrainingRollup, EntryMetrics, Question
+from app.rollups import day_ranges, check_rollups, rebuild_rollups
+from tests.conftest import TestingSessionLocal
+
+
+def _client_entry_payload(session_type="Gi"):
+    """An entry as frontend.html and mobile.html send it: the session type only in its answer."""
+    payload = _make_entry_payload(session_type)
+    payload["session_type"] = "training"
+    return payload
 
 
 def _make_entry_payload(session_type="Gi"):
@@ -7,7 +19,7 @@ def _make_entry_payload(session_type="Gi"):
         "date": datetime.utcnow().isoformat(),
         "session_type": session_type,
         "responses": [
-            {"question_id": 1, "answer": "Gi"},
+            {"question_id": 1, "answer": session_type},
             {"question_id": 2, "answer": "7"},
             {"question_id": 5, "answer": "5"},
         ]
@@ -97,3 +109,293 @@ class TestDeleteEntry:
         entry_id = create_resp.json()["id"]
         resp = client.delete(f"/entries/{entry_id}", headers=second_user_headers)
         assert resp.status_code == 404
+
+
+class TestEntryListingQueries:
+    def test_listing_select_count_is_constant(self, client, auth_headers, query_counter):
+        for _ in range(5):
+            client.post("/entries/", json=_make_entry_payload(), headers=auth_headers)
+        with query_counter:
+            resp = client.get("/entries/", headers=auth_headers)
+        assert len(resp.json()) == 5
+        assert all(r["question"]["question_text"] for e in resp.json() for r in e["responses"])
+        # entries, responses, questions (the user comes from the token cache)
+        assert len(query_counter.selects) == 3
+
+
+class TestEntryPagination:
+    def _seed(self, client, auth_headers):
+        base = datetime(2026, 3, 10, 18, 0)
+        ids = []
+        for days_ago, session_type in [(0, "Gi"), (1, "No Gi"), (1, "Gi"), (3, "Gi"), (7, "No Gi")]:
+            payload = _make_entry_payload(session_type)
+            payload["date"] = (base - timedelta(days=days_ago)).isoformat()
+            ids.append(client.post("/entries/", json=payload, headers=auth_headers).json()["id"])
+        # Newest first; same-day entries by id descending
+        return [ids[0], ids[2], ids[1], ids[3], ids[4]]
+
+    def test_unpaginated_returns_everything_without_cursor(self, client, auth_headers):
+        expected = self._seed(client, auth_headers)
+        resp = client.get("/entries/", headers=auth_headers)
+        assert [e["id"] for e in resp.json()] == expected
+        assert "X-Next-Cursor" not in resp.headers
+
+    def test_pages_walk_backwards_and_forwards(self, client, auth_headers):
+        expected = self._seed(client, auth_headers)
+        seen, cursor, pages = [], None, []
+        while True:
+            url = "/entries/?limit=2" + (f"&before={cursor}" if cursor else "")
+            resp = client.get(url, headers=auth_headers)
+            pages.append(resp)
+            seen += [e["id"] for e in resp.json()]
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == expected
+        assert len(pages) == 3
+        assert "X-Prev-Cursor" not in pages[0].headers
+
+        back = client.get(f"/entries/?limit=2&after={pages[2].headers['X-Prev-Cursor']}", headers=auth_headers)
+        assert [e["id"] for e in back.json()] == expected[2:4]
+
+    def test_date_range_and_session_type_filters(self, client, auth_headers):
+        expected = self._seed(client, auth_headers)
+        resp = client.get("/entries/?date_from=2026-03-07&date_to=2026-03-09", headers=auth_headers)
+        assert [e["id"] for e in resp.json()] == expected[1:4]
+        resp = client.get("/entries/?session_type=No Gi", headers=auth_headers)
+        assert [e["id"] for e in resp.json()] == [expected[2], expected[4]]
+
+    def test_session_type_filter_matches_client_entries(self, client, auth_headers):
+        gi = client.post("/entries/", json=_client_entry_payload("Gi"), headers=auth_headers).json()["id"]
+        no_gi = client.post("/entries/", json=_client_entry_payload("No Gi"), headers=auth_headers).json()["id"]
+        resp = client.get("/entries/?session_type=No Gi", headers=auth_headers)
+        assert [e["id"] for e in resp.json()] == [no_gi]
+        resp = client.get("/entries/?session_type=Gi&limit=5", headers=auth_headers)
+        assert [e["id"] for e in resp.json()] == [gi]
+        summary = client.get("/entries/summary?session_type=No Gi", headers=auth_headers).json()
+        assert [row[0] for row in summary["rows"]] == [no_gi]
+
+    def test_bad_cursor_arguments(self, client, auth_headers):
+        assert client.get("/entries/?before=not-a-cursor", headers=auth_headers).status_code == 400
+        resp = client.get("/entries/?limit=1", headers=auth_headers)
+        assert resp.json() == []
+        assert client.get("/entries/?limit=0", headers=auth_headers).status_code == 422
+
+
+class TestEntrySummary:
+    def _add_summary_question(self):
+        db = TestingSessionLocal()
+        db.add(Question(id=7, question_text="Summarise this session with a few words",
+                        question_type="text", category="summary", order_index=7))
+        db.commit()
+        db.close()
+
+    def test_summary_rows(self, client, auth_headers, query_counter):
+        self._add_summary_question()
+        first = _make_entry_payload()
+        first["date"] = "2026-03-01T18:00:00"
+        first["responses"] += [{"question_id": 6, "answer": "long notes " * 50},
+                               {"question_id": 7, "answer": "Good rolls"}]
+        first_id = client.post("/entries/", json=first, headers=auth_headers).json()["id"]
+        second = _make_entry_payload("No Gi")
+        second["date"] = "2026-03-02T18:00:00"
+        second_id = client.post("/entries/", json=second, headers=auth_headers).json()["id"]
+
+        with query_counter:
+            resp = client.get("/entries/summary", headers=auth_headers)
+        assert resp.json() == {
+            "columns": ["id", "date", "session_type", "rpe", "rounds", "summary"],
+            "rows": [
+                [second_id, "2026-03-02T18:00:00", "No Gi", 7, 5, None],
+                [first_id, "2026-03-01T18:00:00", "Gi", 7, 5, "Good rolls"],
+            ],
+        }
+        # summary question ids, the projection (the user comes from the token cache)
+        assert len(query_counter.selects) == 2
+
+    def test_summary_session_type_from_answer(self, client, auth_headers):
+        client.post("/entries/", json=_client_entry_payload("No Gi"), headers=auth_headers)
+        rows = client.get("/entries/summary", headers=auth_headers).json()["rows"]
+        assert [row[2] for row in rows] == ["No Gi"]
+
+    def test_summary_pages_like_listing(self, client, auth_headers):
+        for day in (1, 2, 3):
+            payload = _make_entry_payload()
+            payload["date"] = f"2026-03-0{day}T18:00:00"
+            client.post("/entries/", json=payload, headers=auth_headers)
+        page = client.get("/entries/summary?limit=2", headers=auth_headers)
+        assert [row[1][:10] for row in page.json()["rows"]] == ["2026-03-03", "2026-03-02"]
+        rest = client.get(f"/entries/summary?limit=2&before={page.headers['X-Next-Cursor']}", headers=auth_headers)
+        assert [row[1][:10] for row in rest.json()["rows"]] == ["2026-03-01"]
+
+
+class TestBulkImport:
+    def _batch(self, count, start=datetime(2026, 1, 5, 18, 0)):
+        entries = []
+        for i in range(count):
+            payload = _make_entry_payload("Gi" if i % 2 else "No Gi")
+            payload["date"] = (start + timedelta(days=i)).isoformat()
+            entries.append(payload)
+        return {"entries": entries}
+
+    def test_bulk_import_creates_everything(self, client, auth_headers, query_counter):
+        with query_counter:
+            resp = client.post("/entries/bulk", json=self._batch(30), headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json()["created"] == 30
+        assert resp.json()["replayed"] is False
+        writes = [s.lstrip().upper() for s in query_counter.writes]
+        assert len([s for s in writes if s.startswith("INSERT INTO RESPONSES")]) == 1
+        assert len([s for s in writes if s.startswith("INSERT INTO ENTRY_METRICS")]) == 1
+
+        listing = client.get("/entries/", headers=auth_headers).json()
+        assert sorted(e["id"] for e in listing) == sorted(resp.json()["entry_ids"])
+        assert all(len(e["responses"]) == 3 for e in listing)
+        db = TestingSessionLocal()
+        assert db.query(EntryMetrics).count() == 30
+        assert check_rollups(db) == []
+        db.close()
+
+    def test_invalid_items_reject_whole_batch(self, client, auth_headers):
+        batch = self._batch(3)
+        batch["entries"][1]["responses"].append({"question_id": 99, "answer": "?"})
+        batch["entries"][2]["session_type"] = " "
+        resp = client.post("/entries/bulk", json=batch, headers=auth_headers)
+        assert resp.status_code == 422
+        errors = resp.json()["detail"]["errors"]
+        assert [(e["index"], e["field"]) for e in errors] == [(1, "responses"), (2, "session_type")]
+        assert client.get("/entries/", headers=auth_headers).json() == []
+
+    def test_idempotency_key_replays(self, client, auth_headers):
+        batch = self._batch(2)
+        headers = dict(auth_headers, **{"Idempotency-Key": "import-2026-01"})
+        first = client.post("/entries/bulk", json=batch, headers=headers).json()
+        again = client.post("/entries/bulk", json=batch, headers=headers).json()
+        assert again["entry_ids"] == first["entry_ids"]
+        assert again["replayed"] is True
+        assert len(client.get("/entries/", headers=auth_headers).json()) == 2
+        conflict = client.post("/entries/bulk", json=self._batch(3), headers=headers)
+        assert conflict.status_code == 409
+
+    def test_active_injury_flags_later_entries(self, client, auth_headers):
+        client.post("/injuries/", json={"injured_area": "Knee", "injury_date": "2026-01-06",
+                                        "cause": "Takedown"}, headers=auth_headers)
+        resp = client.post("/entries/bulk", json=self._batch(3), headers=auth_headers)
+        flags = {e["id"]: e["injured_during_session"] for e in client.get("/entries/", headers=auth_headers).json()}
+        assert [flags[i] for i in resp.json()["entry_ids"]] == [False, True, True]
+
+
+class TestEntryMetrics:
+    def _metrics(self, entry_id):
+        db = TestingSessionLocal()
+        try:
+            return db.query(EntryMetrics).filter(EntryMetrics.entry_id == entry_id).first()
+        finally:
+            db.close()
+
+    def test_metrics_written_on_create(self, client, auth_headers):
+        payload = _make_entry_payload()
+        payload["responses"].append({"question_id": 4, "answer": "Closed Guard - Armbar"})
+        entry_id = client.post("/entries/", json=payload, headers=auth_headers).json()["id"]
+        metrics = self._metrics(entry_id)
+        assert metrics.rpe == 7
+        assert metrics.rounds == 5
+        assert metrics.session_type == "Gi"
+        assert metrics.position == "Closed Guard"
+        assert metrics.skill == "Armbar"
+
+    def test_metrics_refreshed_on_update(self, client, auth_headers):
+        entry_id = client.post("/entries/", json=_make_entry_payload(), headers=auth_headers).json()["id"]
+        updated = _make_entry_payload("No Gi")
+        updated["responses"] = [{"question_id": 2, "answer": "3"}, {"question_id": 5, "answer": "n/a"}]
+        client.put(f"/entries/{entry_id}", json=updated, headers=auth_headers)
+        metrics = self._metrics(entry_id)
+        assert metrics.rpe == 3
+        assert metrics.rounds is None
+        assert metrics.session_type == "No Gi"
+
+    def test_metrics_removed_with_entry(self, client, auth_headers):
+        entry_id = client.post("/entries/", json=_make_entry_payload(), headers=auth_headers).json()["id"]
+        client.delete(f"/entries/{entry_id}", headers=auth_headers)
+        assert self._metrics(entry_id) is None
+
+    def test_backfill(self, client, auth_headers):
+        entry_id = client.post("/entries/", json=_make_entry_payload(), headers=auth_headers).json()["id"]
+        db = TestingSessionLocal()
+        db.query(EntryMetrics).delete()
+        db.commit()
+        assert backfill_entry_metrics(db, batch_size=1) == 1
+        db.close()
+        assert self._metrics(entry_id).rpe == 7
+
+
+class TestDailyRollups:
+    def _rollups(self):
+        db = TestingSessionLocal()
+        try:
+            return {r.day: (r.sessions, r.rounds, r.rpe_sum, r.rpe_count, r.gi_sessions, r.nogi_sessions)
+                    for r in db.query(DailyTrainingRollup).all()}
+        finally:
+            db.close()
+
+    def _check(self):
+        db = TestingSessionLocal()
+        try:
+            return check_rollups(db)
+        finally:
+            db.close()
+
+    def test_rollup_accumulates_same_day(self, client, auth_headers):
+        client.post("/entries/", json=_make_entry_payload(), headers=auth_headers)
+        client.post("/entries/", json=_make_entry_payload("No Gi"), headers=auth_headers)
+        today = datetime.utcnow().date()
+        assert self._rollups() == {today: (2, 10, 14, 2, 1, 1)}
+        assert self._check() == []
+
+    def test_rollup_moves_with_updated_date(self, client, auth_headers):
+        entry_id = client.post("/entries/", json=_make_entry_payload(), headers=auth_headers).json()["id"]
+        moved = _make_entry_payload()
+        moved_date = datetime.utcnow() - timedelta(days=3)
+        moved["date"] = moved_date.isoformat()
+        client.put(f"/entries/{entry_id}", json=moved, headers=auth_headers)
+        assert self._rollups() == {moved_date.date(): (1, 5, 7, 1, 1, 0)}
+        assert self._check() == []
+
+    def test_rollup_move_across_months_reads_only_touched_days(self, client, auth_headers, query_counter):
+        middle = _make_entry_payload()
+        middle["date"] = (datetime.utcnow() - timedelta(days=100)).isoformat()
+        client.post("/entries/", json=middle, headers=auth_headers)
+        entry_id = client.post("/entries/", json=_make_entry_payload(), headers=auth_headers).json()["id"]
+        moved = _make_entry_payload()
+        moved_date = datetime.utcnow() - timedelta(days=200)
+        moved["date"] = moved_date.isoformat()
+        with query_counter:
+            client.put(f"/entries/{entry_id}", json=moved, headers=auth_headers)
+        metric_reads = [s for s in query_counter.selects if "FROM entry_metrics" in s and " OR " in s]
+        assert len(metric_reads) == 1  # one query, one range per touched day
+        assert self._rollups()[moved_date.date()] == (1, 5, 7, 1, 1, 0)
+        assert self._check() == []
+
+    def testday_ranges_merge_consecutive_days(self):
+        d = date(2026, 1, 1)
+        days = [d, d + timedelta(days=1), d + timedelta(days=5), d + timedelta(days=300)]
+        assert day_ranges(days) == [(d, d + timedelta(days=1)), (d + timedelta(days=5), d + timedelta(days=5)),
+                                     (d + timedelta(days=300), d + timedelta(days=300))]
+
+    def test_rollup_removed_with_last_entry(self, client, auth_headers):
+        entry_id = client.post("/entries/", json=_make_entry_payload(), headers=auth_headers).json()["id"]
+        client.delete(f"/entries/{entry_id}", headers=auth_headers)
+        assert self._rollups() == {}
+
+    def test_checker_reports_and_rebuild_fixes_drift(self, client, auth_headers):
+        client.post("/entries/", json=_make_entry_payload(), headers=auth_headers)
+        db = TestingSessionLocal()
+        db.query(DailyTrainingRollup).update({DailyTrainingRollup.sessions: 5})
+        db.commit()
+        mismatches = check_rollups(db)
+        assert len(mismatches) == 1
+        assert mismatches[0]["expected"]["sessions"] == 1
+        assert mismatches[0]["stored"]["sessions"] == 5
+        assert rebuild_rollups(db) == 1
+        assert check_rollups(db) == []
+        db.close()
@@ -0,0 +1,61 @@
+"""Tests for the streaming journal export."""
+import csv
+import io
+import json
+from datetime import date
+
+
+def _entry_payload(day, notes="Worked guard retention"):
+    return {
+        "date": f"2026-02-{day:02d}T18:00:00",
+        "session_type": "Gi",
+        "responses": [
+            {"question_id": 2, "answer": "6"},
+            {"question_id": 6, "answer": notes},
+        ]
+    }
+
+
+def _seed(client, headers):
+    client.post("/entries/", json=_entry_payload(3), headers=headers)
+    client.post("/entries/", json={**_entry_payload(1), "responses": []}, headers=headers)
+    client.post("/injuries/", json={"injured_area": "Knee", "injury_date": "2026-02-02", "cause": "Takedown"},
+                headers=headers)
+    client.post("/goals/", json={"weekly_sessions_target": 3, "start_date": date.today().isoformat()},
+                headers=headers)
+
+
+class TestExport:
+    def test_ndjson_export(self, client, auth_headers):
+        _seed(client, auth_headers)
+        resp = client.get("/export", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        assert "attachment" in resp.headers["content-disposition"]
+        records = [json.loads(line) for line in resp.text.splitlines()]
+        assert [r["type"] for r in records] == ["entry", "entry", "injury", "goal"]
+        assert records[0]["date"].startswith("2026-02-01")
+        assert records[0]["responses"] == []
+        assert records[1]["responses"] == [
+            {"question_id": 2, "question": "Rate of Perceived Exertion (1-9)", "answer": "6"},
+            {"question_id": 6, "question": "Journal Notes", "answer": "Worked guard retention"},
+        ]
+        assert records[2]["injured_area"] == "Knee"
+        assert "user_id" not in records[2]
+
+    def test_csv_export(self, client, auth_headers):
+        _seed(client, auth_headers)
+        resp = client.get("/export?format=csv", headers=auth_headers)
+        assert resp.headers["content-type"].startswith("text/csv")
+        rows = list(csv.reader(io.StringIO(resp.text)))
+        assert rows[0] == ["record_type", "record_id", "date", "field", "value"]
+        assert ["Journal Notes", "Worked guard retention"] in [row[3:] for row in rows if row[0] == "entry"]
+        assert any(row[0] == "injury" and row[3:] == ["injured_area", "Knee"] for row in rows)
+
+    def test_export_only_includes_own_data(self, client, auth_headers, second_user_headers):
+        _seed(client, auth_headers)
+        resp = client.get("/export", headers=second_user_headers)
+        assert resp.text == ""
+
+    def test_unknown_format_rejected(self, client, auth_headers):
+        assert client.get("/export?format=xml", headers=auth_headers).status_code == 422
@@ -1,5 +1,5 @@
 """Tests for goals and streak endpoints."""
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
 
 def _goal_payload(**overrides):
@@ -87,3 +87,183 @@ class TestQuestions:
         assert resp.status_code == 200
         assert len(resp.json()) >= 1
         assert resp.json()[0]["question_text"] == "Session Type"
+
+
+class TestStreakEngine:
+    """Incremental streak maintenance in app.streaks."""
+
+    def _setup(self, client, auth_headers, statuses):
+        from tests.conftest import TestingSessionLocal
+        from app.models import User, WeeklyProgress
+        from app.streaks import get_week_start
+        from app.streaks import apply_week_change
+
+        client.get("/profile/exists", headers=auth_headers)  # ensure the user exists
+        db = TestingSessionLocal()
+        user_id = db.query(User).first().id
+        first_week = get_week_start(date.today()) - timedelta(weeks=len(statuses) - 1)
+        rows = []
+        for i, met in enumerate(statuses):
+            row = WeeklyProgress(user_id=user_id, week_start_date=first_week + timedelta(weeks=i),
+                                 sessions_completed=0, goal_met=met, is_paused=False, streak_count=0)
+            db.add(row)
+            apply_week_change(db, user_id, row)
+            db.commit()
+            rows.append(row)
+        return db, user_id, rows
+
+    def _history(self, db, user_id):
+        from app.models import StreakHistory
+        return sorted(
+            (h.start_date, h.streak_length, h.is_current)
+            for h in db.query(StreakHistory).filter(StreakHistory.user_id == user_id).all()
+        )
+
+    def test_counts_consecutive_weeks(self, client, auth_headers):
+        db, user_id, rows = self._setup(client, auth_headers, [True, True, False, True, True, True])
+        assert [r.streak_count for r in rows] == [1, 2, 0, 1, 2, 3]
+        assert self._history(db, user_id) == [
+            (rows[0].week_start_date, 2, False),
+            (rows[3].week_start_date, 3, True),
+        ]
+        db.close()
+
+    def test_filling_a_gap_merges_runs(self, client, auth_headers):
+        from app.streaks import apply_week_change
+        db, user_id, rows = self._setup(client, auth_headers, [True, True, False, True, True])
+        rows[2].is_paused = True
+        apply_week_change(db, user_id, rows[2])
+        db.commit()
+        assert [r.streak_count for r in rows] == [1, 2, 3, 4, 5]
+        assert self._history(db, user_id) == [(rows[0].week_start_date, 5, True)]
+        db.close()
+
+    def test_breaking_a_week_splits_run(self, client, auth_headers):
+        from app.streaks import apply_week_change
+        db, user_id, rows = self._setup(client, auth_headers, [True, True, True, True])
+        rows[1].goal_met = False
+        apply_week_change(db, user_id, rows[1])
+        db.commit()
+        assert [r.streak_count for r in rows] == [1, 0, 1, 2]
+        assert self._history(db, user_id) == [
+            (rows[0].week_start_date, 1, False),
+            (rows[2].week_start_date, 2, True),
+        ]
+        db.close()
+
+    def test_missing_week_breaks_streak(self, client, auth_headers):
+        from app.models import WeeklyProgress
+        from app.streaks import apply_week_change
+        db, user_id, rows = self._setup(client, auth_headers, [True])
+        later = WeeklyProgress(user_id=user_id, week_start_date=rows[0].week_start_date + timedelta(weeks=2),
+                               sessions_completed=0, goal_met=True, is_paused=False, streak_count=0)
+        db.add(later)
+        apply_week_change(db, user_id, later)
+        db.commit()
+        assert later.streak_count == 1
+        db.close()
+
+    def test_repeated_reads_do_not_append_history(self, client, auth_headers):
+        from tests.conftest import TestingSessionLocal
+        from app.models import StreakHistory
+        client.post("/goals/", json=_goal_payload(weekly_sessions_target=1), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        for _ in range(3):
+            resp = client.get("/goals/streaks/current", headers=auth_headers)
+        assert resp.json()["current_streak"] == 1
+        assert resp.json()["longest_streak"] == 1
+        db = TestingSessionLocal()
+        assert db.query(StreakHistory).count() == 1
+        db.close()
+
+    def test_rebuild_replaces_legacy_rows(self, client, auth_headers):
+        from app.models import StreakHistory
+        from app.streaks import rebuild_streaks
+        db, user_id, rows = self._setup(client, auth_headers, [True, True, False, True, True, True])
+        # Legacy shape: adjacency-based counts and one history row appended per call,
+        # starting on whatever day the streak was read
+        for row, count in zip(rows, [1, 2, 3, 4, 5, 6]):
+            row.streak_count = count
+        db.query(StreakHistory).delete()
+        for offset in range(3):
+            db.add(StreakHistory(user_id=user_id, streak_length=6, is_current=True,
+                                 start_date=rows[0].week_start_date + timedelta(days=2 + offset)))
+        db.commit()
+        assert client.get("/goals/streaks/longest", headers=auth_headers).json()[0]["streak_length"] == 6
+
+        assert rebuild_streaks(db, user_id) == 2
+        assert [r.streak_count for r in rows] == [1, 2, 0, 1, 2, 3]
+        assert self._history(db, user_id) == [
+            (rows[0].week_start_date, 2, False),
+            (rows[3].week_start_date, 3, True),
+        ]
+        longest = client.get("/goals/streaks/longest", headers=auth_headers).json()
+        assert [s["streak_length"] for s in longest] == [3, 2]
+        # Incremental maintenance carries on from the rebuilt rows
+        from app.streaks import apply_week_change
+        rows[2].is_paused = True
+        apply_week_change(db, user_id, rows[2])
+        db.commit()
+        assert self._history(db, user_id) == [(rows[0].week_start_date, 6, True)]
+        db.close()
+
+
+class TestReadOnlyProgress:
+    """Progress is written when entries/goals change; the GET endpoints only read."""
+
+    def test_streak_and_progress_reads_issue_no_writes(self, client, auth_headers, query_counter):
+        client.post("/goals/", json=_goal_payload(weekly_sessions_target=1), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        with query_counter:
+            streak = client.get("/goals/streaks/current", headers=auth_headers)
+            current = client.get("/goals/progress/current-week", headers=auth_headers)
+            weekly = client.get(f"/goals/progress/weekly/{date.today().isoformat()}", headers=auth_headers)
+        assert query_counter.writes == []
+        assert streak.json()["current_streak"] == 1
+        assert current.json()["sessions_completed"] == 1
+        assert weekly.json()["goal_met"] is True
+
+    def test_deleting_entry_updates_progress(self, client, auth_headers):
+        client.post("/goals/", json=_goal_payload(weekly_sessions_target=1), headers=auth_headers)
+        entry_id = client.post("/entries/", json=_entry_payload(), headers=auth_headers).json()["id"]
+        client.delete(f"/entries/{entry_id}", headers=auth_headers)
+        resp = client.get("/goals/progress/current-week", headers=auth_headers)
+        assert resp.json()["sessions_completed"] == 0
+        assert resp.json()["goal_met"] is False
+        assert client.get("/goals/streaks/current", headers=auth_headers).json()["current_streak"] == 0
+
+    def _insert_entries(self, dates):
+        """Entries written straight to the database, bypassing the routers' progress hooks."""
+        from tests.conftest import TestingSessionLocal
+        from app.models import Entry, User
+        db = TestingSessionLocal()
+        user_id = db.query(User).first().id
+        entries = [Entry(user_id=user_id, date=d, session_type="training") for d in dates]
+        db.add_all(entries)
+        db.commit()
+        ids = [entry.id for entry in entries]
+        db.close()
+        return ids
+
+    def test_backfill_fills_weeks_without_writes(self, client, auth_headers):
+        from tests.conftest import TestingSessionLocal
+        from app.models import WeeklyProgress
+        from app.streaks import backfill_weekly_progress, get_week_start, rebuild_streaks
+        this_week = get_week_start(date.today())
+        client.post("/goals/", json=_goal_payload(weekly_sessions_target=1,
+                                                  start_date=(this_week - timedelta(weeks=2)).isoformat()),
+                    headers=auth_headers)
+        self._insert_entries([datetime.combine(this_week - timedelta(weeks=weeks), datetime.min.time())
+                              for weeks in (2, 1, 0)])
+        db = TestingSessionLocal()
+        db.query(WeeklyProgress).delete()
+        db.commit()
+        assert client.get("/goals/progress/current-week", headers=auth_headers).json() is None
+
+        assert backfill_weekly_progress(db) == 3
+        rebuild_streaks(db)
+        assert backfill_weekly_progress(db) == 0
+        db.close()
+        last_week = client.get(f"/goals/progress/weekly/{this_week - timedelta(weeks=1)}", headers=auth_headers)
+        assert last_week.json()["sessions_completed"] == 1
+        assert client.get("/goals/streaks/current", headers=auth_headers).json()["current_streak"] == 3
@@ -0,0 +1,119 @@
+"""Tests for the database health check and connection pool metrics."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_settings, pool_stats
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    def make(**settings):
+        options = dict(pool_settings(), **settings)
+        return create_engine(f"sqlite:///{tmp_path / 'pool.db'}",
+                             connect_args={"check_same_thread": False}, **options)
+    return make
+
+
+class TestHealthEndpoint:
+    def test_db_health_ok(self, client):
+        resp = client.get("/health/db")
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["status"] == "ok"
+        assert body["latency_ms"] >= 0
+        assert body["pool"]["pool"] == "StaticPool"
+        assert body["async"]["status"] == "ok"
+        assert body["async"]["latency_ms"] >= 0
+        assert body["async"]["pool"]["pool"] == "NullPool"
+
+    def test_db_health_reports_async_failure(self, client):
+        from app.database import get_async_db
+        from main import app
+
+        class BrokenSession:
+            async def execute(self, statement):
+                raise ConnectionError("async database unreachable")
+
+            def get_bind(self):
+                return create_engine("sqlite://")
+
+        async def broken_async_db():
+            yield BrokenSession()
+
+        previous = app.dependency_overrides[get_async_db]
+        app.dependency_overrides[get_async_db] = broken_async_db
+        try:
+            resp = client.get("/health/db")
+        finally:
+            app.dependency_overrides[get_async_db] = previous
+        assert resp.status_code == 503
+        body = resp.json()
+        assert body["status"] == "error"
+        assert body["async"] == {"status": "error", "error": "ConnectionError", "pool": {"pool": "SingletonThreadPool"}}
+        assert body["latency_ms"] >= 0
+
+
+class TestConnectionPool:
+    def test_settings_from_environment(self, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "12")
+        monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+        settings = pool_settings()
+        assert settings["pool_size"] == 12
+        assert settings["max_overflow"] == 10
+        assert settings["pool_pre_ping"] is False
+        assert settings["poolclass"] is InstrumentedQueuePool
+
+    def test_async_pool_is_instrumented(self, tmp_path):
+        import asyncio
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+                                     **pool_settings(asynchronous=True))
+
+        async def query():
+            async with engine.connect() as conn:
+                return (await conn.execute(text("SELECT 1"))).scalar()
+
+        async def run():
+            results = await asyncio.gather(*[query() for _ in range(20)])
+            stats = pool_stats(engine.sync_engine)
+            await engine.dispose()
+            return results, stats
+
+        results, stats = asyncio.run(run())
+        assert results == [1] * 20
+        assert stats["pool"] == InstrumentedAsyncQueuePool.__name__
+        assert stats["checkouts"] >= 20
+        assert stats["checked_out"] == 0
+        assert stats["timeouts"] == 0
+
+    def test_no_errors_under_concurrency(self, pooled_engine):
+        engine = pooled_engine(pool_size=2, max_overflow=1)
+
+        def query(_):
+            with engine.connect() as conn:
+                return conn.execute(text("SELECT 1")).scalar()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(query, range(160)))
+        assert results == [1] * 160
+        stats = pool_stats(engine)
+        assert stats["checkouts"] >= 160
+        assert stats["checked_out"] == 0
+        assert stats["timeouts"] == 0
+        assert stats["size"] == 2
+        engine.dispose()
+
+    def test_exhausted_pool_counts_timeouts(self, pooled_engine):
+        engine = pooled_engine(pool_size=1, max_overflow=0, pool_timeout=0.05)
+        with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+            assert pool_stats(engine)["checked_out"] == 1
+        stats = pool_stats(engine)
+        assert stats["timeouts"] == 1
+        assert stats["checkouts"] == 1
+        engine.dispose()
@@ -0,0 +1,94 @@
+"""Tests for structured request logging and per-user tracing."""
+import logging
+from datetime import datetime
+
+import pytest
+
+from app.log import LOGGER_NAME, ContextFilter, JsonFormatter, set_user_trace, traced_users
+
+
+def _entry_payload():
+    return {
+        "date": datetime.utcnow().isoformat(),
+        "session_type": "Gi",
+        "responses": [
+            {"question_id": 1, "answer": "Gi"},
+            {"question_id": 2, "answer": "6"},
+            {"question_id": 6, "answer": "private journal text"},
+        ]
+    }
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.addFilter(ContextFilter())
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def messages(self):
+        return [r.getMessage() for r in self.records]
+
+    def find(self, message):
+        return [r for r in self.records if r.getMessage() == message]
+
+
+@pytest.fixture
+def log_records():
+    handler = _ListHandler()
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+    for user_id in traced_users():
+        set_user_trace(user_id, False)
+
+
+class TestRequestLogging:
+    def test_dashboard_logs_summary_not_rows(self, client, auth_headers, log_records, capsys):
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        client.get("/analytics/dashboard", headers=auth_headers)
+        summary = log_records.find("dashboard computed")[0]
+        assert summary.fields["entries"] == 1
+        assert summary.fields["responses"] == 3
+        assert summary.user_id == 1
+        assert "private journal text" not in capsys.readouterr().out
+        assert not any("journal" in str(r.fields) for r in log_records.records)
+
+    def test_request_line_has_timing_and_request_id(self, client, auth_headers, log_records):
+        resp = client.get("/entries/", headers=auth_headers)
+        line = [r for r in log_records.find("request") if r.fields["path"] == "/entries/"][0]
+        assert line.fields["status"] == 200
+        assert line.fields["duration_ms"] >= 0
+        assert line.fields["queries"] >= 1
+        assert line.request_id == resp.headers["X-Request-ID"]
+
+    def test_json_formatter_includes_fields(self, client, auth_headers, log_records):
+        client.get("/entries/", headers=auth_headers)
+        line = JsonFormatter().format(log_records.find("request")[-1])
+        assert '"path": "/entries/"' in line
+        assert '"level": "INFO"' in line
+
+
+class TestUserTracing:
+    def test_trace_only_for_traced_user(self, client, auth_headers, log_records):
+        client.post("/entries/", json=_entry_payload(), headers=auth_headers)
+        client.get("/analytics/dashboard?period=all", headers=auth_headers)
+        assert log_records.find("dashboard entries loaded") == []
+
+        set_user_trace(1, True)
+        client.get("/analytics/dashboard?period=1y", headers=auth_headers)
+        traced = log_records.find("dashboard entries loaded")
+        assert len(traced) == 1
+        assert traced[0].fields["trace"] is True
+
+    def test_trace_endpoints_need_token(self, client, monkeypatch):
+        assert client.put("/debug/trace/5").status_code == 404
+        monkeypatch.setenv("DEBUG_TRACE_TOKEN", "secret")
+        assert client.put("/debug/trace/5", headers={"X-Debug-Token": "wrong"}).status_code == 404
+        resp = client.put("/debug/trace/5", headers={"X-Debug-Token": "secret"})
+        assert resp.json() == {"user_ids": [5]}
+        resp = client.delete("/debug/trace/5", headers={"X-Debug-Token": "secret"})
+        assert resp.json() == {"user_ids": []}
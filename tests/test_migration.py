@@ -0,0 +1,116 @@
+"""Tests for the chunked, resumable database-to-database migration."""
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.migration import Migration, checkpoints, dependency_levels, mismatches
+from app.models import Entry, Question, Response, User
+from tests.conftest import TestingSessionLocal, engine
+
+
+def _entry_payload(day):
+    return {
+        "date": f"2026-04-{day:02d}T18:00:00",
+        "session_type": "Gi",
+        "responses": [
+            {"question_id": 2, "answer": "6"},
+            {"question_id": 6, "answer": f"Session {day}"},
+        ]
+    }
+
+
+def _seed(client, headers, days=(1, 3, 5)):
+    for day in days:
+        client.post("/entries/", json=_entry_payload(day), headers=headers)
+
+
+@pytest.fixture
+def target(tmp_path):
+    """A file-backed target that already has another user and the seeded questions."""
+    target_engine = create_engine(f"sqlite:///{tmp_path / 'target.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=target_engine)
+    db = sessionmaker(bind=target_engine)()
+    db.add(User(username="existing", hashed_password="x"))
+    source = TestingSessionLocal()
+    db.add_all(Question(question_text=q.question_text, question_type=q.question_type, category=q.category)
+               for q in source.query(Question).order_by(Question.id.desc()))
+    source.close()
+    db.commit()
+    db.close()
+    yield target_engine
+    target_engine.dispose()
+
+
+def _count(target_engine, model):
+    with target_engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+
+class TestMigration:
+    def test_copies_and_remaps_foreign_keys(self, client, auth_headers, target):
+        _seed(client, auth_headers)
+        report = Migration(engine, target, chunk_size=2).run()
+        assert mismatches(report) == []
+        assert report["entries"]["copied"] == 3
+        assert report["questions"]["matched"] == 6
+
+        with sessionmaker(bind=target)() as db:
+            user = db.query(User).filter(User.username == "testuser").one()
+            assert user.id == 2  # the target's own user kept id 1
+            entries = db.query(Entry).order_by(Entry.date).all()
+            assert [e.user_id for e in entries] == [user.id] * 3
+            notes = db.query(Question).filter(Question.question_text == "Journal Notes").one()
+            answers = db.query(Response.answer).filter(Response.question_id == notes.id).order_by(Response.id)
+            assert [a for a, in answers] == ["Session 1", "Session 3", "Session 5"]
+
+    def test_resumes_after_failure(self, client, auth_headers, target, monkeypatch):
+        _seed(client, auth_headers, days=range(1, 8))
+        migration = Migration(engine, target, chunk_size=2)
+        original = migration._save
+        calls = {"entries": 0}
+
+        def fail_midway(conn, table, state):
+            if table.name == "entries":
+                calls["entries"] += 1
+                if calls["entries"] == 3:
+                    raise RuntimeError("connection lost")
+            original(conn, table, state)
+
+        monkeypatch.setattr(migration, "_save", fail_midway)
+        with pytest.raises(RuntimeError):
+            migration.run()
+        assert _count(target, Entry) == 4  # two committed chunks
+
+        report = Migration(engine, target, chunk_size=2).run()
+        assert mismatches(report) == []
+        assert _count(target, Entry) == 7
+        assert _count(target, Response) == 14
+        with target.connect() as conn:
+            assert all(done for done, in conn.execute(select(checkpoints.c.done)))
+
+    def test_parallel_workers(self, client, auth_headers, target):
+        _seed(client, auth_headers)
+        client.post("/injuries/", json={"injured_area": "Knee", "injury_date": "2026-04-02", "cause": "Takedown"},
+                    headers=auth_headers)
+        report = Migration(engine, target, chunk_size=1, workers=4).run()
+        assert mismatches(report) == []
+        assert report["injury_logs"]["copied"] == 1
+
+    def test_orphans_are_reported_not_copied(self, client, auth_headers, target):
+        _seed(client, auth_headers, days=(1,))
+        db = TestingSessionLocal()
+        db.add(Response(entry_id=999, question_id=2, answer="7"))
+        db.commit()
+        db.close()
+        report = Migration(engine, target).run()
+        assert report["responses"]["orphaned"] == 1
+        assert report["responses"]["copied"] == 2
+        assert mismatches(report) == []
+
+    def test_dependency_levels_put_parents_first(self):
+        levels = [[t.name for t in group] for group in dependency_levels(list(Base.metadata.sorted_tables))]
+        assert {"users", "questions"} <= set(levels[0])
+        level_of = {name: i for i, group in enumerate(levels) for name in group}
+        assert level_of["entries"] < level_of["responses"]
+        assert level_of["entries"] < level_of["entry_metrics"]
@@ -0,0 +1,91 @@
+"""Query plan audit: per-user time-range scans must use the composite indexes.
+
+SQLite runs against the shared test engine. Postgres runs when
+TEST_POSTGRES_URL points at a scratch database.
+"""
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.metrics import entry_summary_query
+from app.models import Entry, Response, UserGoal, TechniqueGoal, InjuryLog
+from app.streaks import sessions_in_week_query, get_week_start
+from tests.conftest import TestingSessionLocal
+
+
+INDEX_NAMES = [
+    "ix_entries_user_id_date",
+    "ix_responses_entry_id_question_id",
+    "ix_user_goals_user_id_is_active",
+    "ix_technique_goals_user_id_is_active",
+    "ix_injury_logs_user_id_end_date",
+]
+
+
+def _plan_queries(db):
+    """The hot read paths, keyed by the index each one should use."""
+    return {
+        "ix_entries_user_id_date": sessions_in_week_query(db, 1, get_week_start(date.today())),
+        "ix_responses_entry_id_question_id": db.query(Response).filter(
+            Response.entry_id.in_([1, 2, 3]), Response.question_id == 5
+        ),
+        "ix_user_goals_user_id_is_active": db.query(UserGoal).filter(
+            UserGoal.user_id == 1, UserGoal.is_active == True
+        ),
+        "ix_technique_goals_user_id_is_active": db.query(TechniqueGoal).filter(
+            TechniqueGoal.user_id == 1, TechniqueGoal.is_active == True
+        ),
+        "ix_injury_logs_user_id_end_date": db.query(InjuryLog).filter(
+            InjuryLog.user_id == 1, InjuryLog.end_date.is_(None)
+        ),
+    }
+
+
+def _explain(db, query, prefix):
+    compiled = query.statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    rows = db.execute(text(f"{prefix} {compiled}")).fetchall()
+    return "\n".join(" ".join(str(col) for col in row) for row in rows)
+
+
+class TestSqliteQueryPlans:
+    @pytest.mark.parametrize("index_name", INDEX_NAMES)
+    def test_index_used(self, index_name):
+        db = TestingSessionLocal()
+        try:
+            plan = _explain(db, _plan_queries(db)[index_name], "EXPLAIN QUERY PLAN")
+        finally:
+            db.close()
+        assert index_name in plan
+
+    def test_summary_page_looks_up_only_its_rows(self):
+        db = TestingSessionLocal()
+        try:
+            page = entry_summary_query(db, 1).order_by(Entry.date.desc(), Entry.id.desc()).limit(20)
+            plan = _explain(db, page, "EXPLAIN QUERY PLAN")
+        finally:
+            db.close()
+        # One indexed lookup per returned entry, not a grouped pass over every response
+        assert "CORRELATED SCALAR SUBQUERY" in plan
+        assert "ix_responses_entry_id_question_id" in plan
+        assert "GROUP BY" not in plan
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+class TestPostgresQueryPlans:
+    def test_indexes_used(self):
+        engine = create_engine(os.getenv("TEST_POSTGRES_URL"))
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            # Empty tables favour sequential scans; rule them out to see which index is chosen
+            db.execute(text("SET enable_seqscan = off"))
+            for index_name, query in _plan_queries(db).items():
+                assert index_name in _explain(db, query, "EXPLAIN"), index_name
+        finally:
+            db.rollback()
+            db.close()
+            engine.dispose()
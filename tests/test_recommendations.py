@@ -9,7 +9,10 @@ from app.routers.recommendations import (
     recommend_intensity,
     extract_rpe_values,
     extract_technique_data,
+    recommend,
+    TrainingSnapshot,
 )
+from app.cache import get_cache
 
 
 # --- Helpers to build fake data ---
@@ -338,3 +341,136 @@ class TestIntensityRecommendations:
     def test_no_recs_with_empty_rpe(self):
         recs = recommend_intensity([], total_sessions=10, active_injuries=[])
         assert len(recs) == 0
+
+
+# =====================
+# Technique parsing
+# =====================
+
+class TestExtractTechniqueData:
+    def test_named_submissions_count_as_attacks(self):
+        now = datetime.utcnow()
+        entry = make_entry(now)
+        responses = [
+            make_response(1, "Class Technique", "Mount - Armbar", entry),
+            make_response(1, "Class Technique", "Back Control - rear naked choke", entry),
+            make_response(1, "Class Technique", "Mount - Escapes", entry),
+            make_response(1, "Class Technique", "Open mat", entry),
+        ]
+        td = extract_technique_data(responses)
+        assert td["skill_counts"] == {"Attacks/Submissions": 2, "Escapes": 1}
+        assert td["position_counts"] == {"Mount": 2, "Back Control": 1}
+        assert td["position_skills"]["Mount"] == {"Attacks/Submissions": 1, "Escapes": 1}
+        assert td["position_last_seen"]["Mount"] == now
+
+    def test_entry_dates_are_taken_from_the_map(self):
+        old, new = datetime(2026, 1, 1), datetime(2026, 3, 1)
+        responses = [
+            make_response(1, "Class Technique", "Mount - Escapes"),
+            make_response(2, "Class Technique", "Mount - Sweeps"),
+        ]
+        td = extract_technique_data(responses, entry_dates={1: old, 2: new})
+        assert td["position_last_seen"]["Mount"] == new
+
+
+class TestResponseIndex:
+    def test_shared_index_feeds_recommendations(self):
+        from app.dashboard import ResponseIndex
+        responses = [
+            make_response(1, "Rate of Perceived Exertion (RPE)", "7"),
+            make_response(2, "Class Technique", "Guard - Sweeps"),
+            make_response(1, "Class Technique", "Mount - Escapes"),
+            make_response(2, "Rate of Perceived Exertion (RPE)", "x"),
+            make_response(2, "Rate of Perceived Exertion (RPE)", "5"),
+            make_response(2, "Journal Notes", "Good"),
+        ]
+        index = ResponseIndex(responses)
+        assert index.first_rpe == {1: 7, 2: 5}
+        # Technique responses keep the order they were given in
+        assert [r.answer for r in index.technique_responses] == ["Guard - Sweeps", "Mount - Escapes"]
+        assert list(extract_technique_data(responses, index=index)["position_counts"]) == ["Guard", "Mount"]
+
+    def test_rpe_uses_first_numeric_answer_per_entry(self):
+        now = datetime.utcnow()
+        entries = [make_entry(now, id_=1), make_entry(now - timedelta(days=1), id_=2)]
+        responses = [
+            make_response(2, "Rate of Perceived Exertion (RPE)", "x"),
+            make_response(2, "Rate of Perceived Exertion (RPE)", "5"),
+            make_response(1, "Rate of Perceived Exertion (RPE)", "7"),
+            make_response(1, "Rate of Perceived Exertion (RPE)", "3"),
+        ]
+        assert [d["rpe"] for d in extract_rpe_values(entries, responses)] == [5, 7]
+
+
+def _entry_payload(days_ago, position="Mount"):
+    return {
+        "date": (datetime.utcnow() - timedelta(days=days_ago)).isoformat(),
+        "session_type": "Gi",
+        "responses": [
+            {"question_id": 2, "answer": "6"},
+            {"question_id": 4, "answer": f"{position} - Armbar"},
+        ]
+    }
+
+
+class TestRecommendationQueries:
+    def _selects(self, client, headers, query_counter, sessions):
+        for day in range(sessions):
+            client.post("/entries/", json=_entry_payload(day), headers=headers)
+        get_cache().clear()
+        with query_counter:
+            resp = client.get("/recommendations/", headers=headers)
+        assert resp.status_code == 200
+        return len(query_counter.selects)
+
+    def test_query_count_does_not_grow_with_entries(self, client, auth_headers, second_user_headers, query_counter):
+        few = self._selects(client, auth_headers, query_counter, 2)
+        many = self._selects(client, second_user_headers, query_counter, 12)
+        assert few == many == 4  # entries with responses, injuries, the weekly goal, technique goals
+
+
+class TestTrainingSnapshot:
+    def test_rules_run_on_a_plain_snapshot(self):
+        class FakeGoal:
+            weekly_sessions_target = 1
+        now = datetime.utcnow()
+        entries = [make_entry(now - timedelta(days=i), id_=i + 1) for i in range(0, 28, 2)]
+        responses = [make_response(e.id, "Rate of Perceived Exertion (RPE)", "8") for e in entries]
+        result = recommend(TrainingSnapshot(entries, responses, ["knee"], goal=FakeGoal()))
+        assert {r["type"] for r in result["recommendations"]} == {"intensity", "goal"}
+        assert result["meta"]["rpe_data_points"] == 14
+
+    def test_responses_keep_id_order(self, client, auth_headers):
+        from app.models import User
+        from app.routers.recommendations import load_training_snapshot
+        from tests.conftest import TestingSessionLocal
+        # The newer session is logged second, so date order and id order disagree
+        client.post("/entries/", json=_entry_payload(5, "Side Control"), headers=auth_headers)
+        client.post("/entries/", json=_entry_payload(1, "Mount"), headers=auth_headers)
+        db = TestingSessionLocal()
+        user_id = db.query(User.id).scalar()
+        ids = [r.id for r in load_training_snapshot(db, user_id).responses]
+        db.close()
+        assert ids == sorted(ids)
+
+    def test_user_collections_are_not_overwritten(self, client, auth_headers):
+        from app.models import User
+        from app.routers.recommendations import load_training_snapshot
+        from tests.conftest import TestingSessionLocal
+        client.post("/goals/", json={"weekly_sessions_target": 2, "start_date": "2026-04-01"}, headers=auth_headers)
+        client.post("/goals/", json={"weekly_sessions_target": 3, "start_date": "2026-04-08"}, headers=auth_headers)
+        db = TestingSessionLocal()
+        user = db.query(User).one()
+        assert len(user.goals) == 2
+        snapshot = load_training_snapshot(db, user.id)
+        assert snapshot.goal.weekly_sessions_target == 3
+        assert len(user.goals) == 2
+        db.close()
+
+    def test_only_active_injuries_are_loaded(self, client, auth_headers):
+        injury = {"injured_area": "Knee", "injury_date": "2026-04-02", "cause": "Takedown"}
+        client.post("/injuries/", json=injury, headers=auth_headers)
+        healed = dict(injury, injured_area="Neck", end_date="2026-04-10")
+        assert client.post("/injuries/", json=healed, headers=auth_headers).status_code == 200
+        meta = client.get("/recommendations/", headers=auth_headers).json()["meta"]
+        assert meta["active_injuries"] == ["knee"]
@@ -0,0 +1,91 @@
+"""Tests for the recommendation rule registry."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.routers.recommendations import TrainingSnapshot, rules as recommendation_rules
+from app.rules import RuleSet
+from tests.test_recommendations import make_entry, make_response
+
+
+def _rec(type_, priority, title):
+    return {"type": type_, "priority": priority, "title": title}
+
+
+def _run_all(ruleset, context, gates):
+    """Every rule in registration order, then the first best-priority result per type."""
+    order = {"high": 0, "medium": 1, "low": 2}
+    recs = []
+    for rule in ruleset.rules:
+        if rule.gate is None or gates.get(rule.gate):
+            recs += rule.func(context)
+    recs.sort(key=lambda r: order[r["priority"]])
+    seen, top = set(), []
+    for rec in recs:
+        if rec["type"] not in seen:
+            seen.add(rec["type"])
+            top.append(rec)
+    return top
+
+
+class TestRuleSet:
+    def test_high_result_short_circuits_its_type(self):
+        rules = RuleSet()
+        rules.rule("a", "medium", name="first")(lambda ctx: [_rec("a", "medium", "first")])
+        rules.rule("a", "high", name="second")(lambda ctx: [_rec("a", "high", "second")])
+        rules.rule("a", "high", name="third")(lambda ctx: [_rec("a", "high", "third")])
+        rules.rule("b", "low", name="other")(lambda ctx: [_rec("b", "low", "other")])
+        assert rules.evaluate(None) == [_rec("a", "high", "second"), _rec("b", "low", "other")]
+        stats = {s["name"]: s for s in rules.stats()}
+        assert stats["third"]["runs"] == 0 and stats["third"]["skipped"] == 1
+        assert stats["first"]["runs"] == 0  # a medium rule cannot beat a high result
+        assert stats["other"]["hits"] == 1
+
+    def test_earlier_rule_wins_a_tie(self):
+        rules = RuleSet()
+        rules.rule("a", "medium", name="early")(lambda ctx: [_rec("a", "low", "early")])
+        rules.rule("a", "high", name="late")(lambda ctx: [_rec("a", "low", "late")])
+        assert rules.evaluate(None) == [_rec("a", "low", "early")]
+
+    def test_closed_gate_skips_rule(self):
+        rules = RuleSet()
+        rules.rule("a", "high", gate="data", name="gated")(lambda ctx: [_rec("a", "high", "x")])
+        assert rules.evaluate(None, {"data": False}) == []
+        assert rules.stats()[0]["gated"] == 1
+        assert len(rules.evaluate(None, {"data": True})) == 1
+        assert rules.stats()[0]["runs"] == 1
+
+    def test_rejects_unknown_priority(self):
+        with pytest.raises(ValueError):
+            RuleSet().rule("a", "urgent")(lambda ctx: [])
+
+    def test_matches_running_every_rule(self):
+        rng = random.Random(7)
+        now = datetime.utcnow()
+        positions = ["Closed Guard", "Half Guard", "Mount", "Guard Passing", "Back Control"]
+        skills = ["Sweeps", "Escapes", "Armbar"]
+        for _ in range(30):
+            entries = [make_entry(now - timedelta(days=rng.randint(0, 89)), id_=i) for i in range(rng.randint(0, 40))]
+            responses = []
+            for entry in entries:
+                responses.append(make_response(entry.id, "Rate of Perceived Exertion (1-9)", str(rng.randint(1, 9))))
+                technique = f"{rng.choice(positions)} - {rng.choice(skills)}"
+                responses.append(make_response(entry.id, "Class Technique", technique))
+            injuries = rng.choice([[], ["knee"]])
+            snapshot = TrainingSnapshot(entries, responses, injuries)
+            assert recommendation_rules.evaluate(snapshot, snapshot.gates) == \
+                _run_all(recommendation_rules, snapshot, snapshot.gates)
+
+
+class TestRuleStatsEndpoint:
+    def test_stats_need_token_and_count_runs(self, client, auth_headers, monkeypatch):
+        assert client.get("/debug/rules").status_code == 404
+        monkeypatch.setenv("DEBUG_TRACE_TOKEN", "secret")
+        headers = {"X-Debug-Token": "secret"}
+        client.delete("/debug/rules", headers=headers)
+        client.get("/recommendations/", headers=auth_headers)
+        stats = {s["name"]: s for s in client.get("/debug/rules", headers=headers).json()["rules"]}
+        assert stats["technique_goals"]["runs"] == 1
+        assert stats["stale_positions"]["gated"] == 1
+        assert stats["technique_goals"]["avg_ms"] >= 0
@@ -0,0 +1,66 @@
+"""Tests for the SQLite connection pragmas (WAL, busy timeout, sync level)."""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import SQLITE_PRAGMAS, apply_sqlite_pragmas, create_database_engine, database_url
+
+
+def _engine(path, **overrides):
+    return apply_sqlite_pragmas(
+        create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}),
+        dict(SQLITE_PRAGMAS, **overrides),
+    )
+
+
+def _seed(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO t (id) VALUES (1), (2), (3)"))
+
+
+def _write_while_reading(engine):
+    """Commit a write while another connection is part-way through reading."""
+    with engine.connect() as reader:
+        rows = reader.execute(text("SELECT id FROM t"))
+        rows.fetchone()  # the open cursor keeps a read lock
+        with engine.begin() as writer:
+            writer.execute(text("INSERT INTO t (id) VALUES (4)"))
+        assert [row.id for row in rows] == [2, 3]
+
+
+class TestSqlitePragmas:
+    def test_sqlite_database_url_gets_pragmas(self, tmp_path, monkeypatch):
+        # As in docker-compose, which points DATABASE_URL at the SQLite file
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'compose.db'}")
+        engine = create_database_engine(database_url())
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_PRAGMAS["busy_timeout"]
+        engine.dispose()
+
+    def test_postgres_scheme_is_normalised(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_URL", "postgres://u:p@db/bjj")
+        assert database_url() == "postgresql://u:p@db/bjj"
+
+    def test_pragmas_applied(self, tmp_path):
+        engine = _engine(tmp_path / "wal.db")
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_PRAGMAS["busy_timeout"]
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == SQLITE_PRAGMAS["cache_size"]
+        engine.dispose()
+
+    def test_wal_commits_while_reader_is_open(self, tmp_path):
+        engine = _engine(tmp_path / "wal.db")
+        _seed(engine)
+        _write_while_reading(engine)
+        engine.dispose()
+
+    def test_rollback_journal_blocks_writer(self, tmp_path):
+        engine = _engine(tmp_path / "delete.db", journal_mode="DELETE", busy_timeout=50)
+        _seed(engine)
+        with pytest.raises(OperationalError, match="locked"):
+            _write_while_reading(engine)
+        engine.dispose()
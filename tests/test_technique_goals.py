@@ -229,6 +229,26 @@ class TestTechniqueGoalProgress:
         g = resp.json()[0]
         assert g["session_count"] == 2
 
+    def test_progress_matches_position_case_insensitively(self, client, auth_headers):
+        from tests.conftest import TestingSessionLocal
+        from app.models import TechniqueGoal
+
+        r = client.post("/goals/techniques", json=_technique_goal_payload(position="Mount"), headers=auth_headers)
+        goal_id = r.json()["id"]
+        db = TestingSessionLocal()
+        db.query(TechniqueGoal).filter(TechniqueGoal.id == goal_id).update(
+            {"created_at": datetime.utcnow() - timedelta(days=3)})
+        db.commit()
+        db.close()
+        client.post("/entries/", json=_entry_with_technique("mount", "Sweeps", 0), headers=auth_headers)
+        client.post("/entries/", json=_entry_with_technique("MOUNT", "Escapes", 1), headers=auth_headers)
+        progress = client.get("/goals/techniques/progress", headers=auth_headers).json()[0]
+        assert progress["session_count"] == 2
+
+        client.post(f"/goals/techniques/{goal_id}/complete", json={"action": "complete"}, headers=auth_headers)
+        history = client.get("/goals/techniques/history", headers=auth_headers).json()[0]
+        assert history["session_count"] == progress["session_count"]
+
     def test_progress_days_left(self, client, auth_headers):
         client.post("/goals/techniques", json=_technique_goal_payload(timeline_weeks=4), headers=auth_headers)
         resp = client.get("/goals/techniques/progress", headers=auth_headers)
@@ -245,6 +265,23 @@ class TestTechniqueGoalProgress:
         assert g["days_left"] is None
         assert g["total_days"] is None
 
+    def test_progress_goal_without_created_at(self, client, auth_headers):
+        from tests.conftest import TestingSessionLocal
+        from app.models import TechniqueGoal
+
+        r = client.post("/goals/techniques", json=_technique_goal_payload(position="Mount"), headers=auth_headers)
+        client.post("/entries/", json=_entry_with_technique("Mount", "Sweeps", 30), headers=auth_headers)
+        db = TestingSessionLocal()
+        db.query(TechniqueGoal).filter(TechniqueGoal.id == r.json()["id"]).update({"created_at": None})
+        db.commit()
+        db.close()
+        resp = client.get("/goals/techniques/progress", headers=auth_headers)
+        assert resp.status_code == 200
+        g = resp.json()[0]
+        assert g["session_count"] == 1
+        assert g["days_left"] is None
+        assert g["total_days"] == 28
+
     def test_progress_weekly_streak(self, client, auth_headers):
         from tests.conftest import TestingSessionLocal
         from app.models import TechniqueGoal
@@ -265,6 +302,31 @@ class TestTechniqueGoalProgress:
         # Should have at least 1 week streak (current week)
         assert g["weekly_streak"] >= 1
 
+    def test_progress_query_count_independent_of_goals(self, client, auth_headers, query_counter):
+        from tests.conftest import TestingSessionLocal
+        from app.models import TechniqueGoal
+
+        positions = ["Mount", "Back Control", "Half Guard", "Side Control", "Closed Guard"]
+        for position in positions:
+            client.post("/goals/techniques", json=_technique_goal_payload(position=position), headers=auth_headers)
+        db = TestingSessionLocal()
+        for goal in db.query(TechniqueGoal).all():
+            goal.created_at = datetime.utcnow() - timedelta(weeks=20)
+        db.commit()
+        db.close()
+        for week in range(20):
+            for position in positions:
+                client.post("/entries/", json=_entry_with_technique(position, "Sweeps", week * 7), headers=auth_headers)
+
+        with query_counter:
+            resp = client.get("/goals/techniques/progress", headers=auth_headers)
+        # Goals, technique answers (the user comes from the token cache)
+        assert len(query_counter.selects) == 2
+        data = resp.json()
+        assert [g["session_count"] for g in data] == [20] * 5
+        assert all(g["weekly_streak"] >= 19 for g in data)
+        assert all(g["last_trained"] is not None for g in data)
+
 
 # =====================
 # Expired
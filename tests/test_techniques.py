@@ -0,0 +1,30 @@
+"""Tests for the shared technique taxonomy."""
+from app.techniques import classify_technique, parse_technique, position_and_skill_type
+
+
+class TestTechniqueClassifier:
+    def test_parse(self):
+        assert parse_technique("Closed Guard - Armbar") == ("Closed Guard", "Armbar")
+        assert parse_technique(" Mount  -  Escapes ") == ("Mount", "Escapes")
+        assert parse_technique("Drilled takedowns") is None
+
+    def test_submissions_match_case_insensitively(self):
+        assert classify_technique("Closed Guard - Armbar") == ("Closed Guard - Attacks/Submissions", "Armbar")
+        assert classify_technique("Back Control - bow and arrow choke") == (
+            "Back Control - Attacks/Submissions", "bow and arrow choke")
+        assert classify_technique("Half Guard - D'Arce") == ("Half Guard - Attacks/Submissions", "D'Arce")
+
+    def test_other_skills_keep_their_category(self):
+        assert classify_technique("Mount - Escapes") == ("Mount - Escapes", None)
+        assert classify_technique("Mount - Attacks/Submissions") == ("Mount - Attacks/Submissions", None)
+        assert classify_technique("Open mat") is None
+
+    def test_skill_type(self):
+        assert position_and_skill_type("Side Control - Kimura") == ("Side Control", "Attacks/Submissions")
+        assert position_and_skill_type("Side Control - Transitions") == ("Side Control", "Transitions")
+
+    def test_classification_is_memoized(self):
+        classify_technique.cache_clear()
+        classify_technique("Mount - Americana")
+        classify_technique("Mount - Americana")
+        assert classify_technique.cache_info().hits == 1